@@ -16,3 +16,7 @@ if not _ASTROPY_SETUP_:
     from .masking import *
     from .activity import *
     from .spectral_type import *
+    from .blaze import *
+    from .ccf import *
+    from .resample import *
+    from .pipeline import *
@@ -4,6 +4,8 @@ Tools for measuring equivalent widths, S-indices.
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+from copy import copy
+
 import numpy as np
 import matplotlib.pyplot as plt
 
@@ -13,12 +15,23 @@ from astropy.time import Time
 from .catalog import query_catalog_for_object
 
 __all__ = ['integrate_spectrum_trapz', 'true_h_centroid', 'true_k_centroid',
-           'uncalibrated_s_index', 'StarProps', 'Measurement',
+           'uncalibrated_s_index', 'uncalibrated_s_indices',
+           'integrate_bandpasses', 'BandpassIntegrator', 's_index_integrators',
+           'StarProps', 'Measurement', 'MeasurementTable',
            'FitParameter']
 
 true_h_centroid = 3968.4673 * u.Angstrom
 true_k_centroid = 3933.6614 * u.Angstrom
 
+# Echelle orders and bandpasses of the S-index measurement
+h_order, k_order, r_order, v_order = 89, 90, 91, 88
+r_centroid = 3900 * u.Angstrom
+v_centroid = 4000 * u.Angstrom
+hk_fwhm = 1.09 * u.Angstrom
+hk_width = 2 * hk_fwhm
+_hk_fwhm_angstrom = hk_fwhm.to(u.Angstrom).value
+rv_width = 20 * u.Angstrom
+
 
 def integrate_spectrum_trapz(spectrum, center_wavelength, width,
                              weighting=False, plot=False):
@@ -57,6 +70,7 @@ def integrate_spectrum_trapz(spectrum, center_wavelength, width,
 
     # Assert fluxes are not negative
     flux.value[flux.value < 0] = 0.0
+    spectrum.reset_masked_views()
 
     if (not center_wavelength < wavelength.max() and
             not center_wavelength > wavelength.min()):
@@ -131,7 +145,7 @@ def triangle_weighting(x, x0, fwhm=1.09*u.Angstrom):
     return weights
 
 
-def uncalibrated_s_index(spectrum, plots=False):
+def uncalibrated_s_index(spectrum, plots=False, integrators=None):
     """
     Calculate the uncalibrated S-index from an Echelle spectrum.
 
@@ -139,6 +153,10 @@ def uncalibrated_s_index(spectrum, plots=False):
     ----------
     spectrum : `EchelleSpectrum`
         Normalized target spectrum
+    integrators : dict (optional)
+        Precomputed `BandpassIntegrator` objects for the ``'h'``, ``'k'``,
+        ``'r'`` and ``'v'`` bandpasses on the wavelength grid of
+        ``spectrum``, from `s_index_integrators`.
 
     Returns
     -------
@@ -146,16 +164,17 @@ def uncalibrated_s_index(spectrum, plots=False):
         S-index. This value is intrinsic to the instrument you're using.
     """
 
-    order_h = spectrum.get_order(89)
-    order_k = spectrum.get_order(90)
-    order_r = spectrum.get_order(91)
-    order_v = spectrum.get_order(88)
+    order_h = spectrum.get_order(h_order)
+    order_k = spectrum.get_order(k_order)
+    order_r = spectrum.get_order(r_order)
+    order_v = spectrum.get_order(v_order)
 
-    r_centroid = 3900 * u.Angstrom
-    v_centroid = 4000 * u.Angstrom
-    hk_fwhm = 1.09 * u.Angstrom
-    hk_width = 2 * hk_fwhm
-    rv_width = 20 * u.Angstrom
+    if integrators is not None:
+        measurements = {band: integrators[band].integrate(
+                            order.flux.value, order.meta['normalization'])
+                        for band, order in zip('hkrv', [order_h, order_k,
+                                                        order_r, order_v])}
+        return SIndex(time=spectrum.time, **measurements)
 
     h = integrate_spectrum_trapz(order_h, true_h_centroid, hk_width,
                                         weighting=True, plot=plots)
@@ -168,6 +187,357 @@ def uncalibrated_s_index(spectrum, plots=False):
     return s_ind
 
 
+class BandpassIntegrator(object):
+    """
+    Integral under a bandpass, precomputed for one wavelength grid.
+
+    The trapezoid-rule integral of `integrate_spectrum_trapz` is a weighted
+    sum of the fluxes within the bandpass, and its variance is a weighted sum
+    of the flux variances. The weights depend only on the wavelengths and the
+    bandpass, so they are computed once, and each measurement takes one dot
+    product for the integral and one for its variance.
+    """
+    def __init__(self, wavelength, center_wavelength, width, weighting=False):
+        """
+        Parameters
+        ----------
+        wavelength : `~astropy.units.Quantity`
+            Wavelength grid of the spectral order
+        center_wavelength : `~astropy.units.Quantity`
+            Center of region to integrate
+        width : `~astropy.units.Quantity`
+            Width about the center to integrate
+        weighting : bool
+            Apply a triangular weighting function to the fluxes, otherwise a
+            boxcar
+        """
+        self._wavelength = u.Quantity(wavelength, u.Angstrom).value
+        self.center_wavelength = center_wavelength
+        self.width = width
+        self.weighting = weighting
+        self.wavelength_offset = 0.0
+
+        self._center = center_wavelength.to(u.Angstrom).value
+        self._half_width = width.to(u.Angstrom).value / 2
+
+        # Search and integrate on an increasing view of the grid
+        self._decreasing = self._wavelength[1] < self._wavelength[0]
+        self._increasing_wavelength = (self._wavelength[::-1]
+                                       if self._decreasing
+                                       else self._wavelength)
+
+        # Each pixel gets half of the width of the trapezoids on either side.
+        # These widths don't change when the grid is shifted by a constant.
+        d_lambda = np.diff(self._increasing_wavelength)
+        self._half_widths = np.zeros_like(self._increasing_wavelength)
+        self._half_widths[1:] += 0.5 * d_lambda
+        self._half_widths[:-1] += 0.5 * d_lambda
+        self._variance_widths = np.zeros_like(self._increasing_wavelength)
+        self._variance_widths[1:] += 0.25 * d_lambda**2
+        self._variance_widths[:-1] += 0.25 * d_lambda**2
+        self._d_lambda = d_lambda
+
+        self._set_bounds()
+
+    @property
+    def wavelength(self):
+        """
+        Wavelength grid in Angstroms, including any shift.
+        """
+        return self._wavelength + self.wavelength_offset
+
+    def _set_bounds(self):
+        """
+        Find the pixels within the bandpass on the (shifted) grid, and their
+        weights.
+        """
+        wavelength = self._increasing_wavelength
+        n_pixels = len(wavelength)
+
+        center = self._center
+        start = np.searchsorted(wavelength, center - self._half_width -
+                                self.wavelength_offset, side='right')
+        stop = np.searchsorted(wavelength, center + self._half_width -
+                               self.wavelength_offset, side='left')
+        lam = wavelength[start:stop] + self.wavelength_offset
+
+        if self.weighting:
+            weights = np.clip(1 - np.abs(lam - center) / _hk_fwhm_angstrom,
+                              0, None)
+        else:
+            weights = np.ones_like(lam)
+
+        # The precomputed widths hold for interior pixels; the end pixels of
+        # the bandpass only get the trapezoid on their inner side
+        half_widths = self._half_widths[start:stop].copy()
+        variance_widths = self._variance_widths[start:stop].copy()
+        if stop > start:
+            if start > 0:
+                half_widths[0] -= 0.5 * self._d_lambda[start - 1]
+                variance_widths[0] -= 0.25 * self._d_lambda[start - 1]**2
+            if stop < n_pixels:
+                half_widths[-1] -= 0.5 * self._d_lambda[stop - 1]
+                variance_widths[-1] -= 0.25 * self._d_lambda[stop - 1]**2
+
+        if self._decreasing:
+            start, stop = n_pixels - stop, n_pixels - start
+            weights = weights[::-1]
+            half_widths = half_widths[::-1]
+            variance_widths = variance_widths[::-1]
+
+        self.bounds = slice(start, stop)
+        self.weights = weights
+        self.variance_widths = variance_widths
+        self.flux_weights = weights * half_widths
+        self.variance_weights = weights**2 * variance_widths
+
+    def __repr__(self):
+        return ("<BandpassIntegrator: {0:.2f} +/- {1:.2f}, {2} pixels>"
+                .format(self.center_wavelength, self.width / 2,
+                        len(self.flux_weights)))
+
+    @classmethod
+    def from_spectrum(cls, spectrum, center_wavelength, width,
+                      weighting=False):
+        """
+        Integrator for the wavelength grid of a spectral order.
+
+        Parameters
+        ----------
+        spectrum : `~aesop.Spectrum1D`
+            Spectral order
+        center_wavelength : `~astropy.units.Quantity`
+            Center of region to integrate
+        width : `~astropy.units.Quantity`
+            Width about the center to integrate
+        weighting : bool
+            Apply a triangular weighting function to the fluxes
+        """
+        return cls(spectrum.wavelength, center_wavelength, width,
+                   weighting=weighting)
+
+    def integrate(self, flux, normalization):
+        """
+        Integrate the area under the bandpass.
+
+        Parameters
+        ----------
+        flux : `~numpy.ndarray`
+            Normalized fluxes on the wavelength grid, or a stack of them with
+            shape ``(n_spectra, n_pixels)``
+        normalization : `~numpy.ndarray`
+            Continuum normalization of the fluxes, same shape as ``flux``
+
+        Returns
+        -------
+        integral : `Measurement`
+            Integral under the spectrum, and its error
+        """
+        flux = np.clip(np.asarray(flux, dtype=float)[..., self.bounds], 0,
+                       None)
+        norm_const = np.asarray(normalization, dtype=float)[..., self.bounds]
+        integral = np.dot(flux, self.flux_weights)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sigma = np.sqrt(flux * norm_const) / norm_const
+
+        if not np.any(np.isnan(sigma)):
+            error = np.sqrt(np.dot(sigma**2, self.variance_weights))
+        else:
+            # Fill in NaN errors like `integrate_spectrum_trapz`
+            sigma *= self.weights
+            fill_value = np.nanmean(sigma, axis=-1)[..., np.newaxis]
+            sigma = np.where(np.isnan(sigma), fill_value, sigma)
+            error = np.sqrt(np.dot(sigma**2, self.variance_widths))
+
+        return Measurement(integral, err=error)
+
+    def shift(self, wavelength_offset):
+        """
+        Integrator for the same bandpass after the wavelength solution is
+        shifted by a constant offset.
+
+        Gives the same integrals as a new `BandpassIntegrator` on the shifted
+        grid, without recomputing the trapezoid widths of the grid: only the
+        bounds of the bandpass and the weights within it are updated.
+
+        Parameters
+        ----------
+        wavelength_offset : `~astropy.units.Quantity`
+            Offset added to the wavelengths
+
+        Returns
+        -------
+        integrator : `BandpassIntegrator`
+            Integrator on the shifted wavelength grid
+        """
+        integrator = copy(self)
+        integrator.wavelength_offset = (
+            self.wavelength_offset +
+            u.Quantity(wavelength_offset, u.Angstrom).value)
+        integrator._set_bounds()
+        return integrator
+
+
+def s_index_integrators(spectrum):
+    """
+    `BandpassIntegrator` objects for the S-index bandpasses, for use with
+    `uncalibrated_s_index` on spectra sharing the wavelength grid of
+    ``spectrum``.
+
+    Parameters
+    ----------
+    spectrum : `EchelleSpectrum`
+        Spectrum with the wavelength solution to use
+
+    Returns
+    -------
+    integrators : dict
+        Integrators for the ``'h'``, ``'k'``, ``'r'`` and ``'v'`` bandpasses
+    """
+    return dict(h=BandpassIntegrator.from_spectrum(
+                    spectrum.get_order(h_order), true_h_centroid, hk_width,
+                    weighting=True),
+                k=BandpassIntegrator.from_spectrum(
+                    spectrum.get_order(k_order), true_k_centroid, hk_width,
+                    weighting=True),
+                r=BandpassIntegrator.from_spectrum(
+                    spectrum.get_order(r_order), r_centroid, rv_width),
+                v=BandpassIntegrator.from_spectrum(
+                    spectrum.get_order(v_order), v_centroid, rv_width))
+
+
+def integrate_bandpasses(wavelengths, fluxes, normalizations,
+                         center_wavelength, width, weighting=False):
+    """
+    Integrate the area under many spectra at once.
+
+    Vectorized version of `integrate_spectrum_trapz`, which gives the same
+    integrals and errors for each row.
+
+    Parameters
+    ----------
+    wavelengths : `~astropy.units.Quantity`
+        Wavelengths of each spectrum, shape ``(n_spectra, n_pixels)``
+    fluxes : `~numpy.ndarray`
+        Normalized fluxes of each spectrum, shape ``(n_spectra, n_pixels)``
+    normalizations : `~numpy.ndarray`
+        Continuum normalization of each spectrum, shape
+        ``(n_spectra, n_pixels)``
+    center_wavelength : `~astropy.units.Quantity`
+        Center of region to integrate
+    width : `~astropy.units.Quantity`
+        Width about the center to integrate
+    weighting : bool
+        Apply a triangular weighting function to the fluxes
+
+    Returns
+    -------
+    integrals : `Measurement`
+        Integral under each spectrum, and its error
+    """
+    wavelength = np.atleast_2d(u.Quantity(wavelengths, u.Angstrom).value)
+    # Negative fluxes are set to zero, without changing the input
+    flux = np.clip(np.atleast_2d(np.asarray(fluxes, dtype=float)), 0, None)
+    norm_const = np.atleast_2d(np.asarray(normalizations, dtype=float))
+    center = center_wavelength.to(u.Angstrom).value
+    half_width = width.to(u.Angstrom).value / 2
+
+    decreasing = wavelength[:, 1] < wavelength[:, 0]
+    if np.any(decreasing):
+        wavelength = np.where(decreasing[:, np.newaxis],
+                              wavelength[:, ::-1], wavelength)
+        flux = np.where(decreasing[:, np.newaxis], flux[:, ::-1], flux)
+        norm_const = np.where(decreasing[:, np.newaxis], norm_const[:, ::-1],
+                              norm_const)
+
+    if np.any((center >= wavelength.max(axis=1)) &
+              (center <= wavelength.min(axis=1))):
+        raise ValueError("This spectral order does not contain"
+                         "the center_wavelength given.")
+
+    within_bounds = ((wavelength > center - half_width) &
+                     (wavelength < center + half_width))
+
+    # Only the pixels within bounds in any spectrum contribute
+    columns = np.flatnonzero(within_bounds.any(axis=0))
+    if len(columns) > 0:
+        columns = slice(columns[0], columns[-1] + 1)
+        wavelength = wavelength[:, columns]
+        flux = flux[:, columns]
+        norm_const = norm_const[:, columns]
+        within_bounds = within_bounds[:, columns]
+
+    if weighting:
+        fwhm = hk_fwhm.to(u.Angstrom).value
+        weights = np.clip(1 - np.abs(wavelength - center) / fwhm, 0, None)
+    else:
+        weights = np.ones_like(wavelength)
+    weights *= within_bounds
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma_f = np.sqrt(flux * norm_const) * weights / norm_const
+    sigma_f[~within_bounds] = np.nan
+    fill_values = np.nanmean(sigma_f, axis=1)[:, np.newaxis]
+    sigma_f = np.where(np.isnan(sigma_f), fill_values, sigma_f)
+
+    # Trapezoids between neighboring pixels that are both within bounds
+    pairs = within_bounds[:, 1:] & within_bounds[:, :-1]
+    d_wavelength = np.diff(wavelength, axis=1) * pairs
+    weighted_flux = flux * weights
+    integral = 0.5 * np.sum(d_wavelength * (weighted_flux[:, 1:] +
+                                            weighted_flux[:, :-1]), axis=1)
+    error = np.sqrt(np.sum(0.25 * d_wavelength**2 * (sigma_f[:, 1:]**2 +
+                                                     sigma_f[:, :-1]**2),
+                           axis=1))
+
+    return Measurement(integral, err=error)
+
+
+def uncalibrated_s_indices(spectra):
+    """
+    Calculate the uncalibrated S-indices of many echelle spectra at once.
+
+    Gives the same results as `uncalibrated_s_index` for each spectrum, but
+    integrates each bandpass of all spectra with one call to
+    `integrate_bandpasses`.
+
+    Parameters
+    ----------
+    spectra : list of `EchelleSpectrum`
+        Normalized target spectra, with the same number of pixels in the
+        orders containing the S-index bandpasses
+
+    Returns
+    -------
+    s_ind : `SIndex`
+        S-indices, with `MeasurementTable` columns for ``h``, ``k``, ``r``
+        and ``v``
+    """
+    def stack(order):
+        orders = [spectrum.get_order(order) for spectrum in spectra]
+        return (u.Quantity(np.array([o.wavelength.to_value(u.Angstrom)
+                                     for o in orders]), u.Angstrom,
+                           copy=False),
+                np.array([o.flux.value for o in orders]),
+                np.array([o.meta['normalization'] for o in orders]))
+
+    h = integrate_bandpasses(*stack(h_order), center_wavelength=true_h_centroid,
+                             width=hk_width, weighting=True)
+    k = integrate_bandpasses(*stack(k_order), center_wavelength=true_k_centroid,
+                             width=hk_width, weighting=True)
+    r = integrate_bandpasses(*stack(r_order), center_wavelength=r_centroid,
+                             width=rv_width)
+    v = integrate_bandpasses(*stack(v_order), center_wavelength=v_centroid,
+                             width=rv_width)
+
+    times = [spectrum.time for spectrum in spectra]
+    time = Time(times) if all(t is not None for t in times) else None
+    h, k, r, v = [MeasurementTable._from_arrays(m.value, m.err, time)
+                  for m in [h, k, r, v]]
+    return SIndex(h=h, k=k, r=r, v=v, time=time)
+
+
 class SIndex(object):
     def __init__(self, h, k, r, v, k_factor=0.84, v_factor=1.0, time=None):
         """
@@ -208,6 +578,9 @@ class SIndex(object):
         """
         Compute Eqn 2 of Isaacson+ 2010, for C1=1 and C2=0. This can be used
         to solve for C1 and C2.
+
+        For an `SIndex` with `MeasurementTable` columns, the S-indices of all
+        rows are computed at once and returned as a `MeasurementTable`.
         """
         uncalibrated_s_ind = ((self.h.value + self.k_factor * self.k.value) /
                               (self.r.value + self.v_factor * self.v.value))
@@ -219,6 +592,9 @@ class SIndex(object):
                      (self.r.err**2 + self.v_factor**2 * self.v.err**2)
                      )**0.5
 
+        if np.ndim(uncalibrated_s_ind) > 0:
+            return MeasurementTable(uncalibrated_s_ind, err=s_ind_err,
+                                    time=self.time)
         return Measurement(uncalibrated_s_ind, err=s_ind_err)
 
     def calibrated(self, c1, c2):
@@ -236,16 +612,48 @@ class SIndex(object):
         -------
         Calibrated S-index.
         """
-        return c1 * self.uncalibrated + c2
+        uncalibrated = self.uncalibrated
+        if isinstance(uncalibrated, MeasurementTable):
+            return c1 * uncalibrated + c2
+        return Measurement(c1 * uncalibrated.value + c2,
+                           err=abs(c1) * uncalibrated.err)
+
+    @classmethod
+    def stack(cls, s_indices):
+        """
+        Gather many scalar S-index measurements into `MeasurementTable`
+        columns, so that `SIndex.uncalibrated` and `SIndex.calibrated` are
+        computed for all of them at once.
+
+        Parameters
+        ----------
+        s_indices : list of `SIndex`
+            S-index measurements with the same ``k_factor`` and ``v_factor``
+
+        Returns
+        -------
+        s_ind : `SIndex`
+            S-indices, with `MeasurementTable` columns
+        """
+        columns = {band: MeasurementTable.from_measurements(
+                       [getattr(s_ind, band) for s_ind in s_indices])
+                   for band in 'hkrv'}
+        times = [s_ind.time for s_ind in s_indices]
+        time = Time(times) if all(t is not None for t in times) else None
+        return cls(k_factor=s_indices[0].k_factor,
+                   v_factor=s_indices[0].v_factor, time=time, **columns)
 
     @classmethod
     def from_dict(cls, dictionary):
         d = dictionary.copy()
         for key in dictionary:
             if key == 'time':
-                d[key] = Time(float(d[key]), format='jd')
+                d[key] = Time(np.array(d[key], dtype=float), format='jd')
             elif key in ['h', 'k', 'r', 'v']:
-                d[key] = Measurement.from_dict(d[key])
+                if isinstance(d[key]['value'], list):
+                    d[key] = MeasurementTable.from_dict(d[key])
+                else:
+                    d[key] = Measurement.from_dict(d[key])
             else:
                 d[key] = float(d[key])
         return cls(**d)
@@ -257,8 +665,10 @@ class SIndex(object):
             value = getattr(self, attr)
             if isinstance(value, Measurement):
                 value = value.__dict__
+            elif isinstance(value, MeasurementTable):
+                value = value.to_dict()
             elif isinstance(value, Time):
-                value = str(value.jd)
+                value = value.jd.tolist() if value.shape else str(value.jd)
             d[attr] = value
         return d
 
@@ -273,8 +683,26 @@ class StarProps(object):
         self._s_mwo = s_mwo
         self.time = time
 
-    def get_s_mwo(self):
-        obj = query_catalog_for_object(self.name)
+    def get_s_mwo(self, catalog=None):
+        """
+        Look up the Mount Wilson S-index of this star in Duncan et al. (1991).
+
+        Parameters
+        ----------
+        catalog : `~aesop.LocalCatalog` (optional)
+            Local copy of the catalog to use instead of querying Vizier
+        """
+        if catalog is None:
+            obj = query_catalog_for_object(self.name)
+        else:
+            obj = catalog.resolve_many([self.name])[0]
+        self._set_s_mwo(obj)
+
+    def _set_s_mwo(self, obj):
+        if (obj is None or np.ma.is_masked(obj['Smean']) or
+                np.isnan(obj['Smean'])):
+            self._s_mwo = Measurement(np.nan, err=np.nan)
+            return
 
         # Replace the uncertainty by twice the mean uncertainty
         # of the Duncan 1991 tables if no uncertainty is provided
@@ -283,6 +711,23 @@ class StarProps(object):
 
         self._s_mwo = Measurement(obj['Smean'], err=error_Smean)
 
+    @staticmethod
+    def get_s_mwo_many(stars, catalog):
+        """
+        Look up the Mount Wilson S-indices of many stars in one pass.
+
+        Parameters
+        ----------
+        stars : list of `StarProps`
+            Stars to update
+        catalog : `~aesop.LocalCatalog`
+            Local copy of Duncan et al. (1991), see
+            `~aesop.LocalCatalog.duncan1991`
+        """
+        rows = catalog.resolve_many([star.name for star in stars])
+        for star, row in zip(stars, rows):
+            star._set_s_mwo(row)
+
     @property
     def s_mwo(self):
         if self._s_mwo is None:
@@ -292,10 +737,12 @@ class StarProps(object):
     @classmethod
     def from_dict(cls, dictionary):
         if dictionary['s_apo'] != 'None':
-            if "value" in dictionary['s_apo']:
-                s_apo = Measurement.from_dict(dictionary['s_apo'])
-            else:
+            if "value" not in dictionary['s_apo']:
                 s_apo = SIndex.from_dict(dictionary['s_apo'])
+            elif isinstance(dictionary['s_apo']['value'], list):
+                s_apo = MeasurementTable.from_dict(dictionary['s_apo'])
+            else:
+                s_apo = Measurement.from_dict(dictionary['s_apo'])
         else:
             s_apo = None
 
@@ -380,6 +827,188 @@ class Measurement(object):
         return "${0:.3f} \pm {1}$".format(self.value, error_to_latex(self.err))
 
 
+class MeasurementTable(object):
+    """
+    Column of measurements, stored as arrays of values, errors and times.
+
+    Arithmetic between tables, `Measurement` objects, arrays and numbers is
+    vectorized, and propagates independent Gaussian errors. Indexing with an
+    integer gives a `Measurement`; slices, index arrays and boolean masks give
+    a new `MeasurementTable`. Results of arithmetic keep the ``time`` and
+    ``meta`` of the table operands, preferring those of the left operand.
+    """
+    __slots__ = ('value', 'err', 'time', 'meta')
+
+    # Make numpy defer to the reflected operators, e.g. for ``c1 * table``
+    __array_ufunc__ = None
+
+    def __init__(self, value, err=None, time=None, meta=None,
+                 default_err=1e10):
+        """
+        Parameters
+        ----------
+        value : `~numpy.ndarray`
+            Measured values
+        err : `~numpy.ndarray` (optional)
+            Uncertainties on the values. Errors of zero are replaced by
+            ``default_err``, like in `Measurement`, and missing errors are NaN.
+        time : `~astropy.time.Time` or `~numpy.ndarray` (optional)
+            Times of the measurements, or their Julian dates
+        meta : `~numpy.ndarray` (optional)
+            Any other property of each measurement
+        default_err : float
+            Error given to measurements with zero error
+        """
+        value = np.atleast_1d(np.asarray(value, dtype=float))
+        if err is None:
+            err = np.full_like(value, np.nan)
+        else:
+            err = np.array(np.broadcast_to(err, value.shape), dtype=float)
+            err[err == 0] = default_err
+
+        if time is not None and not isinstance(time, Time):
+            time = Time(time, format='jd')
+
+        self._set(value, err, time,
+                  None if meta is None else np.asarray(meta))
+
+    def _set(self, value, err, time=None, meta=None):
+        self.value = value
+        self.err = err
+        self.time = time
+        self.meta = meta
+        return self
+
+    @classmethod
+    def _from_arrays(cls, value, err, time=None, meta=None):
+        """
+        Table from arrays that need no conversion, e.g. results of arithmetic.
+        """
+        return cls.__new__(cls)._set(value, err, time, meta)
+
+    @classmethod
+    def from_measurements(cls, measurements):
+        """
+        Gather scalar measurements into one table.
+
+        Parameters
+        ----------
+        measurements : list of `Measurement`
+            Measurements with scalar values
+
+        Returns
+        -------
+        table : `MeasurementTable`
+        """
+        value = np.array([m.value for m in measurements], dtype=float)
+        err = np.array([m.err for m in measurements], dtype=float)
+        times = [m.time for m in measurements]
+        time = Time(times) if all(t is not None for t in times) else None
+        return cls._from_arrays(value, err, time)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return "<{0}: {1} measurements>".format(self.__class__.__name__,
+                                                len(self))
+
+    def __getitem__(self, item):
+        time = self.time[item] if self.time is not None else None
+        meta = self.meta[item] if self.meta is not None else None
+
+        if np.ndim(self.value[item]) == 0:
+            return Measurement(self.value[item], err=self.err[item],
+                               time=time, meta=meta)
+
+        return self._from_arrays(self.value[item], self.err[item], time, meta)
+
+    @staticmethod
+    def _value_err(other):
+        if isinstance(other, (MeasurementTable, Measurement)):
+            return np.asarray(other.value), np.asarray(other.err)
+        return np.asarray(other), 0
+
+    def _result(self, value, err, other=None):
+        time, meta = self.time, self.meta
+        if isinstance(other, MeasurementTable):
+            time = time if time is not None else other.time
+            meta = meta if meta is not None else other.meta
+        return self._from_arrays(value, err, time, meta)
+
+    def __add__(self, other):
+        value, err = self._value_err(other)
+        return self._result(self.value + value, np.hypot(self.err, err),
+                            other)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        value, err = self._value_err(other)
+        return self._result(self.value - value, np.hypot(self.err, err),
+                            other)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __neg__(self):
+        return self._result(-self.value, self.err)
+
+    def __mul__(self, other):
+        value, err = self._value_err(other)
+        return self._result(self.value * value,
+                            np.hypot(self.err * value, self.value * err),
+                            other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        value, err = self._value_err(other)
+        return self._result(self.value / value,
+                            np.hypot(self.err / value,
+                                     self.value * err / value**2),
+                            other)
+
+    def __rtruediv__(self, other):
+        value, err = self._value_err(other)
+        return self._result(value / self.value,
+                            np.hypot(err / self.value,
+                                     value * self.err / self.value**2),
+                            other)
+
+    __div__ = __truediv__
+    __rdiv__ = __rtruediv__
+
+    def combine(self):
+        """
+        Mean of the measurements, with the errors added in quadrature.
+
+        Returns
+        -------
+        combined : `Measurement`
+            Combined measurement, with the number of measurements as ``meta``
+        """
+        return Measurement(value=np.mean(self.value),
+                           err=np.sqrt(np.sum(self.err**2)), meta=len(self))
+
+    def to_dict(self):
+        return dict(value=self.value.tolist(), err=self.err.tolist(),
+                    time=(self.time.jd.tolist() if self.time is not None
+                          else None))
+
+    @classmethod
+    def from_dict(cls, dictionary):
+        time = dictionary.get('time')
+        return cls._from_arrays(
+            np.array(dictionary['value'], dtype=float),
+            np.array(dictionary['err'], dtype=float),
+            Time(time, format='jd') if time is not None else None)
+
+
 def error_to_latex(error):
     str_err = "{0:.2g}".format(error)
     if 'e' in str_err:
@@ -0,0 +1,179 @@
+"""
+Reusable blaze function calibrations from standard star spectra.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import astropy.units as u
+
+from .masking import get_spectrum_masks
+from .spectra import _polyval_rows
+
+__all__ = ['BlazeSolution']
+
+
+class BlazeSolution(object):
+    """
+    Polynomial fits to the blaze function of each echelle order.
+
+    A ``BlazeSolution`` is fit once from the spectrum of a standard star with
+    `BlazeSolution.from_standard`, can be saved to and loaded from a
+    compressed ``.npz`` file, and normalizes any number of target spectra
+    with `BlazeSolution.apply` without refitting the standard.
+    """
+    def __init__(self, fit_params, masks, orders=None,
+                 wavelength_unit=u.Angstrom, standard_name=None,
+                 standard_fits_path=None):
+        """
+        Parameters
+        ----------
+        fit_params : `~numpy.ndarray`
+            Polynomial coefficients of each order, highest power first, with
+            shape ``(n_orders, polynomial_order + 1)``
+        masks : `~numpy.ndarray`
+            Boolean masks of the low S/N channels of each order, with shape
+            ``(n_orders, n_pixels)``
+        orders : `~numpy.ndarray` (optional)
+            Echelle order indices described by each row. Defaults to
+            ``0, 1, ..., n_orders - 1``.
+        wavelength_unit : `~astropy.units.Unit` (optional)
+            Unit of the wavelengths the polynomials were fit to
+        standard_name : str (optional)
+            Name of the standard star
+        standard_fits_path : str (optional)
+            Path to the FITS file of the standard star spectrum
+        """
+        self.fit_params = np.asarray(fit_params, dtype=float)
+        self.masks = np.asarray(masks, dtype=bool)
+        if orders is None:
+            orders = np.arange(len(self.fit_params))
+        self.orders = np.asarray(orders, dtype=int)
+        self.wavelength_unit = u.Unit(wavelength_unit)
+        self.standard_name = standard_name
+        self.standard_fits_path = standard_fits_path
+
+    @classmethod
+    def from_standard(cls, standard_spectrum, polynomial_order,
+                      only_orders=None):
+        """
+        Fit the blaze function of every order of a standard star spectrum.
+
+        The fits are the same as in
+        `~aesop.EchelleSpectrum.continuum_normalize_from_standard`. All
+        orders must have the same number of pixels.
+
+        Parameters
+        ----------
+        standard_spectrum : `~aesop.EchelleSpectrum`
+            Spectrum of the standard object
+        polynomial_order : int
+            Fit the standard's spectrum with a polynomial of this order
+        only_orders : `~numpy.ndarray` (optional)
+            Only fit these echelle orders.
+        """
+        if only_orders is None:
+            only_orders = range(len(standard_spectrum.spectrum_list))
+        only_orders = list(only_orders)
+
+        wavelengths, fluxes = standard_spectrum._stack_orders(only_orders)
+        fit_params = standard_spectrum.fit_orders(polynomial_order,
+                                                  only_orders=only_orders)
+
+        return cls(fit_params, get_spectrum_masks(wavelengths, fluxes),
+                   orders=only_orders,
+                   wavelength_unit=standard_spectrum.get_order(
+                       only_orders[0]).wavelength.unit,
+                   standard_name=standard_spectrum.name,
+                   standard_fits_path=standard_spectrum.fits_path)
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __repr__(self):
+        name_str = ('"{0}" '.format(self.standard_name)
+                    if self.standard_name is not None else '')
+        return "<BlazeSolution: {0}{1} orders>".format(name_str, len(self))
+
+    def save(self, path):
+        """
+        Save the blaze solution to a compressed ``.npz`` file.
+
+        Parameters
+        ----------
+        path : str
+            Output path
+        """
+        np.savez_compressed(path, fit_params=self.fit_params,
+                            masks=self.masks, orders=self.orders,
+                            wavelength_unit=self.wavelength_unit.to_string(),
+                            standard_name=str(self.standard_name),
+                            standard_fits_path=str(self.standard_fits_path))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a blaze solution saved with `BlazeSolution.save`.
+
+        Parameters
+        ----------
+        path : str
+            Path to the ``.npz`` file
+        """
+        with np.load(path) as archive:
+            strings = {key: str(archive[key]) if str(archive[key]) != 'None'
+                       else None
+                       for key in ['standard_name', 'standard_fits_path']}
+
+            return cls(archive['fit_params'], archive['masks'], orders=archive['orders'],
+                       wavelength_unit=str(archive['wavelength_unit']),
+                       **strings)
+
+    def predict_continua(self, target_spectrum):
+        """
+        Evaluate the blaze function fits on the wavelengths of a target.
+
+        As in `~aesop.EchelleSpectrum.predict_continuum`, each polynomial is
+        evaluated at the target's wavelengths minus the mean wavelength of the
+        target's order, so the results match
+        `~aesop.EchelleSpectrum.continuum_normalize_from_standard`.
+
+        Parameters
+        ----------
+        target_spectrum : `~aesop.EchelleSpectrum`
+            Spectrum with the orders in ``orders``
+
+        Returns
+        -------
+        continua : `~numpy.ndarray`
+            Blaze function of each order, shape ``(n_orders, n_pixels)``
+        """
+        wavelengths = target_spectrum._stack_orders(self.orders)[0]
+        target_unit = target_spectrum.get_order(self.orders[0]).wavelength.unit
+        wavelengths = wavelengths * target_unit.to(self.wavelength_unit)
+
+        x = wavelengths - wavelengths.mean(axis=1)[:, np.newaxis]
+        return _polyval_rows(self.fit_params, x)
+
+    def apply(self, target_spectrum):
+        """
+        Continuum normalize a target spectrum in place with this solution.
+
+        Parameters
+        ----------
+        target_spectrum : `~aesop.EchelleSpectrum`
+            Spectrum with the orders in ``orders``
+        """
+        target_spectrum.standard_star_props.update(
+            name=self.standard_name, fits_path=self.standard_fits_path,
+            header=None)
+
+        continua = self.predict_continua(target_spectrum)
+        normalized_fluxes = (target_spectrum._stack_orders(self.orders)[1] /
+                             continua)
+
+        for i, spectral_order in enumerate(self.orders):
+            flux_unit = target_spectrum.get_order(spectral_order).flux.unit
+            target_spectrum._replace_normalized_order(
+                spectral_order, normalized_fluxes[i] * flux_unit,
+                self.masks[i], continua[i])
@@ -1,15 +1,23 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import os
+
 import numpy as np
+from scipy.spatial import cKDTree
+import astropy.units as u
+from astropy.table import Table
+from astropy.config import get_cache_dir
+from astropy.coordinates import SkyCoord
 from astroquery.vizier import Vizier
 Vizier.ROW_LIMIT = 1e10   # Otherwise would only show first 50 values
 
 __all__ = ['get_duncan_catalog', 'sindex_catalog', 'query_catalog_for_object',
-           'get_k2_epic_catalog']
+           'get_k2_epic_catalog', 'LocalCatalog', 'EpicTeffLookup']
 
 sindex_catalog = None
 k2_epic_table = None
+epic_teff_lookup = None
 duncan1991 = 'III/159A'
 huber2016 = 'J/ApJS/224/2/table5'
 
@@ -67,4 +75,351 @@ def get_k2_epic_catalog():
         catalogs = Vizier.get_catalogs(huber2016)
         k2_epic_table = catalogs[0]  # This is the table with the data
         k2_epic_table.add_index('EPIC')
-    return k2_epic_table
\ No newline at end of file
+    return k2_epic_table
+
+
+class EpicTeffLookup(object):
+    """
+    Effective temperatures of K2 EPIC targets from Huber et al. (2016),
+    stored as sorted NumPy arrays.
+
+    The EPIC IDs and effective temperatures are saved once as ``.npy`` files,
+    which are memory-mapped when loaded, and looked up with a binary search.
+    """
+    ids_file = 'epic_ids.npy'
+    teff_file = 'epic_teff.npy'
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+            Directory with the arrays written by `EpicTeffLookup.build`
+        """
+        self.path = path
+        self.epic_ids = np.load(os.path.join(path, self.ids_file),
+                                mmap_mode='r')
+        self.teff = np.load(os.path.join(path, self.teff_file), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.epic_ids)
+
+    def __repr__(self):
+        return "<EpicTeffLookup: {0} targets>".format(len(self))
+
+    @classmethod
+    def build(cls, path, table=None):
+        """
+        Write the sorted EPIC IDs and effective temperatures to ``path``.
+
+        Parameters
+        ----------
+        path : str
+            Output directory
+        table : `~astropy.table.Table` (optional)
+            Table with ``EPIC`` and ``Teff`` columns. Defaults to Huber et al.
+            (2016), downloaded from Vizier.
+        """
+        if table is None:
+            table = Vizier.get_catalogs(huber2016)[0]
+
+        epic_ids = np.asarray(table['EPIC'], dtype=np.int64)
+        sort = np.argsort(epic_ids, kind='mergesort')
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+        np.save(os.path.join(path, cls.ids_file), epic_ids[sort])
+        np.save(os.path.join(path, cls.teff_file),
+                np.ma.filled(np.ma.asarray(table['Teff'], dtype=float),
+                             np.nan)[sort])
+        return cls(path)
+
+    def lookup(self, epic_ids):
+        """
+        Effective temperatures of EPIC targets.
+
+        Parameters
+        ----------
+        epic_ids : int or `~numpy.ndarray`
+            EPIC IDs
+
+        Returns
+        -------
+        teff : float or `~numpy.ndarray`
+            Effective temperature of each target, NaN for targets that are not
+            in the catalog
+        """
+        epic_ids = np.asarray(epic_ids, dtype=np.int64)
+        if len(self) == 0:
+            return np.full(epic_ids.shape, np.nan)
+
+        rows = np.searchsorted(self.epic_ids, epic_ids)
+        rows = np.clip(rows, 0, len(self) - 1)
+        found = self.epic_ids[rows] == epic_ids
+        return np.where(found, self.teff[rows], np.nan)
+
+    def __getitem__(self, epic_id):
+        teff = self.lookup(epic_id)
+        if np.isnan(teff):
+            raise KeyError("EPIC {0} is not in the catalog".format(epic_id))
+        return float(teff)
+
+
+def get_epic_teff_lookup(path=None):
+    """
+    `EpicTeffLookup` kept in the astropy cache, built on first use.
+
+    Parameters
+    ----------
+    path : str (optional)
+        Directory of the lookup arrays. Defaults to the ``aesop`` directory of
+        the astropy cache.
+
+    Returns
+    -------
+    lookup : `EpicTeffLookup`
+    """
+    global epic_teff_lookup
+
+    if path is None:
+        path = os.path.join(get_cache_dir(), 'aesop', 'epic_teff')
+
+    if epic_teff_lookup is None or epic_teff_lookup.path != path:
+        if os.path.exists(os.path.join(path, EpicTeffLookup.ids_file)):
+            epic_teff_lookup = EpicTeffLookup(path)
+        else:
+            epic_teff_lookup = EpicTeffLookup.build(path)
+    return epic_teff_lookup
+
+
+def _normalize_name(name):
+    """
+    Case- and whitespace-insensitive key for star names.
+    """
+    return ''.join(str(name).upper().split())
+
+
+def _unit_vectors(ra, dec):
+    """
+    Cartesian unit vectors of coordinates given in degrees.
+    """
+    ra, dec = np.radians(ra), np.radians(dec)
+    return np.column_stack([np.cos(dec) * np.cos(ra),
+                            np.cos(dec) * np.sin(ra),
+                            np.sin(dec)])
+
+
+class LocalCatalog(object):
+    """
+    Vizier catalog kept on local disk, indexed by star name and position.
+
+    Name lookups are dictionary lookups, and position lookups use a KD-tree,
+    so resolving many stars takes one pass and no network access for the
+    stars whose names are in the catalog.
+
+    Examples
+    --------
+    >>> from aesop import LocalCatalog
+    >>> duncan = LocalCatalog.duncan1991()  # doctest: +SKIP
+    >>> rows = duncan.resolve_many(['HD 10476', 'HD 22049'])  # doctest: +SKIP
+    """
+    def __init__(self, table, name_columns=(('Name', ''), ),
+                 ra_column='_RAJ2000', dec_column='_DEJ2000'):
+        """
+        Parameters
+        ----------
+        table : `~astropy.table.Table`
+            Catalog table
+        name_columns : list of tuples
+            ``(column, prefix)`` pairs of the columns with identifiers of
+            each star, and a prefix that turns the column values into names,
+            e.g. ``('HD', 'HD ')``. Columns missing from ``table`` are
+            skipped.
+        ra_column : str
+            Column of right ascensions in degrees
+        dec_column : str
+            Column of declinations in degrees
+        """
+        self.table = table
+
+        self.name_index = dict()
+        for column, prefix in name_columns:
+            if column not in table.colnames:
+                continue
+            for row, value in enumerate(table[column]):
+                if np.ma.is_masked(value):
+                    continue
+                if isinstance(value, bytes):
+                    value = value.decode()
+                self.name_index.setdefault(
+                    _normalize_name(prefix + str(value)), row)
+
+        self.tree = None
+        if ra_column in table.colnames and dec_column in table.colnames:
+            self.tree = cKDTree(_unit_vectors(np.asarray(table[ra_column]),
+                                              np.asarray(table[dec_column])))
+
+    def __len__(self):
+        return len(self.table)
+
+    def __repr__(self):
+        return "<LocalCatalog: {0} stars>".format(len(self))
+
+    @classmethod
+    def from_vizier(cls, catalog, path=None, columns=("*", ), **kwargs):
+        """
+        Load a Vizier catalog from ``path``, downloading and saving it there
+        the first time.
+
+        Parameters
+        ----------
+        catalog : str
+            Vizier catalog identifier
+        path : str (optional)
+            Path to the local FITS copy of the catalog. Defaults to the
+            ``aesop`` directory of the astropy cache.
+        columns : list of str
+            Columns to download. J2000 positions are always included.
+        kwargs
+            All other keyword arguments are passed to `LocalCatalog`
+        """
+        if path is None:
+            path = os.path.join(get_cache_dir(), 'aesop',
+                                catalog.replace('/', '_') + '.fits')
+
+        if not os.path.exists(path):
+            table = Vizier(catalog=catalog,
+                           columns=list(columns) + ['_RAJ2000', '_DEJ2000'],
+                           row_limit=1e10).query_constraints()[0]
+            if not os.path.exists(os.path.dirname(os.path.abspath(path))):
+                os.makedirs(os.path.dirname(os.path.abspath(path)))
+            table.write(path, format='fits')
+
+        return cls(Table.read(path, format='fits'), **kwargs)
+
+    @classmethod
+    def duncan1991(cls, path=None):
+        """
+        Mount Wilson S-indices of Duncan et al. (1991), see
+        `LocalCatalog.from_vizier`.
+        """
+        return cls.from_vizier(duncan1991, path=path,
+                               columns=["*", "Bmag", "Vmag"],
+                               name_columns=[('Name', ''), ('HD', 'HD ')])
+
+    @classmethod
+    def huber2016(cls, path=None):
+        """
+        K2 EPIC stellar properties of Huber et al. (2016), see
+        `LocalCatalog.from_vizier`.
+        """
+        return cls.from_vizier(huber2016, path=path,
+                               name_columns=[('EPIC', 'EPIC ')])
+
+    def lookup(self, name):
+        """
+        Index of the row of a star, or `None` if the name is not in the
+        catalog.
+        """
+        return self.name_index.get(_normalize_name(name))
+
+    def __contains__(self, name):
+        return self.lookup(name) is not None
+
+    def __getitem__(self, name):
+        row = self.lookup(name)
+        if row is None:
+            raise KeyError("{0} is not in the catalog".format(name))
+        return self.table[row]
+
+    def query_coordinates(self, coordinates, radius=5*u.arcsec):
+        """
+        Index of the nearest row to each position.
+
+        Parameters
+        ----------
+        coordinates : `~astropy.coordinates.SkyCoord`
+            Positions to look up
+        radius : `~astropy.units.Quantity`
+            Largest separation of a match
+
+        Returns
+        -------
+        rows : `~numpy.ndarray`
+            Index of the matching row of each position, or -1 for positions
+            without a match
+        """
+        if self.tree is None:
+            raise ValueError("This catalog has no positions.")
+
+        coordinates = SkyCoord(coordinates).icrs
+        chord = 2 * np.sin(0.5 * radius.to(u.rad).value)
+        distances, rows = self.tree.query(
+            _unit_vectors(np.atleast_1d(coordinates.ra.deg),
+                          np.atleast_1d(coordinates.dec.deg)),
+            distance_upper_bound=chord)
+        return np.where(np.isfinite(distances), rows, -1)
+
+    def resolve_many(self, names, radius=5*u.arcsec, offline=False):
+        """
+        Find the catalog rows of many stars at once.
+
+        Names are first looked up in the catalog's name index. The positions
+        of the remaining stars are fetched from SIMBAD in one query, unless
+        ``offline``, and matched with `LocalCatalog.query_coordinates`.
+
+        Parameters
+        ----------
+        names : list of str
+            Names of stars
+        radius : `~astropy.units.Quantity`
+            Largest separation of a position match
+        offline : bool
+            Only use the name index.
+
+        Returns
+        -------
+        rows : list
+            Catalog row of each star, or `None` for stars not in the catalog
+        """
+        indices = [self.lookup(name) for name in names]
+        unresolved = sorted(set(name for name, index in zip(names, indices)
+                                if index is None))
+
+        if unresolved and not offline and self.tree is not None:
+            positions = _query_simbad_coordinates(unresolved)
+            if positions:
+                matches = self.query_coordinates(
+                    SkyCoord(list(positions.values()), unit=(u.hourangle,
+                                                             u.deg)),
+                    radius=radius)
+                matched = {name: row for name, row in
+                           zip(positions.keys(), matches) if row >= 0}
+                indices = [matched.get(name) if index is None else index
+                           for name, index in zip(names, indices)]
+
+        return [self.table[int(index)] if index is not None else None
+                for index in indices]
+
+
+def _query_simbad_coordinates(identifiers):
+    """
+    Query SIMBAD for the positions of several stars at once.
+
+    Returns a dictionary of identifier to ``"RA DEC"`` strings, for the
+    identifiers that SIMBAD knows.
+    """
+    from astroquery.simbad import Simbad
+
+    customSimbad = Simbad()
+    customSimbad.add_votable_fields('typed_id')
+    result = customSimbad.query_objects(list(identifiers))
+
+    positions = dict()
+    if result is not None:
+        for typed_id, ra, dec in zip(result['TYPED_ID'], result['RA'],
+                                     result['DEC']):
+            if isinstance(typed_id, bytes):
+                typed_id = typed_id.decode()
+            positions[str(typed_id)] = '{0} {1}'.format(ra, dec)
+    return positions
@@ -0,0 +1,407 @@
+"""
+Radial velocities from cross-correlation in log-wavelength space.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+from scipy.fftpack import next_fast_len
+from scipy.ndimage import gaussian_filter1d
+
+import astropy.units as u
+import astropy.constants as c
+
+__all__ = ['VelocityCCF', 'WavelengthShifts', 'robust_line_fit']
+
+speed_of_light = c.c.to(u.km/u.s).value
+
+
+class VelocityCCF(object):
+    """
+    Cross-correlate many echelle orders with one template at once.
+
+    On a grid uniform in :math:`\\ln\\lambda`, a Doppler shift is the same
+    number of pixels at every wavelength. Each order gets its own
+    log-wavelength grid with a common step. The template is resampled, smoothed
+    and Fourier transformed onto those grids once, when the ``VelocityCCF`` is
+    created, so measuring the velocities of a new spectrum costs one
+    interpolation per order and one batched FFT.
+    """
+    def __init__(self, template, wavelength_ranges, velocity_step,
+                 max_velocity=200*u.km/u.s, kernel_width=1, orders=None):
+        """
+        Parameters
+        ----------
+        template : `~aesop.Spectrum1D`
+            Template spectrum, e.g. from
+            `~aesop.phoenix.get_phoenix_model_spectrum`. It must cover every
+            wavelength range, plus ``max_velocity``.
+        wavelength_ranges : `~astropy.units.Quantity`
+            Minimum and maximum wavelength of each order, shape
+            ``(n_orders, 2)``
+        velocity_step : `~astropy.units.Quantity`
+            Velocity width of one pixel of the log-wavelength grid
+        max_velocity : `~astropy.units.Quantity`
+            Largest absolute velocity to search
+        kernel_width : float
+            Smooth the template with a Gaussian of this width, in pixels of
+            the log-wavelength grid, after averaging it over each pixel
+        orders : `~numpy.ndarray` (optional)
+            Echelle order index of each wavelength range. Defaults to
+            ``0, 1, ..., n_orders - 1``.
+        """
+        wavelength_ranges = u.Quantity(wavelength_ranges, u.Angstrom).value
+        if orders is None:
+            orders = np.arange(len(wavelength_ranges))
+        self.orders = np.asarray(orders, dtype=int)
+        self.velocity_step = u.Quantity(velocity_step, u.km/u.s)
+        self.max_velocity = u.Quantity(max_velocity, u.km/u.s)
+
+        self.log_step = self.velocity_step.value / speed_of_light
+        self.max_lag = int(np.ceil(self.max_velocity.value /
+                                   self.velocity_step.value))
+
+        log_ranges = np.log(wavelength_ranges)
+        self.log_start = log_ranges[:, 0]
+        self.n_pixels = int(np.ceil(np.ptp(log_ranges, axis=1).max() /
+                                    self.log_step)) + 1
+        self.n_fft = next_fast_len(self.n_pixels + 2 * self.max_lag)
+
+        # The template grids extend ``max_lag`` pixels past each order
+        template_grid = (self.log_start[:, np.newaxis] + self.log_step *
+                         np.arange(-self.max_lag,
+                                   self.n_pixels + self.max_lag))
+        template_flux = _bin_template(
+            np.log(template.wavelength.to(u.Angstrom).value),
+            np.asarray(template.flux, dtype=float), template_grid,
+            self.log_step)
+        if kernel_width:
+            template_flux = gaussian_filter1d(template_flux, kernel_width,
+                                              axis=1)
+        template_flux -= template_flux.mean(axis=1)[:, np.newaxis]
+
+        self._template_fft = np.fft.rfft(template_flux, self.n_fft, axis=1)
+
+    @classmethod
+    def from_echelle_spectrum(cls, template, spectrum, only_orders=None,
+                              max_velocity=200*u.km/u.s, kernel_width=1):
+        """
+        Set up the log-wavelength grids for the orders of an echelle
+        spectrum, with the median pixel size of the spectrum as the velocity
+        step.
+
+        The same ``VelocityCCF`` can be used for every spectrum taken with the
+        same instrument setup.
+
+        Parameters
+        ----------
+        template : `~aesop.Spectrum1D`
+            Template spectrum
+        spectrum : `~aesop.EchelleSpectrum`
+            Spectrum with the orders to cross-correlate
+        only_orders : `~numpy.ndarray` (optional)
+            Only use these echelle orders.
+        max_velocity : `~astropy.units.Quantity`
+            Largest absolute velocity to search
+        kernel_width : float
+            Smooth the template with a Gaussian of this width, in pixels of
+            the log-wavelength grid
+        """
+        if only_orders is None:
+            only_orders = range(len(spectrum.spectrum_list))
+        only_orders = list(only_orders)
+
+        wavelength_ranges = []
+        log_steps = []
+        for i in only_orders:
+            # The unmasked pixels, as in `VelocityCCF.resample`
+            wavelength = spectrum.get_order(i).masked_wavelength.to(
+                u.Angstrom).value
+            wavelength_ranges.append([wavelength.min(), wavelength.max()])
+            log_steps.append(np.median(np.abs(np.diff(np.log(wavelength)))))
+
+        velocity_step = np.median(log_steps) * speed_of_light * u.km/u.s
+        return cls(template, wavelength_ranges * u.Angstrom, velocity_step,
+                   max_velocity=max_velocity, kernel_width=kernel_width,
+                   orders=only_orders)
+
+    def __len__(self):
+        return len(self.log_start)
+
+    def __repr__(self):
+        return ("<VelocityCCF: {0} orders, {1:.3f} per pixel>"
+                .format(len(self), self.velocity_step))
+
+    @property
+    def velocities(self):
+        """
+        Velocity of each lag of the cross-correlation functions.
+        """
+        return (self.velocity_step *
+                np.arange(-self.max_lag, self.max_lag + 1))
+
+    def resample(self, spectrum, only_orders=None):
+        """
+        Resample orders of a spectrum onto the log-wavelength grids.
+
+        Parameters
+        ----------
+        spectrum : `~aesop.EchelleSpectrum`
+            Spectrum with one order per log-wavelength grid
+        only_orders : `~numpy.ndarray` (optional)
+            Echelle order matching each grid. Defaults to
+            `VelocityCCF.orders`.
+
+        Returns
+        -------
+        fluxes : `~numpy.ndarray`
+            Mean-subtracted fluxes, zero outside of each order, with shape
+            ``(n_orders, n_pixels)``
+        """
+        if only_orders is None:
+            only_orders = self.orders
+        elif len(only_orders) != len(self):
+            raise ValueError("Expected {0} orders, one per log-wavelength "
+                             "grid, got {1}.".format(len(self),
+                                                     len(only_orders)))
+
+        fluxes = np.zeros((len(self), self.n_pixels))
+        grid = self.log_step * np.arange(self.n_pixels)
+        for row, i in enumerate(only_orders):
+            order = spectrum.get_order(i)
+            log_wavelength = np.log(order.masked_wavelength.to(u.Angstrom).value)
+            flux = np.asarray(order.masked_flux, dtype=float)
+
+            sort = np.argsort(log_wavelength)
+            log_wavelength = log_wavelength[sort] - self.log_start[row]
+            in_order = ((grid >= log_wavelength[0]) &
+                        (grid <= log_wavelength[-1]))
+            fluxes[row, in_order] = np.interp(grid[in_order], log_wavelength,
+                                              flux[sort])
+            fluxes[row, in_order] -= fluxes[row, in_order].mean()
+        return fluxes
+
+    def ccf(self, spectrum, only_orders=None):
+        """
+        Cross-correlation function of each order with the template.
+
+        Parameters
+        ----------
+        spectrum : `~aesop.EchelleSpectrum`
+            Spectrum with one order per log-wavelength grid
+        only_orders : `~numpy.ndarray` (optional)
+            Echelle order matching each grid. Defaults to
+            `VelocityCCF.orders`.
+
+        Returns
+        -------
+        ccf : `~numpy.ndarray`
+            Cross-correlation functions at `VelocityCCF.velocities`, with
+            shape ``(n_orders, 2 * max_lag + 1)``
+        """
+        fluxes = self.resample(spectrum, only_orders=only_orders)
+        spectrum_fft = np.fft.rfft(fluxes, self.n_fft, axis=1)
+        corr = np.fft.irfft(np.conj(spectrum_fft) * self._template_fft,
+                            self.n_fft, axis=1)
+        # Flip, so that lags are velocities of the spectrum with respect to
+        # the template
+        return corr[:, 2 * self.max_lag::-1]
+
+    def velocity_shifts(self, spectrum, only_orders=None):
+        """
+        Radial velocity of each order with respect to the template.
+
+        The peak of each cross-correlation function is refined to sub-pixel
+        precision with a parabola through the peak and its two neighbors.
+
+        Parameters
+        ----------
+        spectrum : `~aesop.EchelleSpectrum`
+            Spectrum with one order per log-wavelength grid
+        only_orders : `~numpy.ndarray` (optional)
+            Echelle order matching each grid. Defaults to
+            `VelocityCCF.orders`.
+
+        Returns
+        -------
+        velocities : `~astropy.units.Quantity`
+            Velocity of each order, positive for redshifts
+        """
+        return self.peak_velocities(self.ccf(spectrum, only_orders=only_orders))
+
+    def peak_velocities(self, ccf):
+        """
+        Velocities of the peaks of cross-correlation functions from
+        `VelocityCCF.ccf`, refined with a parabola through each peak and its
+        two neighbors.
+
+        Parameters
+        ----------
+        ccf : `~numpy.ndarray`
+            Cross-correlation functions, with shape
+            ``(n_orders, 2 * max_lag + 1)``
+
+        Returns
+        -------
+        velocities : `~astropy.units.Quantity`
+            Velocity of each peak
+        """
+        rows = np.arange(len(ccf))
+        peak = np.clip(np.argmax(ccf, axis=1), 1, ccf.shape[1] - 2)
+
+        left, center, right = (ccf[rows, peak - 1], ccf[rows, peak],
+                               ccf[rows, peak + 1])
+        curvature = left - 2 * center + right
+        offset = np.where(curvature < 0,
+                          0.5 * (left - right) / np.where(curvature < 0,
+                                                          curvature, -1), 0)
+
+        return (peak + offset - self.max_lag) * self.velocity_step
+
+
+def _bin_template(log_wavelength, flux, grid, log_step):
+    """
+    Mean flux of the template over each pixel of a log-wavelength grid.
+
+    The template is integrated at its native resolution, so that line
+    structure narrower than a pixel of ``grid`` is averaged rather than
+    aliased by point sampling.
+    """
+    sort = np.argsort(log_wavelength)
+    log_wavelength = log_wavelength[sort]
+    flux = flux[sort]
+
+    # Cumulative trapezoid integral of the flux over log-wavelength
+    cumulative = np.concatenate([[0], np.cumsum(0.5 * (flux[1:] + flux[:-1]) *
+                                                np.diff(log_wavelength))])
+    upper = np.interp(grid + 0.5 * log_step, log_wavelength, cumulative)
+    lower = np.interp(grid - 0.5 * log_step, log_wavelength, cumulative)
+    return (upper - lower) / log_step
+
+
+def robust_line_fit(x, y, residual_threshold=None, max_pairs=5000, seed=42):
+    """
+    Fit a line to data with outliers, like a RANSAC linear regression.
+
+    Every line through two of the points is a candidate (or ``max_pairs``
+    random pairs, if there are more), and the inliers of all candidates are
+    counted at once. The line is then refit with least squares to the inliers
+    of the candidate with the most inliers.
+
+    Parameters
+    ----------
+    x : `~numpy.ndarray`
+        Independent variable
+    y : `~numpy.ndarray`
+        Dependent variable
+    residual_threshold : float (optional)
+        Largest absolute residual of an inlier. Defaults to the median
+        absolute deviation of ``y``, like the RANSAC regressor of
+        scikit-learn.
+    max_pairs : int
+        Largest number of candidate lines
+    seed : int
+        Random seed for choosing the candidate pairs, if there are more than
+        ``max_pairs``
+
+    Returns
+    -------
+    slope : float
+        Slope of the best-fit line
+    intercept : float
+        Intercept of the best-fit line
+    inliers : `~numpy.ndarray`
+        Points within ``residual_threshold`` of the best candidate line
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    if residual_threshold is None:
+        residual_threshold = np.median(np.abs(y - np.median(y)))
+
+    first, second = np.triu_indices(len(x), 1)
+    distinct = x[first] != x[second]
+    first, second = first[distinct], second[distinct]
+    if len(first) > max_pairs:
+        choice = np.random.RandomState(seed).choice(len(first), max_pairs,
+                                                    replace=False)
+        first, second = first[choice], second[choice]
+
+    if len(first) == 0:
+        raise ValueError("At least two distinct values of x are required.")
+
+    slopes = (y[second] - y[first]) / (x[second] - x[first])
+    intercepts = y[first] - slopes * x[first]
+    residuals = np.abs(y - slopes[:, np.newaxis] * x -
+                       intercepts[:, np.newaxis])
+    inliers = residuals <= residual_threshold
+
+    # Most inliers first, then the smallest sum of squared inlier residuals
+    n_inliers = inliers.sum(axis=1)
+    chi2 = np.sum(np.where(inliers, residuals, 0)**2, axis=1)
+    best = np.lexsort((chi2, -n_inliers))[0]
+    inliers = inliers[best]
+
+    if len(np.unique(x[inliers])) < 2:
+        return slopes[best], intercepts[best], inliers
+
+    slope, intercept = np.polyfit(x[inliers], y[inliers], 1)
+    return slope, intercept, inliers
+
+
+class WavelengthShifts(object):
+    """
+    Wavelength corrections of the orders of an echelle spectrum, from
+    `~aesop.EchelleSpectrum.solve_wavelength_shifts`.
+    """
+    def __init__(self, velocities, order_shifts, fit_orders, slope, intercept,
+                 inliers, orders=None):
+        """
+        Parameters
+        ----------
+        velocities : `~astropy.units.Quantity`
+            Radial velocity of each order with respect to the template
+        order_shifts : `~astropy.units.Quantity`
+            Wavelength correction measured in each order
+        fit_orders : `~numpy.ndarray`
+            Indices of the orders used in the line fit
+        slope : `~astropy.units.Quantity`
+            Change of the fit wavelength correction per order
+        intercept : `~astropy.units.Quantity`
+            Fit wavelength correction of order zero
+        inliers : `~numpy.ndarray`
+            Orders of ``fit_orders`` that are inliers of the line fit
+        orders : `~numpy.ndarray` (optional)
+            Echelle order index of each measurement. Defaults to
+            ``0, 1, ..., n_orders - 1``.
+        """
+        self.velocities = velocities
+        self.order_shifts = order_shifts
+        self.fit_orders = fit_orders
+        self.slope = slope
+        self.intercept = intercept
+        self.inliers = inliers
+        if orders is None:
+            orders = np.arange(len(order_shifts))
+        self.orders = np.asarray(orders, dtype=int)
+
+    def __len__(self):
+        return len(self.order_shifts)
+
+    def __repr__(self):
+        return ("<WavelengthShifts: {0} orders, {1} of {2} inliers>"
+                .format(len(self), self.inliers.sum(), len(self.inliers)))
+
+    @property
+    def fit_shifts(self):
+        """
+        Wavelength correction of each order from the line fit.
+        """
+        return self.intercept + self.slope * self.orders
+
+    @property
+    def residuals(self):
+        """
+        Measured minus fit wavelength correction of each order.
+        """
+        return self.order_shifts - self.fit_shifts
@@ -452,6 +452,55 @@ def multispec_wcs_reader(wcs_info, dispersion_unit=None):
     return wcs_dict
 
 
+def multispec_array_wcs_reader(wcs_info, dispersion_unit=None):
+    """Extracting multispec information out of WAT header keywords and
+    building a single vectorized WCS for all orders with it
+
+    Parameters
+    ----------
+
+    wcs_info : ~specutils.io.read_fits.FITSWCSSpectrum
+        object compiling WCS information to be used in these readers
+
+    dispersion_unit : astropy.unit.Unit, optional
+        specify a unit for the dispersion if none exists or overwrite,
+        default=None
+
+    Raises
+    --------
+    NotImplementedError
+        If an order uses a dispersion function that cannot be vectorized
+    """
+
+    assert wcs_info.global_wcs_attributes['system'] == 'multispec'
+    assert wcs_info.wcs_attributes[1]['wtype'] == 'multispec'
+
+    if dispersion_unit is None:
+        dispersion_unit = wcs_info.wcs_attributes[0]['units']
+
+    multispec_dict = _parse_multispec_dict(wcs_info.wcs_attributes[1])
+    return specwcs.MultispecIRAFArrayWCS.from_multispec_dict(
+        multispec_dict, num_pixels=wcs_info.shape[0], unit=dispersion_unit)
+
+
+def _multispec_order_wcs(wcs_info, dispersion_unit=None, vectorized_wcs=False):
+    """
+    List of per-order WCS for a multispec file, using the vectorized
+    dispersion model when requested and supported.
+    """
+    if vectorized_wcs:
+        try:
+            array_wcs = multispec_array_wcs_reader(
+                wcs_info, dispersion_unit=dispersion_unit)
+        except NotImplementedError:
+            pass
+        else:
+            return [array_wcs[i] for i in range(len(array_wcs))]
+
+    return list(multispec_wcs_reader(wcs_info,
+                                     dispersion_unit=dispersion_unit).values())
+
+
 def read_fits_wcs_linear1d(wcs_info, dispersion_unit=None, spectral_axis=0):
     """Read very a very simple 1D WCS mainly comprising of CRVAL, CRPIX, ...
     from a FITS WCS Information container
@@ -508,7 +557,8 @@ def read_fits_wcs_linear1d(wcs_info, dispersion_unit=None, spectral_axis=0):
                                            c1=dispersion_delta)
 
 
-def read_fits_spectrum1d(filename, dispersion_unit=None, flux_unit=None):
+def read_fits_spectrum1d(filename, dispersion_unit=None, flux_unit=None,
+                         return_header=False, vectorized_wcs=False):
     """
     1D reader for spectra in FITS format. This function determines what format
     the FITS file is in, and attempts to read the Spectrum. This reader just
@@ -516,6 +566,10 @@ def read_fits_spectrum1d(filename, dispersion_unit=None, flux_unit=None):
     that. It will return a Spectrum1D object if the data is linear, or a list of
     Spectrum1D objects if the data format is multi-spec
 
+    The file is opened only once: the data array is memory-mapped and the
+    header is parsed a single time, then shared between the WCS parser and
+    the returned spectra.
+
     Parameters
     ----------
 
@@ -530,6 +584,61 @@ def read_fits_spectrum1d(filename, dispersion_unit=None, flux_unit=None):
     flux_unit : ~astropy.unit.Unit, optional
         unit of the flux
 
+    return_header : bool, optional
+        if True, also return the primary `~astropy.io.fits.Header` so callers
+        do not need to open the file a second time. default = False
+
+    vectorized_wcs : bool, optional
+        if True, evaluate the wavelength solutions of all multispec orders in
+        one vectorized pass (see `~specwcs.MultispecIRAFArrayWCS`).
+        default = False
+
+    Raises
+    --------
+    NotImplementedError
+        If the format can't be read currently
+    """
+    with fits.open(filename, memmap=True) as hdulist:
+        data = hdulist[0].data
+        header = hdulist[0].header
+
+    spectra = read_fits_spectrum1d_from_hdu(data, header,
+                                            dispersion_unit=dispersion_unit,
+                                            flux_unit=flux_unit,
+                                            vectorized_wcs=vectorized_wcs)
+    if return_header:
+        return spectra, header
+    return spectra
+
+
+def read_fits_spectrum1d_from_hdu(data, header, dispersion_unit=None,
+                                  flux_unit=None, vectorized_wcs=False):
+    """
+    Build spectra from an already-loaded FITS data array and header.
+
+    See `read_fits_spectrum1d` for a description of the supported formats.
+
+    Parameters
+    ----------
+
+    data : ~numpy.ndarray
+        data array of the primary FITS extension
+
+    header : ~astropy.io.fits.Header
+        header of the primary FITS extension
+
+    dispersion_unit : ~astropy.unit.Unit, optional
+        unit of the dispersion axis - will overwrite possible information given
+        in the FITS keywords
+        default = None
+
+    flux_unit : ~astropy.unit.Unit, optional
+        unit of the flux
+
+    vectorized_wcs : bool, optional
+        if True, evaluate the wavelength solutions of all multispec orders in
+        one vectorized pass. default = False
+
     Raises
     --------
     NotImplementedError
@@ -538,9 +647,6 @@ def read_fits_spectrum1d(filename, dispersion_unit=None, flux_unit=None):
     if dispersion_unit:
         dispersion_unit = u.Unit(dispersion_unit)
 
-    data = fits.getdata(filename)
-    header = fits.getheader(filename)
-
     wcs_info = FITSWCSSpectrum(header)
 
     if wcs_info.naxis == 1:
@@ -548,9 +654,11 @@ def read_fits_spectrum1d(filename, dispersion_unit=None, flux_unit=None):
         return Spectrum1D(data, wcs=wcs)
     elif wcs_info.naxis == 2 and \
             wcs_info.affine_transform_dict['ctype'] == ["MULTISPE", "MULTISPE"]:
-        multi_wcs = multispec_wcs_reader(wcs_info, dispersion_unit=dispersion_unit)
+        multi_wcs = _multispec_order_wcs(wcs_info,
+                                         dispersion_unit=dispersion_unit,
+                                         vectorized_wcs=vectorized_wcs)
         multispec = []
-        for spectrum_data, spectrum_wcs in zip(data, multi_wcs.values()):
+        for spectrum_data, spectrum_wcs in zip(data, multi_wcs):
             multispec.append(
                 Spectrum1D(spectrum_data, wcs=spectrum_wcs))
         return multispec
@@ -566,13 +674,15 @@ def read_fits_spectrum1d(filename, dispersion_unit=None, flux_unit=None):
 
     elif wcs_info.naxis == 3 and \
             wcs_info.affine_transform_dict['ctype'] == ["MULTISPE", "MULTISPE","LINEAR"]:
-        multi_wcs = multispec_wcs_reader(wcs_info, dispersion_unit=dispersion_unit)
+        multi_wcs = _multispec_order_wcs(wcs_info,
+                                         dispersion_unit=dispersion_unit,
+                                         vectorized_wcs=vectorized_wcs)
         multispec = []
         for j in range(data.shape[1]):
             equispec = []
             for i in range(data.shape[0]):
                 equispec.append(
-                    Spectrum1D(data[i][j], wcs=list(multi_wcs.values())[j]))
+                    Spectrum1D(data[i][j], wcs=multi_wcs[j]))
             multispec.append(equispec)
         return multispec
 
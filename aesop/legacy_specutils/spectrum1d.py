@@ -54,6 +54,10 @@ class Spectrum1D(NDData):
                       'energy': {'unit': u.J},
                       'velocity': {'unit': u.m/u.s}}
 
+    # Assigning any of these attributes invalidates the cached dispersion
+    _dispersion_dependencies = ('_wcs', 'wcs', 'indexer', '_data')
+    _dispersion_cache = None
+
     @classmethod
     def from_array(cls, dispersion, flux, dispersion_unit=None,
                    uncertainty=None, mask=None, meta=None, copy=True,
@@ -245,6 +249,8 @@ class Spectrum1D(NDData):
         if name[:-5] in self._wcs_attributes and name[-5:] == '_unit':
             self._wcs_attributes[name[:-5]]['unit'] = u.Unit(value)
         else:
+            if name in self._dispersion_dependencies:
+                self.reset_dispersion_cache()
             super(Spectrum1D, self).__setattr__(name, value)
 
     def __dir__(self):
@@ -257,9 +263,26 @@ class Spectrum1D(NDData):
     #TODO: let the WCS handle what to do with len(flux)
     @property
     def dispersion(self):
-        #returning the disp
-        pixel_indices = np.arange(len(self.flux))
-        return self.wcs(self.indexer(pixel_indices))
+        #returning the disp, evaluating the WCS only once for the current
+        #WCS, indexer and number of pixels
+        n_pixels = len(self.data)
+        if (self._dispersion_cache is None or
+                self._dispersion_cache[0] != n_pixels):
+            pixel_indices = np.arange(n_pixels)
+            dispersion = self.wcs(self.indexer(pixel_indices))
+            # the cached array is shared between calls, so protect it from
+            # in-place modification
+            dispersion.flags.writeable = False
+            self._dispersion_cache = (n_pixels, dispersion)
+        return self._dispersion_cache[1]
+
+    def reset_dispersion_cache(self):
+        """
+        Discard the cached dispersion. This happens automatically when the
+        WCS, indexer or data are replaced; call it after modifying the WCS in
+        place.
+        """
+        super(Spectrum1D, self).__setattr__('_dispersion_cache', None)
 
     @property
     def dispersion_unit(self):
@@ -685,4 +685,302 @@ class MultispecIRAFCompositeWCS(BaseSpectrum1DWCS, CompositeWCS):
             # add the log_wcs back
             self.add_WCS(log_wcs)
 
-        return spec
\ No newline at end of file
+        return spec
+
+
+def _legendre_series(x, coefficients):
+    """
+    Evaluate one Legendre series per row of ``x``.
+
+    Parameters
+    -----------
+    x : numpy array
+        normalized coordinates, shape (n_rows, n_pixels)
+    coefficients : numpy array
+        series coefficients, shape (n_rows, n_coefficients)
+    """
+    p_previous, p_current = np.ones_like(x), x
+    result = coefficients[:, 0, np.newaxis] * p_previous
+    for k in range(1, coefficients.shape[1]):
+        result += coefficients[:, k, np.newaxis] * p_current
+        p_previous, p_current = (p_current, ((2 * k + 1) * x * p_current -
+                                             k * p_previous) / (k + 1))
+    return result
+
+
+def _chebyshev_series(x, coefficients):
+    """
+    Evaluate one Chebyshev series per row of ``x``.
+
+    Parameters
+    -----------
+    x : numpy array
+        normalized coordinates, shape (n_rows, n_pixels)
+    coefficients : numpy array
+        series coefficients, shape (n_rows, n_coefficients)
+    """
+    t_previous, t_current = np.ones_like(x), x
+    result = coefficients[:, 0, np.newaxis] * t_previous
+    for k in range(1, coefficients.shape[1]):
+        result += coefficients[:, k, np.newaxis] * t_current
+        t_previous, t_current = t_current, 2 * x * t_current - t_previous
+    return result
+
+
+class MultispecIRAFArrayWCS(object):
+    """
+    A vectorized dispersion model for every order of an IRAF multispec frame.
+
+    The per-order parameters of the multispec specification are stored in
+    arrays, so that the dispersion of all orders is evaluated in one pass
+    rather than through one `MultispecIRAFCompositeWCS` per order. Linear,
+    log-linear, Legendre and Chebyshev dispersion functions are supported,
+    including weighted sums of several functions per order. The result is
+    equivalent to evaluating `MultispecIRAFCompositeWCS` order by order.
+
+    Parameters
+    -----------
+    dispersion_type : array_like
+        IRAF dispersion type of each order (0: linear, 1: log-linear,
+        2: non-linear), shape (n_orders,)
+    dispersion0 : array_like
+        dispersion at the first pixel for linear orders, shape (n_orders,)
+    average_dispersion_delta : array_like
+        dispersion step for linear orders, shape (n_orders,)
+    z : array_like
+        doppler factor of each order, shape (n_orders,)
+    function_types : array_like
+        function type of each non-linear term (1: chebyshev, 2: legendre),
+        shape (n_orders, n_functions)
+    weights : array_like
+        weight of each non-linear term, shape (n_orders, n_functions)
+    zero_point_offsets : array_like
+        zero point offset of each non-linear term,
+        shape (n_orders, n_functions)
+    pmin : array_like
+        lower pixel limit of each non-linear term,
+        shape (n_orders, n_functions)
+    pmax : array_like
+        upper pixel limit of each non-linear term,
+        shape (n_orders, n_functions)
+    coefficients : array_like
+        zero-padded coefficients of each non-linear term,
+        shape (n_orders, n_functions, n_coefficients)
+    num_pixels : int
+        number of pixels in each order
+    unit : astropy.unit, optional
+        the unit of the dispersion
+    """
+
+    function_type_codes = {'chebyshev': 1, 'legendre': 2}
+
+    def __init__(self, dispersion_type, dispersion0, average_dispersion_delta,
+                 z, function_types, weights, zero_point_offsets, pmin, pmax,
+                 coefficients, num_pixels, unit=None):
+        self.dispersion_type = np.asarray(dispersion_type, dtype=int)
+        self.dispersion0 = np.asarray(dispersion0, dtype=float)
+        self.average_dispersion_delta = np.asarray(average_dispersion_delta,
+                                                   dtype=float)
+        self.z = np.asarray(z, dtype=float)
+        self.function_types = np.asarray(function_types, dtype=int)
+        self.weights = np.asarray(weights, dtype=float)
+        self.zero_point_offsets = np.asarray(zero_point_offsets, dtype=float)
+        self.pmin = np.asarray(pmin, dtype=float)
+        self.pmax = np.asarray(pmax, dtype=float)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.num_pixels = num_pixels
+        self.unit = unit
+        self._grid = None
+
+    @classmethod
+    def from_multispec_dict(cls, multispec_dict, num_pixels, unit=None):
+        """
+        Instantiates the model from the output of ``_parse_multispec_dict``.
+
+        Parameters
+        -----------
+        multispec_dict : dict
+            parsed multispec dictionary, one entry per order
+        num_pixels : int
+            number of pixels in each order
+        unit : astropy.unit, optional
+            the unit of the dispersion
+
+        Raises
+        --------
+        NotImplementedError
+            If an order uses a dispersion function other than Legendre or
+            Chebyshev polynomials
+        """
+        spec_dicts = list(multispec_dict.values())
+        n_orders = len(spec_dicts)
+        n_functions = max([len(d['functions']) for d in spec_dicts] + [1])
+        n_coefficients = max([f['order'] for d in spec_dicts
+                              for f in d['functions']] + [1])
+
+        function_types = np.zeros((n_orders, n_functions), dtype=int)
+        weights = np.zeros((n_orders, n_functions))
+        zero_point_offsets = np.zeros((n_orders, n_functions))
+        # Padding values keep the pixel normalization finite for unused terms
+        pmin = np.zeros((n_orders, n_functions))
+        pmax = np.ones((n_orders, n_functions))
+        coefficients = np.zeros((n_orders, n_functions, n_coefficients))
+
+        for i, spec_dict in enumerate(spec_dicts):
+            for j, function_dict in enumerate(spec_dict['functions']):
+                if function_dict['type'] not in cls.function_type_codes:
+                    raise NotImplementedError(
+                        "Vectorized dispersion is not implemented for "
+                        "{0} functions".format(function_dict['type']))
+                function_types[i, j] = cls.function_type_codes[
+                    function_dict['type']]
+                weights[i, j] = function_dict['weight']
+                zero_point_offsets[i, j] = function_dict['zero_point_offset']
+                pmin[i, j] = function_dict['pmin']
+                pmax[i, j] = function_dict['pmax']
+                coefficients[i, j, :function_dict['order']] = \
+                    function_dict['coefficients']
+
+        return cls([d['dispersion_type'] for d in spec_dicts],
+                   [d['dispersion0'] for d in spec_dicts],
+                   [d['average_dispersion_delta'] for d in spec_dicts],
+                   [d['doppler_factor'] for d in spec_dicts],
+                   function_types, weights, zero_point_offsets, pmin, pmax,
+                   coefficients, num_pixels, unit=unit)
+
+    def __len__(self):
+        return len(self.dispersion_type)
+
+    def __getitem__(self, order_index):
+        return MultispecIRAFOrderWCS(self, order_index)
+
+    def evaluate(self, pixel_indices=None, orders=None):
+        """
+        Compute the dispersion of several orders at once, without units.
+
+        Parameters
+        -----------
+        pixel_indices : numpy array, optional
+            the pixel coordinates on which dispersion needs to be computed,
+            defaults to every pixel of an order
+        orders : int, slice or numpy array, optional
+            the orders to evaluate, defaults to all orders
+
+        Returns
+        --------
+        dispersion : numpy array
+            dispersion with shape (n_orders, n_pixels)
+        """
+        if pixel_indices is None:
+            pixel_indices = np.arange(self.num_pixels)
+        rows = np.atleast_1d(np.arange(len(self))[slice(None) if orders is None
+                                                  else orders])
+        pixels = np.asarray(pixel_indices, dtype=float)[np.newaxis, :]
+
+        dispersion_type = self.dispersion_type[rows]
+        linear = dispersion_type != 2
+        nonlinear = ~linear
+
+        dispersion = np.zeros((len(rows), pixels.shape[1]))
+        dispersion[linear] = (self.dispersion0[rows][linear, np.newaxis] +
+                              self.average_dispersion_delta[rows][linear,
+                                                                  np.newaxis] *
+                              pixels)
+
+        if np.any(nonlinear):
+            nonlinear_rows = rows[nonlinear]
+            series = {1: _chebyshev_series, 2: _legendre_series}
+            for j in range(self.function_types.shape[1]):
+                pmin = self.pmin[nonlinear_rows, j, np.newaxis]
+                pmax = self.pmax[nonlinear_rows, j, np.newaxis]
+                x = (2 * (pixels + pmin) - (pmax + pmin)) / (pmax - pmin)
+
+                values = np.zeros_like(x)
+                function_types = self.function_types[nonlinear_rows, j]
+                for function_type, evaluate_series in series.items():
+                    is_type = function_types == function_type
+                    if np.any(is_type):
+                        values[is_type] = evaluate_series(
+                            x[is_type],
+                            self.coefficients[nonlinear_rows[is_type], j])
+
+                dispersion[nonlinear] += (
+                    self.weights[nonlinear_rows, j, np.newaxis] *
+                    (self.zero_point_offsets[nonlinear_rows, j, np.newaxis] +
+                     values))
+
+        dispersion /= 1 + self.z[rows, np.newaxis]
+
+        log = dispersion_type == 1
+        if np.any(log):
+            dispersion[log] = 10 ** dispersion[log]
+
+        return dispersion
+
+    @property
+    def grid(self):
+        """
+        Dispersion of every pixel of every order, computed once, without
+        units.
+        """
+        if self._grid is None:
+            self._grid = self.evaluate()
+        return self._grid
+
+    def __call__(self, pixel_indices=None):
+        """
+        Applies the model to the pixel coordinates of every order
+
+        Parameters
+        -----------
+        pixel_indices : numpy array, optional
+            the pixel coordinates on which dispersion needs to be computed
+        """
+        if pixel_indices is None:
+            dispersion = self.grid
+        else:
+            dispersion = self.evaluate(pixel_indices)
+        return dispersion * (1.0 if self.unit is None else self.unit)
+
+
+class MultispecIRAFOrderWCS(BaseSpectrum1DWCS):
+    """
+    WCS for a single order backed by a `MultispecIRAFArrayWCS`.
+
+    Evaluating the full pixel range of any order returns the corresponding
+    row of the shared dispersion grid, so a whole frame is computed in one
+    vectorized pass.
+
+    Parameters
+    -----------
+    array_wcs : `MultispecIRAFArrayWCS`
+        the dispersion model of the whole frame
+    order_index : int
+        the row of ``array_wcs`` described by this WCS
+    """
+
+    def __init__(self, array_wcs, order_index):
+        super(MultispecIRAFOrderWCS, self).__init__()
+        self.array_wcs = array_wcs
+        self.order_index = order_index
+        self.unit = array_wcs.unit
+
+    def __call__(self, pixel_indices):
+        """
+        Applies the model to the pixel coordinates, to produce the dispersion
+        at those pixels
+
+        Parameters
+        -----------
+        pixel_indices : numpy array
+            the pixel coordinates on which dispersion needs to be computed
+        """
+        return self.evaluate(pixel_indices) * self.unit
+
+    def evaluate(self, pixel_indices):
+        pixel_indices = np.asarray(pixel_indices)
+        if np.array_equal(pixel_indices,
+                          np.arange(self.array_wcs.num_pixels)):
+            return self.array_wcs.grid[self.order_index]
+        return self.array_wcs.evaluate(pixel_indices,
+                                       orders=self.order_index)[0]
@@ -2,17 +2,203 @@ import numpy as np
 from scipy.optimize import fmin_l_bfgs_b
 import matplotlib.pyplot as plt
 
-__all__ = ['get_spectrum_mask']
+__all__ = ['get_spectrum_mask', 'get_spectrum_masks', 'fit_blaze_gaussians']
 
 def _gaussian(x, a, x0, sigma):
     return a * np.exp(-0.5 * (x - x0)**2 / sigma**2)
 
 
-def _chi2(p, x, y):
-    return np.sum((_gaussian(x, *p) - y) ** 2)
+def _chi2_and_gradient(p, x, y):
+    """
+    Sum of squared residuals of the Gaussian model and its analytic gradient
+    with respect to ``p = (a, x0, sigma)``.
+    """
+    a, x0, sigma = p
+    exponential = np.exp(-0.5 * (x - x0)**2 / sigma**2)
+    residuals = a * exponential - y
+    d_x = x - x0
+
+    gradient = 2 * np.array([np.sum(residuals * exponential),
+                             np.sum(residuals * a * exponential * d_x /
+                                    sigma**2),
+                             np.sum(residuals * a * exponential * d_x**2 /
+                                    sigma**3)])
+    return np.sum(residuals**2), gradient
+
+
+def _log_parabola_estimate(x, y):
+    """
+    Closed-form Gaussian parameters from a weighted parabola fit to the
+    logarithm of the positive fluxes of each row of ``x``, ``y``.
+
+    Rows without a usable parabola (too few positive fluxes, or no maximum)
+    get the same initial guess as the L-BFGS-B fitter.
+    """
+    x_mean = x.mean(axis=1)[:, np.newaxis]
+    half_width = 0.5 * np.ptp(x, axis=1)[:, np.newaxis]
+    t = (x - x_mean) / half_width
+
+    positive = y > 0
+    # Weighting by y**2 compensates for the noise amplification of the
+    # logarithm in the faint wings of the blaze function
+    weights = np.where(positive, y, 0)**2
+    log_y = np.log(np.where(positive, y, 1))
+
+    power_sums = np.empty((len(x), 5))
+    moments = np.empty((len(x), 3))
+    term = weights.copy()
+    for k in range(5):
+        power_sums[:, k] = term.sum(axis=1)
+        if k < 3:
+            moments[:, k] = np.einsum('nm,nm->n', term, log_y)
+        term *= t
+
+    powers = np.arange(3)
+    lhs = power_sums[:, powers[:, np.newaxis] + powers]
+    usable = np.count_nonzero(positive, axis=1) >= 3
+    lhs[~usable] = np.eye(3)
+    moments[~usable] = 0
+    c0, c1, c2 = np.linalg.solve(lhs, moments[..., np.newaxis])[..., 0].T
+
+    peaked = usable & (c2 < 0)
+    c2 = np.where(peaked, c2, -1)
+
+    amplitude = np.where(peaked, np.exp(c0 - c1**2 / (4 * c2)), y.max(axis=1))
+    center = np.where(peaked, x_mean[:, 0] - half_width[:, 0] * c1 / (2 * c2),
+                      x.mean(axis=1))
+    sigma = np.where(peaked, half_width[:, 0] * np.sqrt(-0.5 / c2),
+                     np.ptp(x, axis=1) / 4)
+    return np.column_stack([amplitude, center, sigma])
+
+
+def fit_blaze_gaussians(wavelengths, fluxes, n_iterations=30, tol=1e-10):
+    """
+    Fit a Gaussian to the blaze function of several orders at once.
+
+    Starts from a closed-form fit of a parabola to the log of the fluxes, then
+    refines the least-squares fit with damped Gauss-Newton
+    (Levenberg-Marquardt) steps using the analytic Jacobian. The parameters
+    are bounded like in the L-BFGS-B fit of `get_spectrum_mask`.
+
+    Parameters
+    ----------
+    wavelengths : `~numpy.ndarray`
+        Wavelengths of each order, shape ``(n_orders, n_pixels)``
+    fluxes : `~numpy.ndarray`
+        Fluxes of each order, shape ``(n_orders, n_pixels)``
+    n_iterations : int
+        Maximum number of Gauss-Newton steps
+    tol : float
+        Stop once the relative change in chi^2 of every order is below
+        ``tol``
+
+    Returns
+    -------
+    params : `~numpy.ndarray`
+        Best-fit amplitude, center and standard deviation of each order,
+        shape ``(n_orders, 3)``
+    """
+    x = np.atleast_2d(np.asarray(wavelengths, dtype=float))
+    y = np.atleast_2d(np.asarray(fluxes, dtype=float))
+
+    ptp = np.ptp(x, axis=1)
+    lower = np.column_stack([np.zeros(len(x)), x.min(axis=1), ptp / 8])
+    upper = np.column_stack([np.inf * np.ones(len(x)), x.max(axis=1), ptp / 2])
+
+    def chi2(p):
+        return np.sum((_gaussian(x, *p.T[..., np.newaxis]) - y)**2, axis=1)
+
+    params = np.clip(_log_parabola_estimate(x, y), lower, upper)
+    current_chi2 = chi2(params)
+    damping = 1e-3 * np.ones(len(x))
+
+    for i in range(n_iterations):
+        a, x0, sigma = params.T[..., np.newaxis]
+        d_x = x - x0
+        exponential = np.exp(-0.5 * d_x**2 / sigma**2)
+        residuals = y - a * exponential
+
+        d_center = a * exponential * d_x / sigma**2
+        jacobian = [exponential, d_center, d_center * d_x / sigma]
 
+        jtj = np.empty((len(x), 3, 3))
+        jtr = np.empty((len(x), 3))
+        for j in range(3):
+            jtr[:, j] = np.einsum('nm,nm->n', jacobian[j], residuals)
+            for k in range(j, 3):
+                jtj[:, j, k] = jtj[:, k, j] = np.einsum('nm,nm->n',
+                                                        jacobian[j],
+                                                        jacobian[k])
 
-def get_spectrum_mask(spectrum, cutoff=1.5, plot=False):
+        diagonal = np.einsum('nii->ni', jtj)
+        damped = jtj + (damping[:, np.newaxis, np.newaxis] *
+                        diagonal[:, np.newaxis, :] * np.eye(3))
+        step = np.linalg.solve(damped, jtr[..., np.newaxis])[..., 0]
+
+        trial_params = np.clip(params + step, lower, upper)
+        trial_chi2 = chi2(trial_params)
+
+        improved = trial_chi2 < current_chi2
+        converged = (np.abs(current_chi2 - trial_chi2) <=
+                     tol * np.maximum(current_chi2, 1e-300))
+
+        params[improved] = trial_params[improved]
+        current_chi2[improved] = trial_chi2[improved]
+        damping = np.where(improved, damping / 10, damping * 10)
+
+        if np.all(converged | ~improved & (damping > 1e10)):
+            break
+
+    return params
+
+
+def _plot_mask(wavelength, flux, mask):
+    plt.figure()
+    plt.plot(wavelength, flux, label='unmasked')
+    plt.plot(wavelength[mask], flux[mask], label='masked')
+    plt.legend()
+
+
+def get_spectrum_masks(wavelengths, fluxes, cutoff=1.5, plot=False):
+    """
+    Fit the raw, pre-normalized blaze functions of several orders at once
+    with Gaussians (see `fit_blaze_gaussians`), and mask each order like
+    `get_spectrum_mask`.
+
+    Parameters
+    ----------
+    wavelengths : `~numpy.ndarray`
+        Wavelengths of each order, shape ``(n_orders, n_pixels)``
+    fluxes : `~numpy.ndarray`
+        Fluxes of each order, shape ``(n_orders, n_pixels)``
+    cutoff : float
+        Mask channels greater than ``cuttoff``-sigma away from
+        the peak flux.
+
+    Returns
+    -------
+    masks : `~numpy.ndarray`
+        Masks that exclude channels greater than ``cuttoff``-sigma away from
+        the peak flux, shape ``(n_orders, n_pixels)``.
+    """
+    wavelengths = np.atleast_2d(wavelengths)
+    bestp = fit_blaze_gaussians(wavelengths, fluxes)
+
+    best_a, best_x0, best_sigma = bestp.T[..., np.newaxis]
+
+    mask = ((wavelengths > best_x0 - cutoff * best_sigma) &
+            (wavelengths < best_x0 + cutoff * best_sigma))
+
+    if plot:
+        for wavelength, flux, order_mask in zip(wavelengths,
+                                                np.atleast_2d(fluxes), mask):
+            _plot_mask(wavelength, flux, order_mask)
+
+    return np.logical_not(mask)
+
+
+def get_spectrum_mask(spectrum, cutoff=1.5, plot=False,
+                      method='gauss-newton'):
     """
     Fit the raw, pre-normalized spectrum's blaze function
     with a Gaussian. Use a
@@ -24,6 +210,9 @@ def get_spectrum_mask(spectrum, cutoff=1.5, plot=False):
     cutoff : float
         Mask channels greater than ``cuttoff``-sigma away from
         the peak flux.
+    method : {'gauss-newton', 'l-bfgs-b'}
+        Fit with `fit_blaze_gaussians` (default), or with L-BFGS-B and
+        analytic gradients.
 
     Returns
     -------
@@ -31,12 +220,18 @@ def get_spectrum_mask(spectrum, cutoff=1.5, plot=False):
         Mask that excludes channels greater than ``cuttoff``-sigma away from
         the peak flux.
     """
+    if method == 'gauss-newton':
+        return get_spectrum_masks(spectrum.wavelength.value,
+                                  spectrum.flux.value, cutoff=cutoff,
+                                  plot=plot)[0]
+    elif method != 'l-bfgs-b':
+        raise ValueError("Unknown fitting method: {0}".format(method))
+
     initp = np.array([spectrum.flux.max().value,
                       spectrum.wavelength.mean().value,
                       spectrum.wavelength.ptp().value/4])
 
-    bestp = fmin_l_bfgs_b(_chi2, initp[:],
-                          approx_grad=True,
+    bestp = fmin_l_bfgs_b(_chi2_and_gradient, initp[:],
                           args=(spectrum.wavelength.value,
                                 spectrum.flux.value),
                           bounds=[(0, np.inf),
@@ -51,9 +246,6 @@ def get_spectrum_mask(spectrum, cutoff=1.5, plot=False):
             (spectrum.wavelength.value < best_x0 + cutoff * best_sigma))
 
     if plot:
-        plt.figure()
-        plt.plot(spectrum.wavelength, spectrum.flux, label='unmasked')
-        plt.plot(spectrum.wavelength[mask], spectrum.flux[mask], label='masked')
-        plt.legend()
+        _plot_mask(spectrum.wavelength, spectrum.flux, mask)
 
     return np.logical_not(mask)
@@ -2,13 +2,21 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import os
+from glob import glob
+from collections import OrderedDict
+
 import numpy as np
+from scipy.ndimage import gaussian_filter1d
+from scipy.signal import fftconvolve
 from astropy.utils.data import download_file
 from astropy.io import fits
 import astropy.units as u
+import astropy.constants as c
 
 
-__all__ = ['get_phoenix_model_spectrum', 'phoenix_model_temps']
+__all__ = ['get_phoenix_model_spectrum', 'phoenix_model_temps', 'PhoenixGrid',
+           'broaden_spectrum']
 
 
 phoenix_model_temps = np.array([3200, 6400, 14500, 4100, 12500, 5000, 6700,
@@ -25,17 +33,576 @@ phoenix_model_temps = np.array([3200, 6400, 14500, 4100, 12500, 5000, 6700,
                                  2300, 11200])
 
 
-def get_url(T_eff, log_g):
-    closest_grid_temperature = phoenix_model_temps[np.argmin(np.abs(phoenix_model_temps - T_eff))]
+phoenix_url = ('ftp://phoenix.astro.physik.uni-goettingen.de/v2.0/HiResFITS/'
+               'PHOENIX-ACES-AGSS-COND-2011/Z{metallicity}/lte{T_eff:05d}-'
+               '{log_g:1.2f}{metallicity}.PHOENIX-ACES-AGSS-COND-2011-HiRes.fits')
+
+wavelength_url = ('ftp://phoenix.astro.physik.uni-goettingen.de/v2.0/HiResFITS/'
+                  'WAVE_PHOENIX-ACES-AGSS-COND-2011.fits')
+
+
+def _metallicity_string(metallicity):
+    """
+    Metallicity as written in PHOENIX file names, e.g. "-0.0" or "+0.5".
+    """
+    if metallicity == 0:
+        return '-0.0'
+    return '{0:+1.1f}'.format(metallicity)
+
+
+# Sorted index into ``phoenix_model_temps``, for binary searches
+_sorted_temps_index = np.argsort(phoenix_model_temps, kind='mergesort')
+_sorted_temps = phoenix_model_temps[_sorted_temps_index]
+
+
+def closest_grid_temperature(T_eff):
+    """
+    Effective temperature of the PHOENIX grid point nearest ``T_eff``.
+
+    Ties go to the temperature listed first in ``phoenix_model_temps``.
+    """
+    upper = np.clip(np.searchsorted(_sorted_temps, T_eff), 1,
+                    len(_sorted_temps) - 1)
+    lower = upper - 1
+    lower_distance = abs(T_eff - _sorted_temps[lower])
+    upper_distance = abs(_sorted_temps[upper] - T_eff)
+
+    if lower_distance == upper_distance:
+        closest = min(lower, upper, key=lambda i: _sorted_temps_index[i])
+    else:
+        closest = lower if lower_distance < upper_distance else upper
+    return _sorted_temps[closest]
+
 
-    url = ('ftp://phoenix.astro.physik.uni-goettingen.de/v2.0/HiResFITS/'
-           'PHOENIX-ACES-AGSS-COND-2011/Z-0.0/lte{T_eff:05d}-{log_g:1.2f}-0.0.PHOENIX-'
-           'ACES-AGSS-COND-2011-HiRes.fits').format(T_eff=closest_grid_temperature,
-                                                    log_g=log_g)
+def get_url(T_eff, log_g, metallicity=0.0):
+    url = phoenix_url.format(T_eff=closest_grid_temperature(T_eff), log_g=log_g,
+                             metallicity=_metallicity_string(metallicity))
     return url
 
 
-def get_phoenix_model_spectrum(T_eff, log_g=4.5, cache=True):
+def vacuum_to_air(wavelengths_vacuum):
+    """
+    Convert PHOENIX vacuum wavelengths to wavelengths in air, as described in
+    Husser 2013, Eqns. 8-10.
+
+    Parameters
+    ----------
+    wavelengths_vacuum : `~numpy.ndarray`
+        Vacuum wavelengths in Angstroms
+
+    Returns
+    -------
+    wavelengths_air : `~numpy.ndarray`
+        Air wavelengths in Angstroms
+    """
+    sigma_2 = (10**4 / wavelengths_vacuum)**2
+    f = (1.0 + 0.05792105/(238.0185 - sigma_2) + 0.00167917 /
+         (57.362 - sigma_2))
+    return wavelengths_vacuum / f
+
+
+def broaden_spectrum(wavelengths, fluxes, resolution=None, v_sin_i=None,
+                     limb_darkening=0.6):
+    """
+    Convolve a spectrum with the line spread function of a spectrograph of
+    constant resolving power, and optionally with a rotational broadening
+    kernel.
+
+    Both kernels have a constant width in velocity, so the convolution is done
+    on a grid uniform in :math:`\\ln\\lambda`, and the result is interpolated
+    back onto ``wavelengths``.
+
+    Parameters
+    ----------
+    wavelengths : `~numpy.ndarray`
+        Sorted wavelengths
+    fluxes : `~numpy.ndarray`
+        Fluxes at ``wavelengths``
+    resolution : float (optional)
+        Resolving power :math:`R = \\lambda / \\Delta \\lambda` of the
+        spectrograph, where :math:`\\Delta \\lambda` is the FWHM of a
+        Gaussian line spread function
+    v_sin_i : `~astropy.units.Quantity` (optional)
+        Projected rotational velocity
+    limb_darkening : float
+        Linear limb-darkening coefficient of the rotational kernel (Gray 2005)
+
+    Returns
+    -------
+    broadened_fluxes : `~numpy.ndarray`
+        Broadened fluxes at ``wavelengths``
+    """
+    log_wavelengths = np.log(np.asarray(wavelengths, dtype=float))
+    sigma = (1 / resolution / (2 * np.sqrt(2 * np.log(2)))
+             if resolution else None)
+    half_width = (u.Quantity(v_sin_i, u.km/u.s) / c.c).to(
+        u.dimensionless_unscaled).value if v_sin_i is not None else 0
+
+    # Keep the native sampling, but sample the narrowest kernel with at least
+    # ten pixels
+    kernel_widths = [width for width in [sigma, half_width] if width]
+    if not kernel_widths:
+        return np.array(fluxes, dtype=float)
+    log_step = min(np.median(np.diff(log_wavelengths)),
+                   min(kernel_widths) / 10)
+
+    log_grid = np.arange(log_wavelengths[0], log_wavelengths[-1], log_step)
+    broadened = np.interp(log_grid, log_wavelengths, fluxes)
+
+    if sigma:
+        broadened = gaussian_filter1d(broadened, sigma / log_step)
+
+    if half_width:
+        x = np.arange(-np.floor(half_width / log_step),
+                      np.floor(half_width / log_step) + 1) * log_step
+        x /= half_width
+        kernel = (2 * (1 - limb_darkening) * np.sqrt(1 - x**2) +
+                  0.5 * np.pi * limb_darkening * (1 - x**2))
+        broadened = fftconvolve(broadened, kernel / kernel.sum(), mode='same')
+
+    return np.interp(log_wavelengths, log_grid, broadened)
+
+
+class PhoenixGrid(object):
+    """
+    Local store of PHOENIX model spectra.
+
+    Each model is converted once into a ``.npy`` file of fluxes, sorted by
+    increasing air wavelength, which is shared by all models in the store.
+    Lookups return read-only, memory-mapped arrays, so nothing is read from
+    disk until it is used, and no network access is needed once the models
+    are in the store.
+
+    Examples
+    --------
+    Build the store once (this downloads each model):
+
+    >>> from aesop import PhoenixGrid
+    >>> grid = PhoenixGrid('phoenix_grid')  # doctest: +SKIP
+    >>> grid.build(T_effs=[4000, 4700, 5800], log_gs=[4.5])  # doctest: +SKIP
+
+    Later, offline:
+
+    >>> spectrum = PhoenixGrid('phoenix_grid').get(4700)  # doctest: +SKIP
+
+    Templates convolved to the resolution of ARCES are computed once and
+    saved in the store:
+
+    >>> spectrum = PhoenixGrid('phoenix_grid').window(4700, 3900*u.Angstrom,
+    ...                                               4000*u.Angstrom,
+    ...                                               resolution=31500)  # doctest: +SKIP
+
+    Templates between the grid points are interpolated:
+
+    >>> spectrum = PhoenixGrid('phoenix_grid').interpolate(4550)  # doctest: +SKIP
+    """
+    wavelength_file = 'air_wavelengths.npy'
+    index_file = 'air_index.npy'
+    broadened_dir = 'broadened'
+
+    def __init__(self, path, cache_size=8):
+        """
+        Parameters
+        ----------
+        path : str
+            Directory of the store. It is created if it does not exist.
+        cache_size : int
+            Number of interpolated templates to keep in memory. The least
+            recently used template is dropped first.
+        """
+        self.path = path
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+        self.cache_size = cache_size
+        self._wavelengths = None
+        self._index = None
+        self._fluxes = dict()
+        self._interpolated = OrderedDict()
+
+    def __repr__(self):
+        return "<PhoenixGrid: {0} models in {1}>".format(len(self.models),
+                                                         self.path)
+
+    @staticmethod
+    def model_filename(T_eff, log_g=4.5, metallicity=0.0):
+        """
+        Name of the file of the model with these parameters.
+        """
+        return 'lte{0:05d}-{1:1.2f}{2}.npy'.format(
+            int(T_eff), log_g, _metallicity_string(metallicity))
+
+    @property
+    def models(self):
+        """
+        Sorted list of ``(T_eff, log_g, metallicity)`` of the models in the
+        store.
+        """
+        models = []
+        for path in glob(os.path.join(self.path, 'lte*.npy')):
+            name = os.path.basename(path)[3:-len('.npy')]
+            models.append((int(name[:5]), float(name[6:10]),
+                           float(name[10:])))
+        return sorted(models)
+
+    def grid_points(self, metallicity=0.0):
+        """
+        Sorted effective temperatures and surface gravities of the models in
+        the store with one metallicity.
+
+        Parameters
+        ----------
+        metallicity : float
+            Metallicity [M/H]
+
+        Returns
+        -------
+        T_effs, log_gs : `~numpy.ndarray`
+            Unique grid values of each parameter
+        """
+        models = np.array([model[:2] for model in self.models
+                           if model[2] == metallicity]).reshape((-1, 2))
+        return np.unique(models[:, 0]).astype(int), np.unique(models[:, 1])
+
+    def __contains__(self, parameters):
+        return os.path.exists(os.path.join(self.path,
+                                           self.model_filename(*parameters)))
+
+    def add_wavelengths(self, wavelengths_vacuum=None, cache=True):
+        """
+        Store the air wavelengths of the PHOENIX grid.
+
+        Parameters
+        ----------
+        wavelengths_vacuum : `~numpy.ndarray` (optional)
+            Vacuum wavelengths of the grid in Angstroms. By default they are
+            downloaded.
+        cache : bool
+            Cache the download to the local astropy cache.
+        """
+        if wavelengths_vacuum is None:
+            wavelengths_vacuum = fits.getdata(
+                download_file(wavelength_url, cache=cache, timeout=30))
+
+        wavelengths_air = vacuum_to_air(np.asarray(wavelengths_vacuum,
+                                                   dtype=float))
+
+        positive = np.flatnonzero(wavelengths_air > 0)
+        index = positive[np.argsort(wavelengths_air[positive], kind='mergesort')]
+
+        np.save(os.path.join(self.path, self.index_file), index)
+        np.save(os.path.join(self.path, self.wavelength_file),
+                wavelengths_air[index])
+        self._wavelengths = None
+        self._index = None
+
+    def add(self, T_eff, log_g=4.5, metallicity=0.0, fluxes=None, cache=True):
+        """
+        Add one model to the store.
+
+        Parameters
+        ----------
+        T_eff : int
+            Effective temperature of a grid point
+        log_g : float
+            Surface gravity of a grid point
+        metallicity : float
+            Metallicity [M/H] of a grid point
+        fluxes : `~numpy.ndarray` (optional)
+            Fluxes of the model on the PHOENIX vacuum wavelength grid. By
+            default they are downloaded.
+        cache : bool
+            Cache the downloads to the local astropy cache.
+        """
+        if not os.path.exists(os.path.join(self.path, self.index_file)):
+            self.add_wavelengths(cache=cache)
+
+        if fluxes is None:
+            url = phoenix_url.format(T_eff=int(T_eff), log_g=log_g,
+                                     metallicity=_metallicity_string(metallicity))
+            fluxes = fits.getdata(download_file(url, cache=cache, timeout=30))
+
+        fluxes = np.asarray(fluxes)
+        fluxes = fluxes.astype(fluxes.dtype.newbyteorder('='), copy=False)
+
+        np.save(os.path.join(self.path,
+                             self.model_filename(T_eff, log_g, metallicity)),
+                fluxes[self.index])
+        for path in glob(os.path.join(self.path, self.broadened_dir,
+                                      self.model_filename(T_eff, log_g,
+                                                          metallicity)[:-4] +
+                                      '_*.npy')):
+            os.remove(path)
+        self._fluxes.clear()
+        self._interpolated.clear()
+
+    def build(self, T_effs=phoenix_model_temps, log_gs=(4.5, ),
+              metallicities=(0.0, ), cache=True, overwrite=False):
+        """
+        Add every combination of the given parameters to the store.
+
+        Parameters
+        ----------
+        T_effs : list
+            Effective temperatures of grid points
+        log_gs : list
+            Surface gravities of grid points
+        metallicities : list
+            Metallicities of grid points
+        cache : bool
+            Cache the downloads to the local astropy cache.
+        overwrite : bool
+            Replace models that are already in the store.
+        """
+        for T_eff in T_effs:
+            for log_g in log_gs:
+                for metallicity in metallicities:
+                    if overwrite or (T_eff, log_g, metallicity) not in self:
+                        self.add(T_eff, log_g, metallicity, cache=cache)
+
+    @property
+    def wavelengths(self):
+        """
+        Air wavelengths of the grid in Angstroms, sorted, memory-mapped.
+        """
+        if self._wavelengths is None:
+            self._wavelengths = np.load(
+                os.path.join(self.path, self.wavelength_file), mmap_mode='r')
+        return self._wavelengths
+
+    @property
+    def index(self):
+        """
+        Indices of the stored fluxes on the PHOENIX vacuum wavelength grid.
+        """
+        if self._index is None:
+            self._index = np.load(os.path.join(self.path, self.index_file),
+                                  mmap_mode='r')
+        return self._index
+
+    def fluxes(self, T_eff, log_g=4.5, metallicity=0.0, resolution=None,
+               v_sin_i=None):
+        """
+        Memory-mapped fluxes of one model, at `PhoenixGrid.wavelengths`.
+
+        Parameters
+        ----------
+        T_eff : int
+            Effective temperature of a grid point
+        log_g : float
+            Surface gravity of a grid point
+        metallicity : float
+            Metallicity [M/H] of a grid point
+        resolution : float (optional)
+            Return fluxes convolved to this resolving power, see
+            `~aesop.phoenix.broaden_spectrum`. Broadened fluxes are computed
+            the first time they are requested and saved in the store.
+        v_sin_i : `~astropy.units.Quantity` (optional)
+            Return fluxes with rotational broadening
+        """
+        if v_sin_i is not None:
+            v_sin_i = u.Quantity(v_sin_i, u.km/u.s).value
+        parameters = (T_eff, log_g, metallicity)
+        key = parameters + (resolution, v_sin_i)
+
+        if key not in self._fluxes:
+            if parameters not in self:
+                raise ValueError("No model with T_eff={0}, log g={1}, [M/H]={2} "
+                                 "in {3}. Add it with PhoenixGrid.add."
+                                 .format(T_eff, log_g, metallicity, self.path))
+
+            if resolution is None and v_sin_i is None:
+                path = os.path.join(self.path, self.model_filename(*parameters))
+            else:
+                path = os.path.join(self.path, self.broadened_dir,
+                                    '{0}_R{1:g}_vsini{2:g}.npy'.format(
+                                        self.model_filename(*parameters)[:-4],
+                                        resolution or 0, v_sin_i or 0))
+                if not os.path.exists(path):
+                    if not os.path.exists(os.path.dirname(path)):
+                        os.makedirs(os.path.dirname(path))
+                    np.save(path, broaden_spectrum(
+                        self.wavelengths, self.fluxes(*parameters),
+                        resolution=resolution,
+                        v_sin_i=v_sin_i * u.km/u.s if v_sin_i else None))
+
+            self._fluxes[key] = np.load(path, mmap_mode='r')
+        return self._fluxes[key]
+
+    def get(self, T_eff, log_g=4.5, metallicity=0.0):
+        """
+        Model spectrum backed by the memory-mapped arrays of the store.
+
+        Parameters
+        ----------
+        T_eff : int
+            Effective temperature of a grid point
+        log_g : float
+            Surface gravity of a grid point
+        metallicity : float
+            Metallicity [M/H] of a grid point
+
+        Returns
+        -------
+        spectrum : `~aesop.Spectrum1D`
+            Model spectrum
+        """
+        from .spectra import Spectrum1D
+
+        fluxes = self.fluxes(T_eff, log_g, metallicity)
+        return Spectrum1D._from_values(self.wavelengths, fluxes, u.Angstrom)
+
+    def window(self, T_eff, min_wavelength, max_wavelength, log_g=4.5,
+               metallicity=0.0, norm=None, resolution=None, v_sin_i=None):
+        """
+        Model spectrum between two wavelengths.
+
+        The wavelength range is found with a binary search on the sorted air
+        wavelengths, and only that range of the fluxes is read from disk.
+
+        Parameters
+        ----------
+        T_eff : int
+            Effective temperature of a grid point
+        min_wavelength : `~astropy.units.Quantity`
+            Minimum wavelength to include (exclusive)
+        max_wavelength : `~astropy.units.Quantity`
+            Maximum wavelength to include (exclusive)
+        log_g : float
+            Surface gravity of a grid point
+        metallicity : float
+            Metallicity [M/H] of a grid point
+        norm : float or `~astropy.units.Quantity` (optional)
+            Normalize the fluxes so that their maximum is ``norm``, like
+            `~aesop.slice_spectrum`. The fluxes take the unit of ``norm``.
+        resolution : float (optional)
+            Use the model convolved to this resolving power, see
+            `PhoenixGrid.fluxes`
+        v_sin_i : `~astropy.units.Quantity` (optional)
+            Use the model with rotational broadening
+
+        Returns
+        -------
+        spectrum : `~aesop.Spectrum1D`
+            Model spectrum on ``min_wavelength < wavelength < max_wavelength``
+        """
+        from .spectra import Spectrum1D
+
+        start, stop = self.window_indices(min_wavelength, max_wavelength)
+        fluxes = self.fluxes(T_eff, log_g, metallicity, resolution=resolution,
+                             v_sin_i=v_sin_i)[start:stop]
+        flux_unit = u.dimensionless_unscaled
+        if norm is not None:
+            norm = u.Quantity(norm)
+            fluxes = fluxes * (norm.value / fluxes.max())
+            flux_unit = norm.unit
+
+        return Spectrum1D._from_values(self.wavelengths[start:stop], fluxes,
+                                       u.Angstrom, flux_unit)
+
+    def interpolate(self, T_eff, log_g=4.5, metallicity=0.0,
+                    min_wavelength=None, max_wavelength=None):
+        """
+        Model spectrum interpolated linearly in effective temperature and
+        surface gravity between the neighboring models in the store.
+
+        The neighbors are found with a binary search of the sorted grid
+        points. Results are cached, see ``cache_size``.
+
+        Parameters
+        ----------
+        T_eff : float
+            Effective temperature
+        log_g : float
+            Surface gravity
+        metallicity : float
+            Metallicity [M/H] of a grid point
+        min_wavelength : `~astropy.units.Quantity` (optional)
+            Only interpolate wavelengths greater than this
+        max_wavelength : `~astropy.units.Quantity` (optional)
+            Only interpolate wavelengths less than this
+
+        Returns
+        -------
+        spectrum : `~aesop.Spectrum1D`
+            Interpolated model spectrum. Its fluxes are read-only, because the
+            spectrum is shared with later calls.
+        """
+        from .spectra import Spectrum1D
+
+        start, stop = self.window_indices(
+            0 if min_wavelength is None else min_wavelength,
+            np.inf if max_wavelength is None else max_wavelength)
+
+        key = (T_eff, log_g, metallicity, start, stop)
+        if key in self._interpolated:
+            spectrum = self._interpolated.pop(key)
+            self._interpolated[key] = spectrum
+            return spectrum
+
+        T_effs, log_gs = self.grid_points(metallicity)
+        fluxes = 0
+        for grid_T_eff, T_eff_weight in _bracket(T_effs, T_eff, 'T_eff'):
+            for grid_log_g, log_g_weight in _bracket(log_gs, log_g, 'log g'):
+                fluxes = fluxes + (T_eff_weight * log_g_weight *
+                                   self.fluxes(grid_T_eff, grid_log_g,
+                                               metallicity)[start:stop])
+
+        fluxes = np.array(fluxes, dtype=float)
+        fluxes.flags.writeable = False
+        spectrum = Spectrum1D._from_values(self.wavelengths[start:stop],
+                                           fluxes, u.Angstrom)
+
+        self._interpolated[key] = spectrum
+        while len(self._interpolated) > self.cache_size:
+            self._interpolated.popitem(last=False)
+        return spectrum
+
+    def window_indices(self, min_wavelength, max_wavelength):
+        """
+        Slice of `PhoenixGrid.wavelengths` strictly between two wavelengths.
+
+        Parameters
+        ----------
+        min_wavelength : `~astropy.units.Quantity`
+            Minimum wavelength
+        max_wavelength : `~astropy.units.Quantity`
+            Maximum wavelength
+
+        Returns
+        -------
+        start, stop : int
+            Indices of the first wavelength in the range and one past the
+            last
+        """
+        start = np.searchsorted(self.wavelengths,
+                                u.Quantity(min_wavelength, u.Angstrom).value,
+                                side='right')
+        stop = np.searchsorted(self.wavelengths,
+                               u.Quantity(max_wavelength, u.Angstrom).value,
+                               side='left')
+        return int(start), int(max(start, stop))
+
+
+def _bracket(grid_values, value, name):
+    """
+    Grid points on either side of ``value`` in sorted ``grid_values``, with
+    their linear interpolation weights.
+    """
+    i = np.searchsorted(grid_values, value)
+    if i < len(grid_values) and grid_values[i] == value:
+        return [(grid_values[i], 1.0)]
+    if i == 0 or i == len(grid_values):
+        raise ValueError("{0}={1} is outside of the grid of models in the "
+                         "store: {2}".format(name, value, list(grid_values)))
+
+    lower, upper = grid_values[i - 1], grid_values[i]
+    weight = (value - lower) / (upper - lower)
+    return [(lower, 1 - weight), (upper, weight)]
+
+
+def get_phoenix_model_spectrum(T_eff, log_g=4.5, cache=True, grid=None,
+                               interpolate=False):
     """
     Download a PHOENIX model atmosphere spectrum for a star with given
     properties.
@@ -49,28 +616,32 @@ def get_phoenix_model_spectrum(T_eff, log_g=4.5, cache=True):
         nearest ``T_eff``.
     cache : bool
         Cache the result to the local astropy cache. Default is `True`.
+    grid : `~aesop.PhoenixGrid` (optional)
+        Read the model from this local store instead of downloading it.
+    interpolate : bool
+        Interpolate the models in ``grid`` to ``T_eff`` and ``log_g``
+        rather than using the nearest grid temperature.
 
     Returns
     -------
     spectrum : `~specutils.Spectrum1D`
         Model spectrum
     """
+    if grid is not None:
+        if interpolate:
+            return grid.interpolate(T_eff, log_g=log_g)
+        return grid.get(closest_grid_temperature(T_eff), log_g=log_g)
+
     url = get_url(T_eff=T_eff, log_g=log_g)
     fluxes_path = download_file(url, cache=cache, timeout=30)
     fluxes = fits.getdata(fluxes_path)
 
-    wavelength_url = ('ftp://phoenix.astro.physik.uni-goettingen.de/v2.0/HiResFITS/'
-                      'WAVE_PHOENIX-ACES-AGSS-COND-2011.fits')
     wavelength_path = download_file(wavelength_url, cache=cache, timeout=30)
     wavelengths_vacuum = fits.getdata(wavelength_path)
 
     # Wavelengths are provided at vacuum wavelengths. For ground-based
-    # observations convert this to wavelengths in air, as described in
-    # Husser 2013, Eqns. 8-10:
-    sigma_2 = (10**4 / wavelengths_vacuum)**2
-    f = (1.0 + 0.05792105/(238.0185 - sigma_2) + 0.00167917 /
-         (57.362 - sigma_2))
-    wavelengths_air = wavelengths_vacuum / f
+    # observations convert this to wavelengths in air
+    wavelengths_air = vacuum_to_air(wavelengths_vacuum)
 
     mask_negative_wavelengths = wavelengths_air > 0
 
@@ -81,4 +652,3 @@ def get_phoenix_model_spectrum(T_eff, log_g=4.5, cache=True):
                                      dispersion_unit=u.Angstrom)
 
     return spectrum
-
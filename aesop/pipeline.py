@@ -0,0 +1,226 @@
+"""
+Batch processing of many echelle spectra.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .spectra import EchelleSpectrum
+from .activity import uncalibrated_s_index, StarProps
+
+__all__ = ['Pipeline', 'PipelineStage', 'FrameResult', 'load_stage',
+           'normalize_stage', 'wavelength_shift_stage', 's_index_stage']
+
+
+class PipelineStage(object):
+    """
+    One named step of a `Pipeline`.
+
+    The stage function is called with the output of the previous stage (the
+    path to the FITS file, for the first stage) and the keyword arguments
+    given here, and returns the input of the next stage. Stage functions and
+    their arguments must be picklable to run in worker processes, so use
+    module-level functions.
+    """
+    def __init__(self, name, function, **kwargs):
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the stage, used in timing reports
+        function : callable
+            Stage function
+        kwargs
+            All other keyword arguments are passed to ``function``
+        """
+        self.name = name
+        self.function = function
+        self.kwargs = kwargs
+
+    def __call__(self, data):
+        return self.function(data, **self.kwargs)
+
+    def __repr__(self):
+        return "<PipelineStage: {0}>".format(self.name)
+
+
+class FrameResult(object):
+    """
+    Outcome of running a `Pipeline` on one FITS file.
+    """
+    def __init__(self, path, result=None, error=None, failed_stage=None,
+                 timings=None):
+        """
+        Parameters
+        ----------
+        path : str
+            Path to the FITS file
+        result : object
+            Output of the last stage, or `None` if a stage failed
+        error : str
+            Traceback of the exception raised by the failed stage
+        failed_stage : str
+            Name of the stage that raised an exception
+        timings : `~collections.OrderedDict`
+            Wall time in seconds spent in each completed stage
+        """
+        self.path = path
+        self.result = result
+        self.error = error
+        self.failed_stage = failed_stage
+        self.timings = timings if timings is not None else OrderedDict()
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = ('ok' if self.succeeded
+                  else 'failed in {0}'.format(self.failed_stage))
+        return "<FrameResult: {0} ({1})>".format(self.path, status)
+
+
+def _process_frame(stages, path):
+    """
+    Run every stage on one frame, recording timings and any failure.
+    """
+    frame_result = FrameResult(path)
+    data = path
+    for stage in stages:
+        start = time.time()
+        try:
+            data = stage(data)
+        except Exception:
+            frame_result.error = traceback.format_exc()
+            frame_result.failed_stage = stage.name
+            return frame_result
+        finally:
+            frame_result.timings[stage.name] = time.time() - start
+
+    frame_result.result = data
+    return frame_result
+
+
+class Pipeline(object):
+    """
+    Run a sequence of stages on many echelle spectra in parallel.
+
+    Each FITS file is processed independently in a pool of worker processes.
+    An exception in one frame is recorded in that frame's `FrameResult` and
+    does not stop the other frames.
+
+    Examples
+    --------
+    Normalize each frame with a saved `~aesop.BlazeSolution`, then measure
+    its S-index:
+
+    >>> from aesop import (BlazeSolution, Pipeline, PipelineStage, load_stage,
+    ...                    normalize_stage, s_index_stage)
+    >>> blaze_solution = BlazeSolution.load('blaze.npz')  # doctest: +SKIP
+    >>> pipeline = Pipeline([PipelineStage('load', load_stage),
+    ...                      PipelineStage('normalize', normalize_stage,
+    ...                                    blaze_solution=blaze_solution),
+    ...                      PipelineStage('s_index', s_index_stage)],
+    ...                     max_workers=4)  # doctest: +SKIP
+    >>> results = pipeline.run(paths)  # doctest: +SKIP
+    >>> stars = [r.result for r in results if r.succeeded]  # doctest: +SKIP
+    """
+    def __init__(self, stages, max_workers=None):
+        """
+        Parameters
+        ----------
+        stages : list of `PipelineStage`
+            Stages to run on each frame, in order
+        max_workers : int (optional)
+            Number of worker processes. Defaults to the number of CPUs. With
+            ``max_workers=1`` frames are processed in the current process.
+        """
+        self.stages = list(stages)
+        self.max_workers = max_workers
+
+    def run(self, paths):
+        """
+        Process each FITS file with every stage.
+
+        Parameters
+        ----------
+        paths : list of str
+            Paths to the FITS files, e.g. from `~aesop.glob_spectra_paths`
+
+        Returns
+        -------
+        results : list of `FrameResult`
+            One result per path, in the same order as ``paths``
+        """
+        process_frame = partial(_process_frame, self.stages)
+
+        if self.max_workers == 1:
+            return [process_frame(path) for path in paths]
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(process_frame, paths))
+
+    @staticmethod
+    def stage_timings(results):
+        """
+        Total wall time spent in each stage over many frames.
+
+        Parameters
+        ----------
+        results : list of `FrameResult`
+            Output of `Pipeline.run`
+
+        Returns
+        -------
+        timings : `~collections.OrderedDict`
+            Total seconds per stage name
+        """
+        timings = OrderedDict()
+        for frame_result in results:
+            for name, seconds in frame_result.timings.items():
+                timings[name] = timings.get(name, 0) + seconds
+        return timings
+
+
+def load_stage(path, packed=False):
+    """
+    Pipeline stage: load an `~aesop.EchelleSpectrum` from a FITS file.
+    """
+    return EchelleSpectrum.from_fits(path, packed=packed)
+
+
+def normalize_stage(spectrum, blaze_solution, polynomial_order=None):
+    """
+    Pipeline stage: remove the blaze function with a
+    `~aesop.BlazeSolution`, then optionally flatten the continuum with
+    `~aesop.EchelleSpectrum.continuum_normalize_lstsq`.
+    """
+    blaze_solution.apply(spectrum)
+    if polynomial_order is not None:
+        spectrum.continuum_normalize_lstsq(polynomial_order)
+    return spectrum
+
+
+def wavelength_shift_stage(spectrum, **kwargs):
+    """
+    Pipeline stage: shift each order to the rest frame with the wavelength
+    corrections of `~aesop.EchelleSpectrum.rv_wavelength_shift_ransac`.
+    Keyword arguments are passed to that method.
+    """
+    shifts = spectrum.rv_wavelength_shift_ransac(**kwargs)
+    spectrum.offset_wavelength_solution(shifts)
+    return spectrum
+
+
+def s_index_stage(spectrum):
+    """
+    Pipeline stage: measure the uncalibrated S-index of a normalized
+    spectrum, and return it as a `~aesop.StarProps`.
+    """
+    return StarProps(name=spectrum.name, s_apo=uncalibrated_s_index(spectrum),
+                     time=spectrum.time)
@@ -0,0 +1,267 @@
+"""
+Resample spectra onto a common wavelength grid with reusable sparse operators.
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+from scipy import sparse
+
+import astropy.units as u
+
+from .spectra import Spectrum1D
+
+__all__ = ['Resampler', 'rebinning_matrix', 'interpolation_matrix']
+
+
+def _pixel_edges(centers):
+    """
+    Edges of pixels with the given centers, halfway between neighbors.
+    """
+    if len(centers) < 2:
+        raise ValueError("Pixel edges need a grid of at least two "
+                         "wavelengths, got {0}.".format(len(centers)))
+    edges = np.empty(len(centers) + 1)
+    edges[1:-1] = 0.5 * (centers[1:] + centers[:-1])
+    edges[0] = 1.5 * centers[0] - 0.5 * centers[1]
+    edges[-1] = 1.5 * centers[-1] - 0.5 * centers[-2]
+    return edges
+
+
+def _increasing(wavelength):
+    """
+    Sort order of the wavelengths, or `None` if they are already increasing.
+    """
+    if np.all(np.diff(wavelength) > 0):
+        return None
+    return np.argsort(wavelength)
+
+
+def rebinning_matrix(source_wavelength, target_wavelength):
+    """
+    Flux-conserving rebinning operator between two wavelength grids.
+
+    Each target pixel is the mean flux density of the source pixels it
+    overlaps, weighted by the width of each overlap, so the integral of the
+    flux over any whole number of target pixels is conserved. Pixel edges are
+    halfway between neighboring wavelengths. Target pixels that only partly
+    overlap the source grid are the mean over the overlapping part, and
+    target pixels entirely outside of the source grid have empty rows. Both
+    grids need at least two wavelengths to define the pixel widths.
+
+    Parameters
+    ----------
+    source_wavelength : `~astropy.units.Quantity`
+        Wavelengths of the spectrum to resample
+    target_wavelength : `~astropy.units.Quantity`
+        Wavelengths to resample onto
+
+    Returns
+    -------
+    matrix : `~scipy.sparse.csr_matrix`
+        Operator with shape ``(n_target, n_source)``
+    """
+    source = u.Quantity(source_wavelength, u.Angstrom).value
+    target = u.Quantity(target_wavelength, u.Angstrom).value
+
+    source_sort = _increasing(source)
+    target_sort = _increasing(target)
+    if source_sort is not None:
+        source = source[source_sort]
+    if target_sort is not None:
+        target = target[target_sort]
+
+    source_edges = _pixel_edges(source)
+    target_edges = _pixel_edges(target)
+
+    # Range of source pixels overlapping each target pixel
+    first = np.clip(np.searchsorted(source_edges, target_edges[:-1],
+                                    side='right') - 1, 0, len(source) - 1)
+    last = np.clip(np.searchsorted(source_edges, target_edges[1:],
+                                   side='left') - 1, 0, len(source) - 1)
+    n_overlaps = np.clip(last - first + 1, 0, None)
+
+    rows = np.repeat(np.arange(len(target)), n_overlaps)
+    offsets = np.arange(n_overlaps.sum()) - np.repeat(np.cumsum(n_overlaps) -
+                                                      n_overlaps, n_overlaps)
+    columns = np.repeat(first, n_overlaps) + offsets
+
+    overlap = np.clip(np.minimum(source_edges[columns + 1],
+                                 target_edges[rows + 1]) -
+                      np.maximum(source_edges[columns], target_edges[rows]),
+                      0, None)
+    covered = np.bincount(rows, weights=overlap, minlength=len(target))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        data = overlap / covered[rows]
+
+    keep = overlap > 0
+    if source_sort is not None:
+        columns = source_sort[columns]
+    if target_sort is not None:
+        rows = target_sort[rows]
+
+    return sparse.csr_matrix((data[keep], (rows[keep], columns[keep])),
+                             shape=(len(target), len(source)))
+
+
+def interpolation_matrix(source_wavelength, target_wavelength):
+    """
+    Linear interpolation operator between two wavelength grids.
+
+    Like `~numpy.interp`, target wavelengths outside of the source grid get
+    the flux of the nearest end of the source grid.
+
+    Parameters
+    ----------
+    source_wavelength : `~astropy.units.Quantity`
+        Wavelengths of the spectrum to resample
+    target_wavelength : `~astropy.units.Quantity`
+        Wavelengths to resample onto
+
+    Returns
+    -------
+    matrix : `~scipy.sparse.csr_matrix`
+        Operator with shape ``(n_target, n_source)``
+    """
+    source = u.Quantity(source_wavelength, u.Angstrom).value
+    target = u.Quantity(target_wavelength, u.Angstrom).value
+
+    if len(source) < 2:
+        raise ValueError("Interpolation needs a source grid of at least two "
+                         "wavelengths, got {0}.".format(len(source)))
+
+    source_sort = _increasing(source)
+    if source_sort is not None:
+        source = source[source_sort]
+
+    left = np.clip(np.searchsorted(source, target, side='right') - 1, 0,
+                   len(source) - 2)
+    fraction = np.clip((target - source[left]) /
+                       (source[left + 1] - source[left]), 0, 1)
+
+    rows = np.repeat(np.arange(len(target)), 2)
+    columns = np.column_stack([left, left + 1]).ravel()
+    data = np.column_stack([1 - fraction, fraction]).ravel()
+    if source_sort is not None:
+        columns = source_sort[columns]
+
+    return sparse.csr_matrix((data, (rows, columns)),
+                             shape=(len(target), len(source)))
+
+
+class Resampler(object):
+    """
+    Resample fluxes from one wavelength grid onto another.
+
+    The resampling operator is a sparse matrix built once from the two
+    grids, so every frame that shares the source wavelength solution, or a
+    whole stack of them, is resampled with one sparse matrix multiplication.
+
+    Examples
+    --------
+    Rebin one order of every frame of a night onto a common grid:
+
+    >>> resampler = Resampler(spectra[0][40].wavelength,
+    ...                       common_wavelength)  # doctest: +SKIP
+    >>> fluxes = resampler(np.array([spectrum[40].flux.value
+    ...                              for spectrum in spectra]))  # doctest: +SKIP
+    """
+    def __init__(self, source_wavelength, target_wavelength, method='flux'):
+        """
+        Parameters
+        ----------
+        source_wavelength : `~astropy.units.Quantity`
+            Wavelengths of the spectra to resample
+        target_wavelength : `~astropy.units.Quantity`
+            Wavelengths to resample onto
+        method : {'flux', 'linear'}
+            Flux-conserving rebinning with `rebinning_matrix`, or linear
+            interpolation with `interpolation_matrix`
+        """
+        if method == 'flux':
+            self.matrix = rebinning_matrix(source_wavelength, target_wavelength)
+        elif method == 'linear':
+            self.matrix = interpolation_matrix(source_wavelength,
+                                               target_wavelength)
+        else:
+            raise ValueError("method must be 'flux' or 'linear', got "
+                             "{0}".format(method))
+
+        self.method = method
+        self.target_wavelength = u.Quantity(target_wavelength)
+
+        # Target pixels that no source pixel contributes to
+        self.uncovered = np.diff(self.matrix.indptr) == 0
+
+    @classmethod
+    def from_spectrum(cls, spectrum, target_wavelength, method='flux'):
+        """
+        Resampler from the wavelength grid of a spectrum.
+
+        Parameters
+        ----------
+        spectrum : `~aesop.Spectrum1D`
+            Spectrum with the source wavelength grid
+        target_wavelength : `~astropy.units.Quantity`
+            Wavelengths to resample onto
+        method : {'flux', 'linear'}
+            Resampling method
+        """
+        return cls(spectrum.wavelength, target_wavelength, method=method)
+
+    def __repr__(self):
+        return ("<Resampler ({0}): {1} to {2} pixels>"
+                .format(self.method, self.matrix.shape[1],
+                        self.matrix.shape[0]))
+
+    def __call__(self, flux, mask=None):
+        """
+        Resample fluxes onto the target grid.
+
+        Parameters
+        ----------
+        flux : `~numpy.ndarray`
+            Fluxes on the source grid, or a stack of them with shape
+            ``(n_spectra, n_source)``
+        mask : `~numpy.ndarray` (optional)
+            Boolean mask of the same shape as ``flux``, `True` for pixels to
+            ignore. The remaining contributions to each target pixel are
+            renormalized.
+
+        Returns
+        -------
+        resampled : `~numpy.ndarray`
+            Fluxes on the target grid, NaN where no source pixel contributes
+        """
+        flux = np.asarray(flux, dtype=float)
+
+        if mask is None:
+            resampled = self.matrix.dot(flux.T).T
+            resampled[..., self.uncovered] = np.nan
+            return resampled
+
+        weights = np.logical_not(mask).astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return (self.matrix.dot((flux * weights).T) /
+                    self.matrix.dot(weights.T)).T
+
+    def resample(self, spectrum):
+        """
+        Resample a spectrum onto the target grid.
+
+        Parameters
+        ----------
+        spectrum : `~aesop.Spectrum1D`
+            Spectrum on the source grid. Its mask is applied.
+
+        Returns
+        -------
+        resampled : `~aesop.Spectrum1D`
+            Spectrum on the target grid
+        """
+        flux = self(spectrum.flux.value, mask=spectrum.mask)
+        return Spectrum1D(wavelength=self.target_wavelength,
+                          flux=u.Quantity(flux, spectrum.flux.unit,
+                                          copy=False),
+                          mask=np.isnan(flux), meta=dict(),
+                          continuum_normalized=spectrum.continuum_normalized)
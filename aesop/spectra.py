@@ -9,8 +9,8 @@ import numpy as np
 from scipy.ndimage import gaussian_filter1d
 from scipy.optimize import least_squares
 from scipy.stats import binned_statistic
+from scipy.signal import fftconvolve
 
-from astropy.io import fits
 import astropy.units as u
 import astropy.constants as c
 from astropy.time import Time
@@ -22,8 +22,9 @@ from astropy.coordinates import SkyCoord, solar_system, EarthLocation
 
 from .legacy_specutils import read_fits_spectrum1d
 from .spectral_type import query_for_T_eff
-from .phoenix import get_phoenix_model_spectrum
-from .masking import get_spectrum_mask
+from .phoenix import get_phoenix_model_spectrum, closest_grid_temperature
+from .masking import get_spectrum_mask, get_spectrum_masks
+from .ccf import VelocityCCF, WavelengthShifts, robust_line_fit
 from .activity import true_h_centroid, true_k_centroid
 
 __all__ = ["EchelleSpectrum", "slice_spectrum", "interpolate_spectrum",
@@ -40,8 +41,12 @@ class Spectrum1D(object):
     If the spectrum is initialized with ``wavelength``s that are not strictly
     increasing, ``Spectrum1D`` will sort the ``wavelength``, ``flux`` and
     ``mask`` arrays so that ``wavelength`` is monotonically increasing.
+
+    Internally, wavelengths and fluxes are stored as float64 arrays with
+    separate units (``wavelength_unit`` and ``flux_unit``). The ``wavelength``
+    and ``flux`` attributes are `~astropy.units.Quantity` views onto those
+    arrays, so in-place changes to them are changes to the spectrum.
     """
-    @u.quantity_input(wavelength=u.Angstrom)
     def __init__(self, wavelength=None, flux=None, name=None, mask=None,
                  wcs=None, meta=dict(), time=None, continuum_normalized=None):
         """
@@ -62,9 +67,16 @@ class Spectrum1D(object):
         continuum_normalized : bool (optional)
             Is this spectrum continuum normalized?
         """
+        if not hasattr(wavelength, 'unit'):
+            raise TypeError("Argument 'wavelength' has no 'unit' attribute. "
+                            "You may want to pass in an astropy Quantity "
+                            "instead.")
+        if not wavelength.unit.is_equivalent(u.Angstrom):
+            raise u.UnitsError("Argument 'wavelength' must be in units "
+                               "convertible to 'Angstrom'.")
 
         # Are wavelengths stored in increasing order?
-        wl_inc = np.all(np.diff(wavelength) > 0)
+        wl_inc = np.all(np.diff(wavelength.value) > 0)
 
         # If not, force them to be, to simplify linear interpolation later.
         if not wl_inc:
@@ -75,8 +87,7 @@ class Spectrum1D(object):
                 mask = mask[wl_sort]
 
         self.wavelength = wavelength
-        self.wavelength_unit = wavelength.unit
-        self.flux = flux if hasattr(flux, 'unit') else u.Quantity(flux)
+        self.flux = flux
         self.name = name
         self.mask = mask
         self.wcs = wcs
@@ -173,18 +184,112 @@ class Spectrum1D(object):
             ax.set_title(self.name)
 
     @property
-    def masked_wavelength(self):
-        if self.mask is not None:
-            return self.wavelength[np.logical_not(self.mask)]
+    def wavelength(self):
+        return u.Quantity(self._wavelength, self.wavelength_unit, copy=False)
+
+    @wavelength.setter
+    def wavelength(self, wavelength):
+        if hasattr(wavelength, 'unit'):
+            self.wavelength_unit = wavelength.unit
+            wavelength = wavelength.value
+        self._wavelength = np.asarray(wavelength, dtype=np.float64)
+        self._masked_wavelength = None
+
+    @property
+    def flux(self):
+        return u.Quantity(self._flux, self.flux_unit, copy=False)
+
+    @flux.setter
+    def flux(self, flux):
+        if hasattr(flux, 'unit'):
+            self.flux_unit = flux.unit
+            self._flux = np.asarray(flux.value, dtype=np.float64)
         else:
+            # Copy plain arrays, like `~astropy.units.Quantity` does
+            self.flux_unit = u.dimensionless_unscaled
+            self._flux = np.array(flux, dtype=np.float64)
+        self._masked_flux = None
+
+    @property
+    def mask(self):
+        return self._mask
+
+    @mask.setter
+    def mask(self, mask):
+        self._mask = mask
+        self.reset_masked_views()
+
+    def reset_masked_views(self):
+        """
+        Discard the cached `~aesop.Spectrum1D.masked_wavelength` and
+        `~aesop.Spectrum1D.masked_flux`.
+
+        The caches are reset whenever ``wavelength``, ``flux`` or ``mask``
+        are assigned, so this is only needed after modifying those arrays in
+        place.
+        """
+        self._unmasked_indices = None
+        self._masked_wavelength = None
+        self._masked_flux = None
+
+    def _masked(self, array, unit):
+        if self._unmasked_indices is None:
+            self._unmasked_indices = np.flatnonzero(np.logical_not(self.mask))
+        masked = array[self._unmasked_indices]
+        masked.flags.writeable = False
+        return u.Quantity(masked, unit, copy=False)
+
+    @property
+    def masked_wavelength(self):
+        """
+        Unmasked wavelengths, computed once and cached as a read-only array.
+        """
+        if self.mask is None:
             return self.wavelength
+        if self._masked_wavelength is None:
+            self._masked_wavelength = self._masked(self._wavelength,
+                                                   self.wavelength_unit)
+        return self._masked_wavelength
 
     @property
     def masked_flux(self):
-        if self.mask is not None:
-            return self.flux[np.logical_not(self.mask)]
-        else:
+        """
+        Unmasked fluxes, computed once and cached as a read-only array.
+        """
+        if self.mask is None:
             return self.flux
+        if self._masked_flux is None:
+            self._masked_flux = self._masked(self._flux, self.flux_unit)
+        return self._masked_flux
+
+    @classmethod
+    def _from_values(cls, wavelength, flux, wavelength_unit,
+                     flux_unit=u.dimensionless_unscaled, mask=None, name=None,
+                     wcs=None, meta=None, time=None,
+                     continuum_normalized=None):
+        """
+        Fast constructor for trusted internal callers.
+
+        Skips unit validation and the check that the wavelengths are sorted:
+        ``wavelength`` and ``flux`` must be floating-point arrays, and
+        ``wavelength`` must be increasing. The arrays are stored without
+        copying or casting, so e.g. float32 views of a memory-mapped
+        `~aesop.PhoenixGrid` stay views.
+        """
+        spectrum = cls.__new__(cls)
+        spectrum._wavelength = wavelength
+        spectrum.wavelength_unit = wavelength_unit
+        spectrum._flux = flux
+        spectrum.flux_unit = flux_unit
+        spectrum._masked_wavelength = None
+        spectrum._masked_flux = None
+        spectrum.mask = mask
+        spectrum.name = name
+        spectrum.wcs = wcs
+        spectrum.meta = meta if meta is not None else dict()
+        spectrum.time = time
+        spectrum.continuum_normalized = continuum_normalized
+        return spectrum
 
     @classmethod
     def from_specutils(cls, spectrum1d, name=None, **kwargs):
@@ -282,9 +387,15 @@ class EchelleSpectrum(object):
     Echelle spectrum of one or more spectral orders.
 
     The spectral orders will be indexed in order of increasing wavelength.
+
+    If all orders have the same number of pixels, the spectrum can be
+    stored in packed form (see `EchelleSpectrum.pack`): the wavelengths,
+    fluxes and masks of every order live in contiguous ``(n_orders,
+    n_pixels)`` arrays, and each order in ``spectrum_list`` is a
+    `~aesop.Spectrum1D` whose arrays are views onto one row of those blocks.
     """
     def __init__(self, spectrum_list, header=None, name=None, fits_path=None,
-                 time=None):
+                 time=None, packed=False):
         """
         Parameters
         ----------
@@ -299,6 +410,8 @@ class EchelleSpectrum(object):
             Path where FITS file was opened from.
         time : `~astropy.time.Time` (optional)
             Time at which the spectrum was taken
+        packed : bool (optional)
+            Store the orders in contiguous arrays, see `EchelleSpectrum.pack`.
         """
         # Sort the spectra in the list in order of increasing wavelength
         self.spectrum_list = sorted(spectrum_list,
@@ -309,6 +422,15 @@ class EchelleSpectrum(object):
         self.standard_star_props = {}
         self.model_spectrum = None
 
+        self.wavelength_block = None
+        self.flux_block = None
+        self.mask_block = None
+        self.wavelength_unit = None
+        self.flux_unit = None
+
+        if packed:
+            self.pack()
+
         if header is not None and time is None:
             if 'JD' in header:
                 time = Time(header['JD'], format='jd')
@@ -318,21 +440,86 @@ class EchelleSpectrum(object):
         self.time = time
 
     @classmethod
-    def from_fits(cls, path):
+    def from_fits(cls, path, packed=False):
         """
         Load an echelle spectrum from a FITS file.
 
+        The file is opened once; the header read alongside the data is
+        reused rather than re-read from disk. Wavelength solutions for all
+        orders are evaluated together in a single vectorized pass.
+
         Parameters
         ----------
         path : str
             Path to the FITS file
+        packed : bool (optional)
+            Store the orders in contiguous arrays, see `EchelleSpectrum.pack`.
         """
-        spectrum_list = [Spectrum1D.from_specutils(s)
-                         for s in read_fits_spectrum1d(path)]
-        header = fits.getheader(path)
+        spectra, header = read_fits_spectrum1d(path, return_header=True,
+                                               vectorized_wcs=True)
+        spectrum_list = [Spectrum1D.from_specutils(s) for s in spectra]
 
         name = header.get('OBJNAME', None)
-        return cls(spectrum_list, header=header, name=name, fits_path=path)
+        return cls(spectrum_list, header=header, name=name, fits_path=path,
+                   packed=packed)
+
+    @property
+    def is_packed(self):
+        """
+        `True` if the orders are stored in contiguous arrays.
+        """
+        return self.flux_block is not None
+
+    def pack(self):
+        """
+        Store every order in contiguous ``(n_orders, n_pixels)`` arrays.
+
+        After packing, ``wavelength_block``, ``flux_block`` and ``mask_block``
+        hold the float64 wavelengths and fluxes (without units, see
+        ``wavelength_unit`` and ``flux_unit``) and the boolean masks of all
+        orders. The orders in ``spectrum_list`` are replaced with
+        `~aesop.Spectrum1D` objects whose ``wavelength``, ``flux`` and
+        ``mask`` are views onto one row of each block, so in-place changes to
+        an order and whole-spectrum array operations stay in sync.
+
+        Raises
+        ------
+        ValueError
+            If the orders do not all have the same number of pixels.
+        """
+        if len(set(len(s.wavelength) for s in self.spectrum_list)) != 1:
+            raise ValueError("Only echelle spectra with the same number of "
+                             "pixels in every order can be packed.")
+
+        self.wavelength_unit = self.spectrum_list[0].wavelength_unit
+        self.flux_unit = self.spectrum_list[0].flux.unit
+
+        self.wavelength_block = np.array(
+            [s.wavelength.to(self.wavelength_unit).value
+             for s in self.spectrum_list], dtype=np.float64)
+        self.flux_block = np.array([s.flux.to(self.flux_unit).value
+                                    for s in self.spectrum_list],
+                                   dtype=np.float64)
+        self.mask_block = np.zeros(self.flux_block.shape, dtype=bool)
+        for i, s in enumerate(self.spectrum_list):
+            if s.mask is not None:
+                self.mask_block[i] = s.mask
+
+        self.spectrum_list = [self._order_view(i, name=s.name, wcs=s.wcs,
+                                               meta=s.meta, time=s.time,
+                                               continuum_normalized=
+                                               s.continuum_normalized)
+                              for i, s in enumerate(self.spectrum_list)]
+
+    def _order_view(self, spectral_order, **kwargs):
+        """
+        `~aesop.Spectrum1D` backed by one row of the packed arrays.
+        """
+        return Spectrum1D._from_values(self.wavelength_block[spectral_order],
+                                       self.flux_block[spectral_order],
+                                       self.wavelength_unit, self.flux_unit,
+                                       mask=self.mask_block[spectral_order],
+                                       **kwargs)
 
     def get_order(self, order):
         """
@@ -375,13 +562,16 @@ class EchelleSpectrum(object):
             Best-fit polynomial coefficients
         """
         spectrum = self.get_order(spectral_order)
-        mean_wavelength = spectrum.wavelength.mean()
+        wavelength = spectrum._wavelength
+        mean_wavelength = wavelength.mean()
 
-        mask_wavelengths = ((abs(spectrum.wavelength - true_h_centroid) > 6.5*u.Angstrom) &
-                            (abs(spectrum.wavelength - true_k_centroid) > 6.5*u.Angstrom))
+        wavelength_unit = spectrum.wavelength_unit
+        hk_width = (6.5*u.Angstrom).to_value(wavelength_unit)
+        mask_wavelengths = ((np.abs(wavelength - true_h_centroid.to_value(wavelength_unit)) > hk_width) &
+                            (np.abs(wavelength - true_k_centroid.to_value(wavelength_unit)) > hk_width))
 
-        fit_params = np.polyfit(spectrum.wavelength[mask_wavelengths] - mean_wavelength,
-                                spectrum.flux[mask_wavelengths], polynomial_order)
+        fit_params = np.polyfit(wavelength[mask_wavelengths] - mean_wavelength,
+                                spectrum._flux[mask_wavelengths], polynomial_order)
 
         if plots:
             plt.figure()
@@ -389,8 +579,7 @@ class EchelleSpectrum(object):
             plt.plot(spectrum.wavelength[mask_wavelengths],
                      spectrum.flux[mask_wavelengths])
             plt.plot(spectrum.wavelength,
-                     np.polyval(fit_params,
-                                spectrum.wavelength - mean_wavelength))
+                     np.polyval(fit_params, wavelength - mean_wavelength))
             plt.xlabel('Wavelength [{0}]'.format(spectrum.wavelength_unit))
             plt.ylabel('Flux')
             plt.show()
@@ -414,14 +603,157 @@ class EchelleSpectrum(object):
             Predicted flux in the continuum for this order
         """
         spectrum = self.get_order(spectral_order)
-        mean_wavelength = spectrum.wavelength.mean()
-        flux_fit = np.polyval(fit_params, 
-                              spectrum.wavelength - mean_wavelength)
+        wavelength = spectrum._wavelength
+        flux_fit = np.polyval(fit_params, wavelength - wavelength.mean())
         return flux_fit
 
+    def _stack_orders(self, only_orders):
+        """
+        Wavelengths and fluxes of several orders as ``(n_orders, n_pixels)``
+        arrays, in the units of the first order.
+        """
+        only_orders = list(only_orders)
+        if self.is_packed:
+            return (self.wavelength_block[only_orders],
+                    self.flux_block[only_orders])
+
+        orders = [self.get_order(i) for i in only_orders]
+        if len(set(len(s.wavelength) for s in orders)) > 1:
+            raise ValueError("Orders must have the same number of pixels to "
+                             "be processed together.")
+        wavelength_unit = orders[0].wavelength_unit
+        flux_unit = orders[0].flux_unit
+        wavelengths = np.array([s._wavelength
+                                if s.wavelength_unit == wavelength_unit
+                                else s.wavelength.to_value(wavelength_unit)
+                                for s in orders])
+        fluxes = np.array([s._flux if s.flux_unit == flux_unit
+                           else s.flux.to_value(flux_unit) for s in orders])
+        return wavelengths, fluxes
+
+    def fit_orders(self, polynomial_order, only_orders=None):
+        """
+        Fit several spectral orders with polynomials in one least-squares
+        solve.
+
+        Equivalent to calling `EchelleSpectrum.fit_order` on each order: the
+        fluxes near the CaII H & K wavelengths are ignored, and the
+        polynomials are functions of the wavelength minus the mean wavelength
+        of each order. All orders must have the same number of pixels.
+
+        Parameters
+        ----------
+        polynomial_order : int
+            Polynomial order
+        only_orders : `~numpy.ndarray` (optional)
+            Only fit these echelle orders.
+
+        Returns
+        -------
+        fit_params : `~numpy.ndarray`
+            Best-fit polynomial coefficients, one row per order, highest
+            power first (as in `~numpy.polyfit`).
+        """
+        if only_orders is None:
+            only_orders = range(len(self.spectrum_list))
+        only_orders = list(only_orders)
+
+        wavelengths, fluxes = self._stack_orders(only_orders)
+        wavelength_unit = self.get_order(only_orders[0]).wavelength.unit
+        h_centroid = true_h_centroid.to(wavelength_unit).value
+        k_centroid = true_k_centroid.to(wavelength_unit).value
+        hk_width = (6.5*u.Angstrom).to(wavelength_unit).value
+
+        weights = ((np.abs(wavelengths - h_centroid) > hk_width) &
+                   (np.abs(wavelengths - k_centroid) > hk_width)).astype(float)
+
+        x = wavelengths - wavelengths.mean(axis=1)[:, np.newaxis]
+
+        # Scale each order onto [-1, 1] to keep the normal equations well
+        # conditioned. The normal equations of a polynomial fit only depend on
+        # power sums of the (shared) Vandermonde basis, which are accumulated
+        # for all orders at once: lhs[n, i, j] = sum(w * x**(i + j)).
+        scale = np.abs(x).max(axis=1)[:, np.newaxis]
+        scaled_x = x / scale
+        n_terms = polynomial_order + 1
+
+        power_sums = np.empty((len(x), 2 * n_terms - 1))
+        moments = np.empty((len(x), n_terms))
+        term = weights
+        for k in range(2 * n_terms - 1):
+            power_sums[:, k] = term.sum(axis=1)
+            if k < n_terms:
+                moments[:, k] = np.einsum('nm,nm->n', term, fluxes)
+            np.multiply(term, scaled_x, out=term)
+
+        powers = np.arange(n_terms)
+        lhs = power_sums[:, powers[:, np.newaxis] + powers]
+        scaled_fit_params = np.linalg.solve(lhs, moments[..., np.newaxis])[..., 0]
+
+        # Undo the scaling, and return the highest power first like polyfit
+        return (scaled_fit_params / scale ** powers)[:, ::-1]
+
+    def predict_continua(self, fit_params, only_orders=None,
+                         mean_wavelengths=None):
+        """
+        Predict continuum spectra of several orders given results from
+        `EchelleSpectrum.fit_orders`.
+
+        Parameters
+        ----------
+        fit_params : `~numpy.ndarray`
+            Best-fit polynomial coefficients, one row per order
+        only_orders : `~numpy.ndarray` (optional)
+            Echelle orders corresponding to the rows of ``fit_params``.
+        mean_wavelengths : `~numpy.ndarray` (optional)
+            Wavelengths subtracted before evaluating the polynomial of each
+            order. Defaults to the mean wavelength of each order.
+
+        Returns
+        -------
+        flux_fit : `~numpy.ndarray`
+            Predicted flux in the continuum, shape ``(n_orders, n_pixels)``
+        """
+        if only_orders is None:
+            only_orders = range(len(self.spectrum_list))
+
+        wavelengths = self._stack_orders(only_orders)[0]
+        if mean_wavelengths is None:
+            mean_wavelengths = wavelengths.mean(axis=1)
+        x = wavelengths - np.asarray(mean_wavelengths)[:, np.newaxis]
+
+        return _polyval_rows(fit_params, x)
+
+    def _replace_normalized_order(self, spectral_order, normalized_flux, mask,
+                                  normalization):
+        """
+        Replace one order with its continuum-normalized spectrum.
+        """
+        target_order = self.get_order(spectral_order)
+
+        if self.is_packed:
+            self.flux_block[spectral_order] = normalized_flux.to(self.flux_unit).value
+            self.mask_block[spectral_order] = mask
+            normalized_target_spectrum = self._order_view(spectral_order,
+                                                          wcs=target_order.wcs,
+                                                          meta=dict(),
+                                                          continuum_normalized=True)
+        else:
+            normalized_flux = u.Quantity(normalized_flux)
+            normalized_target_spectrum = Spectrum1D._from_values(
+                target_order._wavelength,
+                np.asarray(normalized_flux.value, dtype=np.float64),
+                target_order.wavelength_unit, normalized_flux.unit,
+                wcs=target_order.wcs, mask=mask, continuum_normalized=True)
+        normalized_target_spectrum.meta['normalization'] = normalization
+
+        # Replace this order's spectrum with the continuum-normalized one
+        self.spectrum_list[spectral_order] = normalized_target_spectrum
+
     def continuum_normalize_from_standard(self, standard_spectrum,
                                           polynomial_order, only_orders=None,
-                                          plot_masking=False, plot_fit=False):
+                                          plot_masking=False, plot_fit=False,
+                                          batched=False):
         """
         Normalize the spectrum by a polynomial fit to the standard's
         spectrum.
@@ -437,7 +769,12 @@ class EchelleSpectrum(object):
         plot_masking : bool
             Plot the masked-out low S/N regions
         plot_fit : bool
-            Plot the polynomial fit to the standard star spectrum
+            Plot the polynomial fit to the standard star spectrum (ignored
+            when ``batched`` is `True`)
+        batched : bool
+            Fit the polynomials of all orders in one least-squares solve with
+            `EchelleSpectrum.fit_orders`, and normalize all orders with one
+            division. Requires the same number of pixels in every order.
         """
 
         # Copy some attributes of the standard star's EchelleSpectrum object into
@@ -449,6 +786,26 @@ class EchelleSpectrum(object):
         if only_orders is None:
             only_orders = range(len(self.spectrum_list))
 
+        if batched:
+            only_orders = list(only_orders)
+            target_masks = get_spectrum_masks(*standard_spectrum._stack_orders(only_orders),
+                                              plot=plot_masking)
+            fit_params = standard_spectrum.fit_orders(polynomial_order,
+                                                      only_orders=only_orders)
+            target_continuum_fits = self.predict_continua(fit_params,
+                                                          only_orders=only_orders)
+
+            target_fluxes = self._stack_orders(only_orders)[1]
+            normalized_fluxes = target_fluxes / target_continuum_fits
+
+            for i, spectral_order in enumerate(only_orders):
+                flux_unit = self.get_order(spectral_order).flux.unit
+                self._replace_normalized_order(spectral_order,
+                                               normalized_fluxes[i] * flux_unit,
+                                               target_masks[i],
+                                               target_continuum_fits[i])
+            return
+
         for spectral_order in only_orders:
             # Extract one spectral order at a time to normalize
             standard_order = standard_spectrum.get_order(spectral_order)
@@ -468,17 +825,13 @@ class EchelleSpectrum(object):
             target_continuum_fit = self.predict_continuum(spectral_order,
                                                           fit_params)
 
-            target_continuum_normalized_flux = target_order.flux / target_continuum_fit
+            target_continuum_normalized_flux = (target_order._flux /
+                                                target_continuum_fit *
+                                                target_order.flux_unit)
 
-            normalized_target_spectrum = Spectrum1D(wavelength=target_order.wavelength,
-                                                    flux=target_continuum_normalized_flux,
-                                                    wcs=target_order.wcs,
-                                                    mask=target_mask,
-                                                    continuum_normalized=True)
-            normalized_target_spectrum.meta['normalization'] = target_continuum_fit
-
-            # Replace this order's spectrum with the continuum-normalized one
-            self.spectrum_list[spectral_order] = normalized_target_spectrum
+            self._replace_normalized_order(spectral_order,
+                                           target_continuum_normalized_flux,
+                                           target_mask, target_continuum_fit)
 
     def continuum_normalize_lstsq(self, polynomial_order, only_orders=None,
                                   plot=False, fscale_mad_factor=0.2):
@@ -509,9 +862,9 @@ class EchelleSpectrum(object):
             s = self.get_order(spectral_order)
 
             x0 = np.concatenate([np.zeros(polynomial_order),
-                                 [s.flux.value.mean()]])
-            fscale = fscale_mad_factor * mad_std(s.flux.value)
-            args = (s.wavelength.value, s.flux.value)
+                                 [s._flux.mean()]])
+            fscale = fscale_mad_factor * mad_std(s._flux)
+            args = (s._wavelength, s._flux)
             res_lsq = least_squares(_residuals, x0, args=args)
 
             model_simple = _poly_model(res_lsq.x, args[0])
@@ -521,16 +874,8 @@ class EchelleSpectrum(object):
 
             model_robust = _poly_model(res_robust.x, args[0])
 
-            target_continuum_normalized_flux = s.flux / model_robust
-
-            normalized_target_spectrum = Spectrum1D(wavelength=s.wavelength,
-                                                    flux=target_continuum_normalized_flux,
-                                                    wcs=s.wcs, mask=s.mask,
-                                                    continuum_normalized=True)
-
-            # Replace this order's spectrum with the continuum-normalized one
-            self.spectrum_list[spectral_order] = normalized_target_spectrum
-
+            # Plot before the normalized flux is written back, which in packed
+            # mode overwrites the flux of ``s``
             if plot:
                 fig, ax = plt.subplots(1, 2, figsize=(10, 4))
 
@@ -545,6 +890,24 @@ class EchelleSpectrum(object):
                 ax[1].set_title('continuum normalized (robust polynomial)')
                 ax[1].plot(s.wavelength, s.flux.value/model_robust, color='k')
 
+            target_continuum_normalized_flux = s._flux / model_robust
+
+            if self.is_packed:
+                self.flux_block[spectral_order] = (
+                    target_continuum_normalized_flux *
+                    s.flux_unit.to(self.flux_unit))
+                normalized_target_spectrum = self._order_view(spectral_order,
+                                                              wcs=s.wcs,
+                                                              continuum_normalized=True)
+            else:
+                normalized_target_spectrum = Spectrum1D._from_values(
+                    s._wavelength, target_continuum_normalized_flux,
+                    s.wavelength_unit, s.flux_unit, wcs=s.wcs, mask=s.mask,
+                    continuum_normalized=True)
+
+            # Replace this order's spectrum with the continuum-normalized one
+            self.spectrum_list[spectral_order] = normalized_target_spectrum
+
     def offset_wavelength_solution(self, wavelength_offset):
         """
         Offset the wavelengths by a constant amount in each order.
@@ -557,7 +920,15 @@ class EchelleSpectrum(object):
             otherwise a single ``wavelength_offset`` will be applied to every
             order.
         """
-        if hasattr(wavelength_offset, '__len__'):
+        if self.is_packed:
+            offset = np.asarray(u.Quantity(wavelength_offset)
+                                .to(self.wavelength_unit).value)
+            if offset.ndim > 0:
+                offset = offset[:, np.newaxis]
+            self.wavelength_block += offset
+            for spectrum in self.spectrum_list:
+                spectrum.reset_masked_views()
+        elif np.ndim(wavelength_offset) > 0:
             for spectrum, offset in zip(self.spectrum_list, wavelength_offset):
                 spectrum.wavelength += offset
         else:
@@ -565,7 +936,8 @@ class EchelleSpectrum(object):
             for spectrum in self.spectrum_list:
                 spectrum.wavelength += wavelength_offset
 
-    def rv_wavelength_shift(self, spectral_order, T_eff=None, plot=False):
+    def rv_wavelength_shift(self, spectral_order, T_eff=None, plot=False,
+                            grid=None, resolution=None, v_sin_i=None):
         """
         Solve for the radial velocity wavelength shift.
 
@@ -573,25 +945,55 @@ class EchelleSpectrum(object):
         ----------
         spectral_order : int
             Echelle spectrum order to shift
+        T_eff : int (optional)
+            Effective temperature of the PHOENIX model atmosphere. Defaults
+            to the effective temperature of the star, from SIMBAD.
+        plot : bool
+            Plot the shifted spectrum and the model
+        grid : `~aesop.PhoenixGrid` (optional)
+            Read only the wavelength range of the order from the model in
+            this local store, rather than loading the full model spectrum.
+        resolution : float (optional)
+            Cross-correlate with the model from ``grid`` pre-broadened to this
+            resolving power (e.g. 31500 for ARCES) instead of smoothing the
+            model on every call. See `~aesop.PhoenixGrid.fluxes`.
+        v_sin_i : `~astropy.units.Quantity` (optional)
+            Also broaden the model from ``grid`` by this projected rotational
+            velocity.
         """
         order = self.spectrum_list[spectral_order]
 
-        if self.model_spectrum is None:
+        if grid is not None:
             if T_eff is None:
                 T_eff = query_for_T_eff(self.name)
-            self.model_spectrum = get_phoenix_model_spectrum(T_eff)
-
-        model_slice = slice_spectrum(self.model_spectrum,
-                                     order.masked_wavelength.min(),
-                                     order.masked_wavelength.max(),
-                                     norm=order.masked_flux.max())
-
-        delta_lambda_obs = np.abs(np.diff(order.wavelength.value[0:2]))[0]
-        delta_lambda_model = np.abs(np.diff(model_slice.wavelength.value[0:2]))[0]
-        smoothing_kernel_width = delta_lambda_obs/delta_lambda_model
+            model_slice = grid.window(closest_grid_temperature(T_eff),
+                                      order.masked_wavelength.min(),
+                                      order.masked_wavelength.max(),
+                                      norm=order.masked_flux.max(),
+                                      resolution=resolution, v_sin_i=v_sin_i)
+        else:
+            if self.model_spectrum is None:
+                if T_eff is None:
+                    T_eff = query_for_T_eff(self.name)
+                self.model_spectrum = get_phoenix_model_spectrum(T_eff)
+
+            model_slice = slice_spectrum(self.model_spectrum,
+                                         order.masked_wavelength.min(),
+                                         order.masked_wavelength.max(),
+                                         norm=order.masked_flux.max())
+
+        if grid is not None and (resolution is not None or
+                                 v_sin_i is not None):
+            # The model is already broadened
+            smoothing_kernel_width = None
+        else:
+            delta_lambda_obs = np.abs(np.diff(order.wavelength.value[0:2]))[0]
+            delta_lambda_model = np.abs(np.diff(model_slice.wavelength.value[0:2]))[0]
+            smoothing_kernel_width = delta_lambda_obs/delta_lambda_model
 
         interp_target_slice = interpolate_spectrum(order,
-                                                   model_slice.wavelength)
+                                                   model_slice.wavelength,
+                                                   assume_sorted=True)
 
         rv_shift = cross_corr(interp_target_slice, model_slice,
                               kernel_width=smoothing_kernel_width)
@@ -606,7 +1008,9 @@ class EchelleSpectrum(object):
             #          gaussian_filter1d(model_slice.flux, smoothing_kernel_width),
             #          label='smoothed model')
             plt.plot(model_slice.wavelength,
-                     gaussian_filter1d(model_slice.flux, smoothing_kernel_width),
+                     gaussian_filter1d(model_slice.flux, smoothing_kernel_width)
+                     if smoothing_kernel_width is not None
+                     else model_slice.flux,
                      label='smooth model')
 
             plt.legend()
@@ -614,6 +1018,42 @@ class EchelleSpectrum(object):
 
         return rv_shift
     
+    def rv_velocity_shifts(self, T_eff=None, velocity_ccf=None,
+                           only_orders=None):
+        """
+        Solve for the radial velocity of each order by cross-correlating with
+        a PHOENIX model in log-wavelength space.
+
+        Parameters
+        ----------
+        T_eff : int (optional)
+            Effective temperature of the PHOENIX model atmosphere to use if
+            no ``velocity_ccf`` is given. Defaults to the effective
+            temperature of the star, from SIMBAD.
+        velocity_ccf : `~aesop.VelocityCCF` (optional)
+            Precomputed template to cross-correlate with. Reusing one
+            ``VelocityCCF`` for many spectra avoids resampling and
+            transforming the template again.
+        only_orders : `~numpy.ndarray` (optional)
+            Echelle orders matching the grids of ``velocity_ccf``. Defaults
+            to the orders ``velocity_ccf`` was set up for, or every order.
+
+        Returns
+        -------
+        velocities : `~astropy.units.Quantity`
+            Radial velocity of each order, positive for redshifts
+        """
+        if velocity_ccf is None:
+            if self.model_spectrum is None:
+                if T_eff is None:
+                    T_eff = query_for_T_eff(self.name)
+                self.model_spectrum = get_phoenix_model_spectrum(T_eff)
+
+            velocity_ccf = VelocityCCF.from_echelle_spectrum(
+                self.model_spectrum, self, only_orders=only_orders)
+
+        return velocity_ccf.velocity_shifts(self, only_orders=only_orders)
+
     def barycentric_correction(self, time=None, skycoord=None, location=None):
         
         """
@@ -697,19 +1137,104 @@ class EchelleSpectrum(object):
         #Velocity of earth, to be added directly to wavelength. So + should result in a redshift
         redshift = barycentric_velocity/c.c 
         
-        for spectrum in self.spectrum_list:
-            spectrum.wavelength *= (1.0 + redshift)
+        if self.is_packed:
+            self.wavelength_block *= (1.0 + redshift).to(u.dimensionless_unscaled).value
+            for spectrum in self.spectrum_list:
+                spectrum.reset_masked_views()
+        else:
+            for spectrum in self.spectrum_list:
+                spectrum.wavelength *= (1.0 + redshift)
             
         return barycentric_velocity
         
 
+    def solve_wavelength_shifts(self, min_order=10, max_order=45,
+                                T_eff=4700, grid=None, velocity_ccf=None,
+                                max_velocity=200*u.km/u.s):
+        """
+        Solve for the radial velocity wavelength shift of every order at
+        once, then fit a line to the wavelength correction between orders
+        ``min_order`` and ``max_order``, rejecting outliers.
+
+        All orders are cross-correlated with the template in one batch with a
+        `~aesop.VelocityCCF`, and the line is fit with
+        `~aesop.robust_line_fit`.
+
+        Parameters
+        ----------
+        min_order : int
+            Index of the bluest order to fit in the wavelength correction
+        max_order : int
+            Index of the reddest order to fit in the wavelength correction
+        T_eff : int
+            Effective temperature of the PHOENIX model atmosphere to use in
+            the cross-correlation.
+        grid : `~aesop.PhoenixGrid` (optional)
+            Read only the wavelength range of the echelle spectrum from the
+            model in this local store.
+        velocity_ccf : `~aesop.VelocityCCF` (optional)
+            Precomputed template for every order. Reusing one
+            ``VelocityCCF`` for many spectra from the same instrument setup
+            skips the template setup.
+        max_velocity : `~astropy.units.Quantity`
+            Largest absolute velocity to search, if no ``velocity_ccf`` is
+            given
+
+        Returns
+        -------
+        shifts : `~aesop.WavelengthShifts`
+            Measured and fit wavelength corrections, with diagnostics
+        """
+        if velocity_ccf is None:
+            if grid is not None:
+                min_wavelength = min(order.masked_wavelength.min()
+                                     for order in self.spectrum_list)
+                max_wavelength = max(order.masked_wavelength.max()
+                                     for order in self.spectrum_list)
+                margin = 1.01 * (max_velocity / c.c).decompose().value
+                template = grid.window(closest_grid_temperature(T_eff),
+                                       min_wavelength * (1 - margin),
+                                       max_wavelength * (1 + margin))
+            else:
+                if self.model_spectrum is None:
+                    self.model_spectrum = get_phoenix_model_spectrum(T_eff)
+                template = self.model_spectrum
+
+            velocity_ccf = VelocityCCF.from_echelle_spectrum(
+                template, self, max_velocity=max_velocity)
+
+        # The rows of the cross-correlation are the orders velocity_ccf was
+        # set up for, which need not be 0, 1, ..., n - 1
+        orders = velocity_ccf.orders
+        velocities = velocity_ccf.velocity_shifts(self, only_orders=orders)
+
+        # The constant wavelength offset that moves each order to the rest
+        # frame, at the center of the order
+        centers = u.Quantity([0.5 * (self.get_order(i).wavelength.min() +
+                                     self.get_order(i).wavelength.max())
+                              for i in orders])
+        order_shifts = (-centers * velocities / (c.c + velocities)
+                        ).to(u.Angstrom)
+
+        in_fit = (orders >= min_order) & (orders < max_order)
+        fit_orders = orders[in_fit]
+        slope, intercept, inliers = robust_line_fit(
+            fit_orders, order_shifts.value[in_fit])
+
+        return WavelengthShifts(velocities, order_shifts, fit_orders,
+                                slope * u.Angstrom, intercept * u.Angstrom,
+                                inliers, orders=orders)
+
     def rv_wavelength_shift_ransac(self, min_order=10, max_order=45,
-                                   T_eff=4700):
+                                   T_eff=4700, grid=None, velocity_ccf=None):
         """
         Solve for the radial velocity wavelength shift of every order in the
         echelle spectrum, then do a RANSAC (outlier rejecting) linear fit to the
         wavelength correction between orders ``min_order`` and ``max_order``.
 
+        See `~aesop.EchelleSpectrum.solve_wavelength_shifts`, which also
+        returns the per-order measurements and the inliers of the fit.
+
         Parameters
         ----------
         min_order : int
@@ -719,23 +1244,21 @@ class EchelleSpectrum(object):
         T_eff : int
             Effective temperature of the PHOENIX model atmosphere to use in
             the cross-correlation.
+        grid : `~aesop.PhoenixGrid` (optional)
+            Read the PHOENIX model from this local store.
+        velocity_ccf : `~aesop.VelocityCCF` (optional)
+            Precomputed template for every order
 
         Returns
         -------
         wl : `~astropy.units.Quantity`
             Wavelength corrections for each order.
         """
-        from sklearn import linear_model
-
-        rv_shifts = u.Quantity([self.rv_wavelength_shift(order, T_eff=T_eff)
-                                for order in range(len(self.spectrum_list))])
-        X = np.arange(len(rv_shifts))[min_order:max_order, np.newaxis]
-        y = rv_shifts.value[min_order:max_order]
-
-        ransac = linear_model.RANSACRegressor()
-        ransac.fit(X, y)
-        line_y_ransac = ransac.predict(np.arange(len(rv_shifts))[:, np.newaxis])
-        return line_y_ransac*u.Angstrom
+        return self.solve_wavelength_shifts(min_order=min_order,
+                                            max_order=max_order, T_eff=T_eff,
+                                            grid=grid,
+                                            velocity_ccf=velocity_ccf
+                                            ).fit_shifts
 
     def __repr__(self):
         wl_unit = u.Angstrom
@@ -750,78 +1273,101 @@ class EchelleSpectrum(object):
         """
         Convert this echelle spectrum into a simple 1D spectrum.
 
-        In wavelength regions where two spectral orders overlap, take the mean
-        of the overlapping region.
-
-        Parameters
-        ----------
-        mad_outlier_factor : float
-            Mask positive outliers ``max_outlier_factor`` times the median
-            absolute deviation plus the median of the fluxes.
+        In wavelength regions where two spectral orders overlap, both orders
+        are interpolated onto a common wavelength grid and averaged, weighted
+        by their inverse variances. For continuum-normalized orders, the
+        variance of the normalized flux is taken to scale inversely with the
+        continuum normalization (the blaze function) stored in
+        ``meta['normalization']``; otherwise the overlapping orders get equal
+        weights.
 
         Returns
         -------
         spectrum : `~aesop.Spectrum1D`
             Simple 1D spectrum.
         """
-        nonoverlapping_wavelengths = []
-        nonoverlapping_fluxes = []
-        dispersion_unit = None
-
+        dispersion_unit = self.spectrum_list[0].wavelength.unit
+
+        # Extract the unmasked pixels of each order once
+        wavelengths, fluxes, weights = [], [], []
+        for order in self.spectrum_list:
+            keep = (np.logical_not(order.mask) if order.mask is not None
+                    else slice(None))
+            wavelengths.append(order.wavelength.to_value(dispersion_unit)[keep])
+            fluxes.append(np.asarray(order.flux.value)[keep])
+            normalization = order.meta.get('normalization')
+            weights.append(np.asarray(normalization)[keep]
+                           if normalization is not None else None)
+
+        min_wavelengths = [wavelength.min() for wavelength in wavelengths]
+        max_wavelengths = [wavelength.max() for wavelength in wavelengths]
+
+        # Counting pass: the non-overlapping pixels of each order, and the
+        # length of the common grid in the overlap with the next order
+        segments = []
+        n_total = 0
         for i in range(1, len(self.spectrum_list) - 1):
-            current_order = self.spectrum_list[i]
-
-            previous_order = self.spectrum_list[i-1]
-
-            next_order = self.spectrum_list[i+1]
-
-            previous_max = previous_order.masked_wavelength.max()
-            current_min = current_order.masked_wavelength.min()
-            current_max = current_order.masked_wavelength.max()
-            next_min = next_order.masked_wavelength.min()
-
-            # Find the non-overlapping parts of each order, and add them to the
-            # non-overlapping list
-            nonoverlapping = ((current_order.masked_wavelength > previous_max) &
-                              (current_order.masked_wavelength < next_min))
-
-            if dispersion_unit is None:
-                dispersion_unit = current_order.masked_wavelength[0].unit
-
-            nonoverlapping_wavelengths.append(current_order.masked_wavelength[nonoverlapping].value)
-            nonoverlapping_fluxes.append(current_order.masked_flux[nonoverlapping].value)
-
-            current_overlapping = current_order.masked_wavelength > next_min
-            next_overlapping = next_order.masked_wavelength < current_max
-
-            # Does this order overlap with the next order?
-            if np.count_nonzero(current_overlapping) > 0:
-                # Find the overlapping parts between each order and the next order, and take
-                # the mean of the two in the overlapping wavelength region, after interpolating
-                # onto a common wavelength grid
-
-                ol_wl_min = current_order.masked_wavelength[current_overlapping].min()
-                ol_wl_max = current_order.masked_wavelength[current_overlapping].max()
-                n_wl = 0.5 * (np.count_nonzero(current_overlapping) + np.count_nonzero(next_overlapping))
-
-                common_wavelength_grid = np.linspace(ol_wl_min.value, ol_wl_max.value, int(n_wl))
-                current_overlap_interp = np.interp(common_wavelength_grid,
-                                                   current_order.masked_wavelength[current_overlapping].value,
-                                                   current_order.masked_flux[current_overlapping].value)
-                next_overlap_interp = np.interp(common_wavelength_grid,
-                                                next_order.masked_wavelength[next_overlapping].value,
-                                                next_order.masked_flux[next_overlapping].value)
-
-                nonoverlapping_wavelengths.append(common_wavelength_grid)
-                nonoverlapping_fluxes.append(np.mean([current_overlap_interp, next_overlap_interp], axis=0))
-
-        nonoverlapping_fluxes = np.concatenate(nonoverlapping_fluxes)
-        nonoverlapping_wavelengths = (np.concatenate(nonoverlapping_wavelengths)
-                                      * dispersion_unit)
-
-        return Spectrum1D(wavelength=nonoverlapping_wavelengths,
-                          flux=nonoverlapping_fluxes, continuum_normalized=True,
-                          mask=np.zeros_like(nonoverlapping_fluxes).astype(bool),
+            wavelength = wavelengths[i]
+            nonoverlapping = ((wavelength > max_wavelengths[i - 1]) &
+                              (wavelength < min_wavelengths[i + 1]))
+            current_overlapping = wavelength > min_wavelengths[i + 1]
+            next_overlapping = wavelengths[i + 1] < max_wavelengths[i]
+
+            n_nonoverlapping = np.count_nonzero(nonoverlapping)
+            n_current = np.count_nonzero(current_overlapping)
+            n_overlapping = (int(0.5 * (n_current +
+                                        np.count_nonzero(next_overlapping)))
+                             if n_current > 0 else 0)
+
+            segments.append((i, nonoverlapping, n_nonoverlapping,
+                             current_overlapping, next_overlapping,
+                             n_overlapping))
+            n_total += n_nonoverlapping + n_overlapping
+
+        stitched_wavelength = np.empty(n_total)
+        stitched_flux = np.empty(n_total)
+
+        # Fill pass
+        start = 0
+        for (i, nonoverlapping, n_nonoverlapping, current_overlapping,
+             next_overlapping, n_overlapping) in segments:
+            stop = start + n_nonoverlapping
+            stitched_wavelength[start:stop] = wavelengths[i][nonoverlapping]
+            stitched_flux[start:stop] = fluxes[i][nonoverlapping]
+            start = stop
+
+            if n_overlapping == 0:
+                continue
+
+            stop = start + n_overlapping
+            current_wavelength = wavelengths[i][current_overlapping]
+            next_wavelength = wavelengths[i + 1][next_overlapping]
+            grid = stitched_wavelength[start:stop]
+            grid[:] = np.linspace(current_wavelength.min(),
+                                  current_wavelength.max(), n_overlapping)
+
+            current_flux = np.interp(grid, current_wavelength,
+                                     fluxes[i][current_overlapping])
+            next_flux = np.interp(grid, next_wavelength,
+                                  fluxes[i + 1][next_overlapping])
+
+            if weights[i] is not None and weights[i + 1] is not None:
+                current_weight = np.interp(grid, current_wavelength,
+                                           weights[i][current_overlapping])
+                next_weight = np.interp(grid, next_wavelength,
+                                        weights[i + 1][next_overlapping])
+                stitched_flux[start:stop] = ((current_weight * current_flux +
+                                              next_weight * next_flux) /
+                                             (current_weight + next_weight))
+            else:
+                stitched_flux[start:stop] = 0.5 * (current_flux + next_flux)
+            start = stop
+
+        return Spectrum1D(wavelength=u.Quantity(stitched_wavelength,
+                                                dispersion_unit, copy=False),
+                          flux=u.Quantity(stitched_flux, copy=False),
+                          continuum_normalized=True,
+                          mask=np.zeros(n_total, dtype=bool),
                           meta=dict(header=self.header))
 
 
@@ -859,36 +1405,46 @@ def slice_spectrum(spectrum, min_wavelength, max_wavelength, norm=None):
                                  dispersion_unit=spectrum.wavelength_unit)
 
 
-def interpolate_spectrum(spectrum, new_wavelengths):
+def interpolate_spectrum(spectrum, new_wavelengths, assume_sorted=False):
     """
     Linearly interpolate a spectrum onto a new wavelength grid.
 
+    To resample many spectra that share a wavelength grid, or to conserve
+    flux, see `~aesop.Resampler`.
+
     Parameters
     ----------
     spectrum : `Spectrum1D`
         Spectrum to interpolate onto new wavelengths
     new_wavelengths : `~astropy.units.Quantity`
         New wavelengths to interpolate the spectrum onto
+    assume_sorted : bool
+        Skip sorting the wavelengths of ``spectrum``. `Spectrum1D` sorts its
+        wavelengths when it is created, so this is safe unless the
+        wavelengths have since been reordered.
 
     Returns
     -------
     interp_spec : `Spectrum1D`
         Interpolated spectrum.
     """
+    wavelengths = spectrum.masked_wavelength.to(u.Angstrom).value
+    fluxes = spectrum.masked_flux
 
-    sort_order = np.argsort(spectrum.masked_wavelength.to(u.Angstrom).value)
-    sorted_spectrum_wavelengths = spectrum.masked_wavelength.to(u.Angstrom).value[sort_order]
-    sorted_spectrum_fluxes = spectrum.masked_flux[sort_order]
+    if not assume_sorted:
+        sort_order = np.argsort(wavelengths)
+        wavelengths = wavelengths[sort_order]
+        fluxes = fluxes[sort_order]
 
     new_flux = np.interp(new_wavelengths.to(u.Angstrom).value,
-                         sorted_spectrum_wavelengths,
-                         sorted_spectrum_fluxes)
+                         wavelengths, fluxes)
 
     return Spectrum1D.from_array(new_wavelengths, new_flux,
                                  dispersion_unit=spectrum.wavelength_unit)
 
 
-def cross_corr(target_spectrum, model_spectrum, kernel_width):
+def cross_corr(target_spectrum, model_spectrum, kernel_width,
+               method='fft', peak_fit='parabola'):
     """
     Cross correlate an observed spectrum with a model.
 
@@ -900,23 +1456,44 @@ def cross_corr(target_spectrum, model_spectrum, kernel_width):
         Observed spectrum of star
     model_spectrum : `Spectrum1D`
         Model spectrum of star
-    kernel_width : float
+    kernel_width : float or `None`
         Smooth the model spectrum with a kernel of this width, in units of the
-        wavelength step size in the model
+        wavelength step size in the model. If `None`, the model is used as
+        given, for example if it has already been smoothed.
+    method : {'fft', 'direct'}
+        Compute the cross-correlation with zero-padded FFTs (default), or with
+        `~numpy.correlate`. Both give the same cross-correlation function.
+    peak_fit : {'parabola', 'gaussian', `None`}
+        Refine the peak of the cross-correlation function to sub-pixel
+        precision by fitting a parabola (default) or a Gaussian to the peak
+        and its two neighbors. If `None`, the shift is a whole number of
+        pixels.
+
     Returns
     -------
     wavelength_shift : `~astropy.units.Quantity`
         Wavelength shift required to shift the target spectrum to the rest-frame
     """
+    if kernel_width is None:
+        smoothed_model_flux = np.asarray(model_spectrum.masked_flux)
+    else:
+        smoothed_model_flux = gaussian_filter1d(model_spectrum.masked_flux,
+                                                kernel_width)
 
-    smoothed_model_flux = gaussian_filter1d(model_spectrum.masked_flux,
-                                            kernel_width)
+    target_flux = target_spectrum.masked_flux - target_spectrum.masked_flux.mean()
+    model_flux = smoothed_model_flux - smoothed_model_flux.mean()
 
-    corr = np.correlate(target_spectrum.masked_flux - target_spectrum.masked_flux.mean(),
-                        smoothed_model_flux - smoothed_model_flux.mean(), mode='same')
+    if method == 'fft':
+        corr = _correlate_same_fft(target_flux, model_flux)
+    elif method == 'direct':
+        corr = np.correlate(target_flux, model_flux, mode='same')
+    else:
+        raise ValueError("Unknown cross-correlation method: {0}"
+                         .format(method))
 
-    max_corr_ind = np.argmax(corr)
-    index_shift = corr.shape[0]/2 - max_corr_ind
+    max_corr_ind = _refine_peak(corr, np.argmax(corr), peak_fit)
+    # Index of zero lag in the ``mode='same'`` cross-correlation
+    index_shift = corr.shape[0] // 2 - max_corr_ind
 
     delta_wavelength = np.median(np.abs(np.diff(target_spectrum.masked_wavelength)))
 
@@ -924,6 +1501,56 @@ def cross_corr(target_spectrum, model_spectrum, kernel_width):
     return wavelength_shift
 
 
+def _correlate_same_fft(a, v):
+    """
+    Same as ``np.correlate(a, v, mode='same')`` for real inputs, computed
+    with zero-padded FFTs in O(N log N) time.
+    """
+    a = np.asarray(a, dtype=float)
+    v = np.asarray(v, dtype=float)
+    full = fftconvolve(a, v[::-1], mode='full')
+
+    n_same = max(len(a), len(v))
+    if len(a) >= len(v):
+        start = (len(v) - 1) // 2
+    else:
+        start = len(a) // 2
+    return full[start:start + n_same]
+
+
+def _refine_peak(corr, index, peak_fit='parabola'):
+    """
+    Sub-pixel position of the maximum of ``corr`` near ``index``, from a
+    parabola or Gaussian through the peak and its two neighbors.
+    """
+    if peak_fit is None or index == 0 or index == len(corr) - 1:
+        return index
+
+    y = corr[index - 1:index + 2]
+    if peak_fit == 'gaussian':
+        if np.all(y > 0):
+            y = np.log(y)
+    elif peak_fit != 'parabola':
+        raise ValueError("Unknown peak fitting method: {0}".format(peak_fit))
+
+    curvature = y[0] - 2 * y[1] + y[2]
+    if curvature >= 0:
+        return index
+    return index + 0.5 * (y[0] - y[2]) / curvature
+
+
+def _polyval_rows(fit_params, x):
+    """
+    Evaluate one polynomial per row of ``x`` with Horner's method, given
+    coefficients with the highest power first (one row per polynomial).
+    """
+    flux_fit = np.zeros_like(x, dtype=float)
+    for coefficient in np.asarray(fit_params).T:
+        flux_fit *= x
+        flux_fit += coefficient[:, np.newaxis]
+    return flux_fit
+
+
 def _poly_model(p, x):
     """
     Polynomial model for lstsq continuum normalization
@@ -1,11 +1,21 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from .catalog import get_k2_epic_catalog
+import os
+import json
+import time
+import tempfile
 
+import astropy.units as u
+from astropy.config import get_cache_dir
 from astroquery.simbad import Simbad
 
-__all__ = ['query_for_spectral_type', 'query_for_T_eff']
+from .catalog import get_epic_teff_lookup
+
+__all__ = ['query_for_spectral_type', 'query_for_T_eff', 'SpectralTypeCache']
+
+# Default cache for `query_for_spectral_type`, see `SpectralTypeCache`
+spectral_type_cache = None
 
 # Source: http://www.uni.edu/morgans/astro/course/Notes/section2/spectraltemps.html
 effective_temperatures = {'A0': 9600,
@@ -65,8 +75,176 @@ effective_temperatures = {'A0': 9600,
  'T8': 800}
 
 
+def _decode(value):
+    """
+    SIMBAD table values may be bytes, depending on the astropy version.
+    """
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _query_simbad_spectral_types(identifiers):
+    """
+    Query SIMBAD for the full spectral types of several stars at once.
+
+    Returns a dictionary of identifier to spectral type, or `None` for
+    identifiers that SIMBAD does not know.
+    """
+    customSimbad = Simbad()
+    customSimbad.SIMBAD_URL = 'http://simbad.harvard.edu/simbad/sim-script'
+    customSimbad.add_votable_fields('sptype', 'typed_id')
+    result = customSimbad.query_objects(list(identifiers))
+
+    spectral_types = dict.fromkeys(identifiers)
+    if result is not None:
+        for typed_id, sptype in zip(result['TYPED_ID'], result['SP_TYPE']):
+            spectral_types[_decode(typed_id)] = _decode(sptype)
+    return spectral_types
+
+
+class SpectralTypeCache(object):
+    """
+    Persistent, on-disk cache of SIMBAD spectral types.
+
+    Entries older than ``ttl`` are queried again, and the oldest entries are
+    dropped when there are more than ``max_entries``. With ``offline=True``
+    the cache never queries SIMBAD, and returns entries regardless of their
+    age.
+
+    To use a cache in every call to `query_for_spectral_type` and
+    `query_for_T_eff` (for example in `~aesop.EchelleSpectrum.rv_wavelength_shift`),
+    set the module default:
+
+    >>> from aesop import spectral_type, SpectralTypeCache
+    >>> spectral_type.spectral_type_cache = SpectralTypeCache()  # doctest: +SKIP
+    >>> spectral_type.spectral_type_cache.prefetch(['HD 10697', 'HD 41593'])  # doctest: +SKIP
+    """
+    def __init__(self, path=None, ttl=30*u.day, max_entries=10000,
+                 offline=False):
+        """
+        Parameters
+        ----------
+        path : str (optional)
+            Path to the JSON cache file. Defaults to ``spectral_types.json``
+            in the ``aesop`` directory of the astropy cache.
+        ttl : `~astropy.units.Quantity`
+            Time to keep an entry before querying SIMBAD again
+        max_entries : int
+            Largest number of entries to keep
+        offline : bool
+            Never query SIMBAD.
+        """
+        if path is None:
+            path = os.path.join(get_cache_dir(), 'aesop',
+                                'spectral_types.json')
+        self.path = path
+        self.ttl = u.Quantity(ttl, u.s)
+        self.max_entries = max_entries
+        self.offline = offline
+
+        self.entries = dict()
+        if os.path.exists(path):
+            with open(path, 'r') as cache_file:
+                self.entries = json.load(cache_file)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return "<SpectralTypeCache: {0} entries in {1}>".format(len(self),
+                                                                self.path)
+
+    def _is_fresh(self, identifier):
+        entry = self.entries.get(identifier)
+        return (entry is not None and
+                (self.offline or time.time() - entry[1] < self.ttl.value))
+
+    def get(self, identifier):
+        """
+        Full SIMBAD spectral type of a star, querying SIMBAD only if the
+        identifier is missing or expired.
+
+        Parameters
+        ----------
+        identifier : str
+            Name of target
+
+        Returns
+        -------
+        sptype : str or `None`
+            Spectral type, or `None` if SIMBAD does not know the star.
+
+        Raises
+        ------
+        KeyError
+            If the identifier is not in the cache and the cache is offline.
+        """
+        if not self._is_fresh(identifier):
+            self.prefetch([identifier])
+        return self.entries[identifier][0]
+
+    def prefetch(self, identifiers):
+        """
+        Query SIMBAD once for every identifier that is missing from the
+        cache or expired, then save the cache.
+
+        Parameters
+        ----------
+        identifiers : list of str
+            Names of targets
+
+        Raises
+        ------
+        KeyError
+            If any identifier is not in the cache and the cache is offline.
+        """
+        missing = sorted(set(identifier for identifier in identifiers
+                             if not self._is_fresh(identifier)))
+        if not missing:
+            return
+        if self.offline:
+            raise KeyError("Spectral types of {0} are not in the cache {1}, "
+                           "which is offline.".format(missing, self.path))
+
+        now = time.time()
+        for identifier, sptype in _query_simbad_spectral_types(missing).items():
+            self.entries[identifier] = [sptype, now]
+        self.save()
+
+    def save(self):
+        """
+        Drop expired and excess entries, and write the cache to disk.
+        """
+        if not self.offline:
+            now = time.time()
+            self.entries = {identifier: entry for identifier, entry
+                            in self.entries.items()
+                            if now - entry[1] < self.ttl.value}
+
+        if len(self.entries) > self.max_entries:
+            newest = sorted(self.entries, key=lambda identifier:
+                            self.entries[identifier][1])[-self.max_entries:]
+            self.entries = {identifier: self.entries[identifier]
+                            for identifier in newest}
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # Write to a temporary file and move it into place, so that pipeline
+        # workers saving at the same time never leave a partial file behind
+        descriptor, temporary_path = tempfile.mkstemp(
+            dir=directory, prefix=os.path.basename(self.path), suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'w') as cache_file:
+                json.dump(self.entries, cache_file)
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+
 def query_for_spectral_type(identifier, only_first_two_characters=True,
-                            default_sptype='G0'):
+                            default_sptype='G0', cache=None):
     """
     Search SIMBAD for the spectral type of a star.
 
@@ -80,28 +258,35 @@ def query_for_spectral_type(identifier, only_first_two_characters=True,
         Return only first two characters of spectral type?
     default_sptype : str
         Spectral type returned when none is found on SIMBAD
+    cache : `~aesop.SpectralTypeCache` (optional)
+        Look up the spectral type in this cache. Defaults to
+        ``aesop.spectral_type.spectral_type_cache``; if that is also `None`,
+        SIMBAD is queried directly.
 
     Returns
     -------
     sptype : str
         Spectral type of the star.
     """
-    customSimbad = Simbad()
-    customSimbad.SIMBAD_URL = 'http://simbad.harvard.edu/simbad/sim-script'
-    customSimbad.add_votable_fields('sptype')
-    result = customSimbad.query_object(identifier)
+    if cache is None:
+        cache = spectral_type_cache
+
+    if cache is not None:
+        sptype = cache.get(identifier)
+    else:
+        sptype = _query_simbad_spectral_types([identifier])[identifier]
 
-    if len(result['SP_TYPE']) > 0:
+    if sptype is not None:
 
         if only_first_two_characters:
-            return result['SP_TYPE'][0][:2].strip().decode()
+            return sptype[:2].strip()
         else:
-            return result['SP_TYPE'][0].decode()
+            return sptype
     else:
-        return default_sptype.decode()
+        return default_sptype
 
 
-def query_for_T_eff(identifier):
+def query_for_T_eff(identifier, cache=None):
     """
     Get the approximate effective temperature of a star.
 
@@ -113,6 +298,9 @@ def query_for_T_eff(identifier):
     ----------
     identifier : str
         Name of target
+    cache : `~aesop.SpectralTypeCache` (optional)
+        Look up the spectral type in this cache, see
+        `query_for_spectral_type`.
 
     Returns
     -------
@@ -120,15 +308,14 @@ def query_for_T_eff(identifier):
         Approximate effective temperature of the star.
     """
     if not identifier.startswith('EPIC'):
-        sptype = query_for_spectral_type(identifier)
+        sptype = query_for_spectral_type(identifier, cache=cache)
         while not sptype in effective_temperatures:
             letter, number = list(sptype)
             sptype = letter + str(int(number) - 1)
 
         T_eff = effective_temperatures[sptype]
     else:
-        k2_epic_table = get_k2_epic_catalog()
         epic_number = int(identifier[4:]) # Remove the EPIC, make int
-        T_eff = k2_epic_table.loc[epic_number]['Teff']
+        T_eff = get_epic_teff_lookup()[epic_number]
 
     return T_eff
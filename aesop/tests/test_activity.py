@@ -0,0 +1,178 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import astropy.units as u
+from astropy.time import Time
+
+from ..spectra import Spectrum1D, EchelleSpectrum
+from ..activity import (uncalibrated_s_index, uncalibrated_s_indices,
+                        integrate_spectrum_trapz, BandpassIntegrator,
+                        s_index_integrators, true_h_centroid, hk_width,
+                        Measurement, MeasurementTable, SIndex, StarProps)
+from ..utils import combine_measurements, stars_to_json, json_to_stars
+
+
+def synthetic_hk_spectrum(time):
+    orders = []
+    for i in range(92):
+        # Orders 88-91 all cover the H, K, R and V bandpasses
+        min_wavelength = 3000 + 10 * i if i < 88 else 3802 + i
+        wavelength = np.linspace(min_wavelength, min_wavelength + 120, 2000)
+        flux = 1 + 0.1 * np.random.randn(len(wavelength))
+        flux[::50] = -0.1
+        order = Spectrum1D(wavelength=wavelength * u.Angstrom, flux=flux,
+                           meta=dict(normalization=500 + 100 *
+                                     np.random.rand(len(wavelength))))
+        orders.append(order)
+    return EchelleSpectrum(orders, time=time)
+
+
+def test_uncalibrated_s_indices():
+    times = Time(2457000 + np.arange(3), format='jd')
+    spectra = [synthetic_hk_spectrum(time) for time in times]
+
+    s_indices = uncalibrated_s_indices(spectra)
+
+    for i, spectrum in enumerate(spectra):
+        s_index = uncalibrated_s_index(spectrum)
+        for band in 'hkrv':
+            np.testing.assert_allclose(getattr(s_indices, band).value[i],
+                                       getattr(s_index, band).value)
+            np.testing.assert_allclose(getattr(s_indices, band).err[i],
+                                       getattr(s_index, band).err)
+        np.testing.assert_allclose(s_indices.uncalibrated.value[i],
+                                   s_index.uncalibrated.value)
+    assert np.all(s_indices.time == times)
+
+
+def test_bandpass_integrator():
+    spectra = [synthetic_hk_spectrum(None) for i in range(3)]
+    order = spectra[0].get_order(89)
+    order.meta['normalization'][100:110] = -1
+
+    integrators = s_index_integrators(spectra[0])
+    fluxes = np.array([s.get_order(89).flux.value for s in spectra])
+    normalizations = np.array([s.get_order(89).meta['normalization']
+                               for s in spectra])
+    stacked = integrators['h'].integrate(fluxes, normalizations)
+    s_index = uncalibrated_s_index(spectra[0], integrators=integrators)
+
+    # Same as integrating from scratch, which also clips negative fluxes
+    expected = uncalibrated_s_index(spectra[0])
+    for band in 'hkrv':
+        np.testing.assert_allclose(getattr(s_index, band).value,
+                                   getattr(expected, band).value)
+        np.testing.assert_allclose(getattr(s_index, band).err,
+                                   getattr(expected, band).err)
+    np.testing.assert_allclose(stacked.value[0], expected.h.value)
+
+    # Shifted wavelength solutions, including NaN errors in the bandpass
+    offset = 0.37 * u.Angstrom
+    order.meta['normalization'][1280:1285] = -1
+    wavelength = order.wavelength + offset
+    flux = order.flux.value
+    normalization = order.meta['normalization']
+
+    integrator = BandpassIntegrator(wavelength - offset, true_h_centroid,
+                                    hk_width, weighting=True)
+    shifted = integrator.shift(offset).integrate(flux, normalization)
+    reversed_integrator = BandpassIntegrator(wavelength[::-1], true_h_centroid,
+                                             hk_width, weighting=True)
+    reverse = reversed_integrator.integrate(flux[::-1], normalization[::-1])
+    expected = integrate_spectrum_trapz(
+        Spectrum1D(wavelength=wavelength, flux=flux.copy(),
+                   meta=dict(normalization=normalization)),
+        true_h_centroid, hk_width, weighting=True)
+
+    for measurement in [shifted, reverse]:
+        np.testing.assert_allclose(measurement.value, expected.value)
+        np.testing.assert_allclose(measurement.err, expected.err)
+
+    # Shifts reuse the trapezoid widths, and agree with rebuilding the
+    # integrator on the shifted grid, also when the bounds move
+    for base in [integrator, reversed_integrator]:
+        for offset in [-1.3, 0.02, 2.5] * u.Angstrom:
+            rebuilt = BandpassIntegrator((base.wavelength + offset.value) *
+                                         u.Angstrom, true_h_centroid, hk_width,
+                                         weighting=True)
+            shifted = base.shift(offset / 2).shift(offset / 2)
+            assert shifted.bounds == rebuilt.bounds
+            np.testing.assert_allclose(shifted.flux_weights,
+                                       rebuilt.flux_weights)
+            np.testing.assert_allclose(shifted.variance_weights,
+                                       rebuilt.variance_weights)
+
+
+def test_measurement_table():
+    np.random.seed(42)
+    times = Time(2457000 + np.arange(5), format='jd')
+    measurements = [Measurement(1 + np.random.rand(), err=0.1 * (i + 1),
+                                time=time) for i, time in enumerate(times)]
+    table = MeasurementTable.from_measurements(measurements)
+    other = MeasurementTable(2 + np.random.rand(5), err=0.05)
+
+    assert len(table) == 5 and np.all(table.time == times)
+    assert isinstance(table[2], Measurement) and table[2].err == table.err[2]
+    assert len(table[1:3]) == 2 and len(table[table.value > 1.5]) > 0
+
+    # Errors of independent measurements add in quadrature
+    product = 2 * table * other + 1
+    np.testing.assert_allclose(product.value, 2 * table.value * other.value + 1)
+    np.testing.assert_allclose(product.err,
+                               2 * np.hypot(table.err * other.value,
+                                            table.value * other.err))
+    ratio = 1 / (table - other)
+    np.testing.assert_allclose(ratio.value, 1 / (table.value - other.value))
+    np.testing.assert_allclose(ratio.err, np.hypot(table.err, other.err) /
+                               (table.value - other.value)**2)
+
+    # Times and per-measurement metadata survive arithmetic
+    names = np.array(['HD {0}'.format(i) for i in range(5)])
+    labeled = MeasurementTable(table.value, err=table.err, time=times,
+                               meta=names)
+    for result in [2 * labeled * other + 1, 1 / (other - labeled)]:
+        np.testing.assert_array_equal(result.meta, names)
+        assert np.all(result.time == times)
+    assert (labeled / other)[1:4][2].meta == 'HD 3'
+
+    combined = combine_measurements(measurements)
+    np.testing.assert_allclose(combined.value, np.mean(table.value))
+    np.testing.assert_allclose(combined.err, np.sqrt(np.sum(table.err**2)))
+    assert combined.meta == 5
+
+    # S-indices of whole columns at once
+    s_indices = [uncalibrated_s_index(synthetic_hk_spectrum(time))
+                 for time in times[:3]]
+    stacked = SIndex.stack(s_indices)
+    calibrated = stacked.calibrated(1.5, 0.1)
+    assert isinstance(calibrated, MeasurementTable)
+    for i, s_index in enumerate(s_indices):
+        expected = s_index.calibrated(1.5, 0.1)
+        np.testing.assert_allclose(calibrated.value[i], expected.value)
+        np.testing.assert_allclose(calibrated.err[i], expected.err)
+
+    restored = SIndex.from_dict(stacked.to_dict())
+    np.testing.assert_allclose(restored.uncalibrated.value,
+                               stacked.uncalibrated.value)
+
+
+def test_star_props_json(tmpdir):
+    times = Time(2457000 + np.arange(3), format='jd')
+    s_apo = MeasurementTable([0.5, 0.6, 0.7], err=[0.01, 0.02, 0.03],
+                             time=times)
+    stars = [StarProps(name='HD 1', s_apo=s_apo,
+                       s_mwo=Measurement(0.4, err=0.02), time=times[0]),
+             StarProps(name='HD 2', s_apo=Measurement(0.3, err=0.01),
+                       s_mwo=Measurement(0.2, err=0.01), time=times[1])]
+
+    path = str(tmpdir.join('stars.json'))
+    stars_to_json(stars, output_path=path)
+    restored = {star.name: star for star in json_to_stars(path)}
+
+    assert isinstance(restored['HD 1'].s_apo, MeasurementTable)
+    np.testing.assert_allclose(restored['HD 1'].s_apo.value, s_apo.value)
+    np.testing.assert_allclose(restored['HD 1'].s_apo.err, s_apo.err)
+    np.testing.assert_allclose(restored['HD 1'].s_apo.time.jd, times.jd)
+    assert restored['HD 2'].s_apo.value == 0.3
+    assert restored['HD 1'].s_mwo.value == 0.4
@@ -0,0 +1,75 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import astropy.units as u
+
+from ..blaze import BlazeSolution
+from ..spectra import EchelleSpectrum
+from .test_spectrum1d import generate_target_standard_pairs
+
+
+def test_blaze_solution(tmpdir):
+    np.random.seed(42)
+    target_orders = []
+    standard_orders = []
+    for i in range(10):
+        target, standard = generate_target_standard_pairs()
+        target.wavelength += i * 100 * u.Angstrom
+        standard.wavelength += i * 100 * u.Angstrom
+        target_orders.append(target)
+        standard_orders.append(standard)
+
+    standard_spectrum = EchelleSpectrum(standard_orders, name='standard')
+    polynomial_order = 8
+
+    path = str(tmpdir.join('blaze.npz'))
+    BlazeSolution.from_standard(standard_spectrum, polynomial_order).save(path)
+    blaze_solution = BlazeSolution.load(path)
+
+    assert len(blaze_solution) == 10
+    assert blaze_solution.standard_name == 'standard'
+    assert blaze_solution.standard_fits_path is None
+
+    for i in range(3):
+        target_spectrum = EchelleSpectrum(list(target_orders))
+        blaze_solution.apply(target_spectrum)
+
+        expected = EchelleSpectrum(list(target_orders))
+        expected.continuum_normalize_from_standard(standard_spectrum,
+                                                   polynomial_order)
+
+        for order, expected_order in zip(target_spectrum, expected):
+            np.testing.assert_allclose(order.flux.value,
+                                       expected_order.flux.value, rtol=1e-8)
+            np.testing.assert_array_equal(order.mask, expected_order.mask)
+            assert order.continuum_normalized
+
+
+def test_blaze_solution_shifted_target():
+    np.random.seed(42)
+    target_orders = []
+    standard_orders = []
+    for i in range(5):
+        target, standard = generate_target_standard_pairs()
+        # The target's wavelength solution is offset from the standard's
+        # (the pair shares one wavelength array, so don't shift in place)
+        target.wavelength = target.wavelength + (i * 100 + 2.5) * u.Angstrom
+        standard.wavelength = standard.wavelength + i * 100 * u.Angstrom
+        target_orders.append(target)
+        standard_orders.append(standard)
+
+    standard_spectrum = EchelleSpectrum(standard_orders)
+    polynomial_order = 8
+
+    target_spectrum = EchelleSpectrum(list(target_orders))
+    BlazeSolution.from_standard(standard_spectrum,
+                                polynomial_order).apply(target_spectrum)
+
+    expected = EchelleSpectrum(list(target_orders))
+    expected.continuum_normalize_from_standard(standard_spectrum,
+                                               polynomial_order)
+
+    for order, expected_order in zip(target_spectrum, expected):
+        np.testing.assert_allclose(order.flux.value,
+                                   expected_order.flux.value, rtol=1e-8)
@@ -0,0 +1,93 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import pytest
+import astropy.units as u
+from astropy.table import Table
+from astropy.coordinates import SkyCoord
+
+from .. import catalog, spectral_type
+from ..catalog import LocalCatalog, EpicTeffLookup
+from ..activity import StarProps
+
+
+def duncan_like_table():
+    return Table(dict(Name=['Sun', '', 'eps Eri'], HD=[0, 10476, 22049],
+                      Smean=[0.17, 0.2, 0.5], e_Smean=[0.01, 0, 0.02],
+                      _RAJ2000=[0, 25.6, 53.2], _DEJ2000=[0, 20.3, -9.5]))
+
+
+def test_local_catalog(tmpdir, monkeypatch):
+    path = str(tmpdir.join('duncan.fits'))
+    duncan_like_table().write(path, format='fits')
+
+    # An existing local copy is used without querying Vizier
+    duncan = LocalCatalog.duncan1991(path=path)
+    assert len(duncan) == 3
+    assert 'hd10476' in duncan
+    assert duncan['EPS  ERI']['Smean'] == 0.5
+
+    rows = duncan.query_coordinates(SkyCoord([25.6, 100] * u.deg,
+                                             [20.3, 0] * u.deg))
+    np.testing.assert_array_equal(rows, [1, -1])
+
+    def fake_query(identifiers):
+        assert identifiers == ['Ran']
+        return {'Ran': '03 32 48 -09 30 00'}
+
+    monkeypatch.setattr(catalog, '_query_simbad_coordinates', fake_query)
+    rows = duncan.resolve_many(['HD 22049', 'Ran', 'HD 10476'],
+                               radius=1*u.arcmin)
+    assert [row['HD'] for row in rows] == [22049, 22049, 10476]
+    assert duncan.resolve_many(['Ran'], offline=True) == [None]
+
+    stars = [StarProps(name='HD 10476'), StarProps(name='Sun'),
+             StarProps(name='nobody')]
+    monkeypatch.setattr(catalog, '_query_simbad_coordinates',
+                        lambda identifiers: dict())
+    StarProps.get_s_mwo_many(stars, duncan)
+    assert stars[0].s_mwo.value == 0.2
+    assert stars[0].s_mwo.err == 10 * 0.0205
+    assert stars[1].s_mwo.value == 0.17
+    assert np.isnan(stars[2].s_mwo.value)
+
+
+def test_masked_s_mwo(monkeypatch):
+    table = Table(duncan_like_table(), masked=True)
+    table['Smean'].mask[0] = True
+    duncan = LocalCatalog(table)
+
+    monkeypatch.setattr(catalog, '_query_simbad_coordinates',
+                        lambda identifiers: dict())
+    stars = [StarProps(name='Sun'), StarProps(name='eps Eri')]
+    StarProps.get_s_mwo_many(stars, duncan)
+    assert np.isnan(stars[0].s_mwo.value) and np.isnan(stars[0].s_mwo.err)
+    assert stars[1].s_mwo.value == 0.5
+
+
+def test_epic_teff_lookup(tmpdir, monkeypatch):
+    table = Table(dict(EPIC=[211000003, 201000001, 206000002],
+                       Teff=[5000., 4000., 6000.]))
+    lookup = EpicTeffLookup.build(str(tmpdir), table=table)
+
+    assert isinstance(EpicTeffLookup(str(tmpdir)).epic_ids, np.memmap)
+    np.testing.assert_array_equal(lookup.epic_ids, np.sort(table['EPIC']))
+    np.testing.assert_array_equal(lookup.lookup([206000002, 1, 211000003]),
+                                  [6000, np.nan, 5000])
+    with pytest.raises(KeyError):
+        lookup[999999999]
+
+    monkeypatch.setattr(spectral_type, 'get_epic_teff_lookup',
+                        lambda: lookup)
+    assert spectral_type.query_for_T_eff('EPIC201000001') == 4000
+
+    # An empty catalog has no targets, rather than failing the search
+    empty = EpicTeffLookup.build(str(tmpdir.join('empty')),
+                                 table=Table(dict(EPIC=np.array([], dtype=int),
+                                                  Teff=np.array([]))))
+    assert len(empty) == 0
+    np.testing.assert_array_equal(empty.lookup([206000002, 1]),
+                                  [np.nan, np.nan])
+    with pytest.raises(KeyError):
+        empty[206000002]
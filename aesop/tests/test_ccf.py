@@ -0,0 +1,138 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import pytest
+import astropy.units as u
+import astropy.constants as c
+
+from ..spectra import Spectrum1D, EchelleSpectrum
+from ..ccf import VelocityCCF, robust_line_fit, _bin_template
+
+
+def absorption_lines(wavelength, line_centers):
+    flux = np.ones(len(wavelength))
+    for center in line_centers:
+        flux -= 0.6 * np.exp(-0.5 * (wavelength - center)**2 / 0.1**2)
+    return flux
+
+
+def test_velocity_shifts():
+    np.random.seed(42)
+    line_centers = np.random.uniform(5000, 5600, 300)
+
+    template_wavelength = np.linspace(4950, 5650, 100000)
+    template = Spectrum1D(wavelength=template_wavelength * u.Angstrom,
+                          flux=absorption_lines(template_wavelength,
+                                                line_centers))
+
+    velocity = 12.3 * u.km/u.s
+    doppler_factor = (1 + velocity / c.c).to(u.dimensionless_unscaled).value
+
+    orders = []
+    for i in range(5):
+        wavelength = np.linspace(5000 + 100 * i, 5110 + 100 * i, 2000)
+        flux = absorption_lines(wavelength / doppler_factor, line_centers)
+        orders.append(Spectrum1D(wavelength=wavelength * u.Angstrom,
+                                 flux=flux))
+    spectrum = EchelleSpectrum(orders)
+
+    velocity_ccf = VelocityCCF.from_echelle_spectrum(template, spectrum)
+    assert len(velocity_ccf) == 5
+    assert velocity_ccf.ccf(spectrum).shape == (5, len(velocity_ccf.velocities))
+
+    velocities = spectrum.rv_velocity_shifts(velocity_ccf=velocity_ccf)
+    np.testing.assert_allclose(velocities.to(u.km/u.s).value,
+                               velocity.value, atol=0.1 *
+                               velocity_ccf.velocity_step.value)
+
+    # Masked order edges set the start of the log-wavelength grids, the same
+    # pixels that are resampled onto them
+    for order in orders:
+        mask = np.zeros(len(order.wavelength), dtype=bool)
+        mask[:150] = True
+        order.mask = mask
+    masked_ccf = VelocityCCF.from_echelle_spectrum(template, spectrum)
+    np.testing.assert_allclose(masked_ccf.log_start,
+                               [np.log(order.wavelength.value[150])
+                                for order in orders])
+    np.testing.assert_allclose(
+        masked_ccf.velocity_shifts(spectrum).to(u.km/u.s).value,
+        velocity.value, atol=0.1 * masked_ccf.velocity_step.value)
+
+
+def test_bin_template():
+    # Lines much narrower than a grid pixel are averaged, not aliased
+    log_wavelength = np.log(np.linspace(5000, 5100, 200001))
+    log_step = 1e-5
+    flux = 1 + 0.5 * np.sin(2 * np.pi * log_wavelength / (log_step / 7.3))
+    grid = log_wavelength[1000] + log_step * np.arange(1500)
+
+    binned = _bin_template(log_wavelength, flux, grid, log_step)
+    np.testing.assert_allclose(binned, 1, atol=0.02)
+    assert np.ptp(np.interp(grid, log_wavelength, flux)) > 0.5
+
+
+def test_solve_wavelength_shifts():
+    np.random.seed(42)
+    line_centers = np.random.uniform(5000, 6300, 600)
+
+    template_wavelength = np.linspace(4950, 6350, 200000)
+    template = Spectrum1D(wavelength=template_wavelength * u.Angstrom,
+                          flux=absorption_lines(template_wavelength,
+                                                line_centers))
+
+    velocity = 12.3 * u.km/u.s
+    orders = []
+    for i in range(12):
+        # One order with a bad wavelength solution
+        order_velocity = velocity if i != 4 else 40 * u.km/u.s
+        doppler_factor = (1 + order_velocity / c.c).decompose().value
+        wavelength = np.linspace(5000 + 100 * i, 5110 + 100 * i, 2000)
+        flux = absorption_lines(wavelength / doppler_factor, line_centers)
+        orders.append(Spectrum1D(wavelength=wavelength * u.Angstrom,
+                                 flux=flux))
+    spectrum = EchelleSpectrum(orders)
+
+    velocity_ccf = VelocityCCF.from_echelle_spectrum(template, spectrum)
+    shifts = spectrum.solve_wavelength_shifts(min_order=0, max_order=12,
+                                              velocity_ccf=velocity_ccf)
+
+    assert len(shifts) == 12
+    assert not shifts.inliers[4] and shifts.inliers.sum() >= 10
+
+    centers = 5055 + 100 * np.arange(12)
+    expected = -centers * (velocity / (c.c + velocity)).decompose().value
+    pixel = 110 / 1999
+    np.testing.assert_allclose(shifts.fit_shifts.to(u.Angstrom).value,
+                               expected, atol=0.05 * pixel)
+    np.testing.assert_allclose(
+        spectrum.rv_wavelength_shift_ransac(min_order=0, max_order=12,
+                                            velocity_ccf=velocity_ccf).value,
+        shifts.fit_shifts.value)
+
+    # Cross-correlating a subset of the orders keeps track of which orders
+    subset_ccf = VelocityCCF.from_echelle_spectrum(template, spectrum,
+                                                   only_orders=range(3, 12))
+    np.testing.assert_array_equal(subset_ccf.orders, np.arange(3, 12))
+    subset_shifts = spectrum.solve_wavelength_shifts(min_order=0,
+                                                     max_order=12,
+                                                     velocity_ccf=subset_ccf)
+    assert len(subset_shifts) == 9
+    assert not subset_shifts.inliers[1]
+    np.testing.assert_allclose(subset_shifts.fit_shifts.to(u.Angstrom).value,
+                               expected[3:], atol=0.05 * pixel)
+
+    with pytest.raises(ValueError):
+        subset_ccf.ccf(spectrum, only_orders=range(12))
+
+
+def test_robust_line_fit():
+    np.random.seed(42)
+    x = np.arange(40)
+    y = 0.5 - 0.01 * x + 1e-4 * np.random.randn(len(x))
+    y[[3, 17, 30]] += [0.5, -0.3, 0.2]
+
+    slope, intercept, inliers = robust_line_fit(x, y)
+    assert not np.any(inliers[[3, 17, 30]])
+    np.testing.assert_allclose([slope, intercept], [-0.01, 0.5], atol=1e-4)
@@ -0,0 +1,23 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+
+from ..masking import get_spectrum_mask, get_spectrum_masks
+from .test_spectrum1d import generate_target_standard_pairs
+
+
+def test_gauss_newton_masks_match_lbfgsb():
+    np.random.seed(42)
+    standards = [generate_target_standard_pairs()[1] for i in range(20)]
+
+    wavelengths = np.array([s.wavelength.value for s in standards])
+    fluxes = np.array([s.flux.value for s in standards])
+    batched_masks = get_spectrum_masks(wavelengths, fluxes)
+
+    for standard, batched_mask in zip(standards, batched_masks):
+        lbfgsb_mask = get_spectrum_mask(standard, method='l-bfgs-b')
+
+        np.testing.assert_array_equal(get_spectrum_mask(standard),
+                                      lbfgsb_mask)
+        np.testing.assert_array_equal(batched_mask, lbfgsb_mask)
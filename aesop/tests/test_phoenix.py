@@ -0,0 +1,134 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import pytest
+import astropy.units as u
+
+from ..phoenix import PhoenixGrid, vacuum_to_air, get_phoenix_model_spectrum
+
+
+def test_phoenix_grid(tmpdir):
+    # Include vacuum wavelengths with negative air wavelengths, which are
+    # dropped from the store
+    wavelengths_vacuum = np.linspace(500, 10000, 5000)
+    fluxes = np.random.rand(len(wavelengths_vacuum)).astype('>f4')
+
+    grid = PhoenixGrid(str(tmpdir.join('grid')))
+    grid.add_wavelengths(wavelengths_vacuum)
+    grid.add(4700, 4.5, 0.0, fluxes=fluxes)
+    grid.add(4800, 5.0, 0.5, fluxes=2 * fluxes)
+
+    assert grid.models == [(4700, 4.5, 0.0), (4800, 5.0, 0.5)]
+    assert (4700, 4.5, 0.0) in grid
+    assert (4700, 5.0, 0.0) not in grid
+
+    wavelengths_air = vacuum_to_air(wavelengths_vacuum)
+    positive = wavelengths_air > 0
+    assert np.all(np.diff(grid.wavelengths) > 0)
+    np.testing.assert_array_equal(np.sort(wavelengths_air[positive]),
+                                  grid.wavelengths)
+
+    # Lookups are memory-mapped and read without network access
+    spectrum = get_phoenix_model_spectrum(4710, grid=PhoenixGrid(grid.path))
+    assert isinstance(grid.fluxes(4700), np.memmap)
+    assert np.shares_memory(grid.get(4700).flux.value, grid.fluxes(4700))
+    assert np.shares_memory(grid.window(4700, 5000 * u.Angstrom,
+                                        6000 * u.Angstrom).flux.value,
+                            grid.fluxes(4700))
+    assert spectrum.flux.unit == u.dimensionless_unscaled
+    np.testing.assert_array_equal(
+        spectrum.flux.value,
+        fluxes[positive][np.argsort(wavelengths_air[positive])])
+
+
+def test_phoenix_grid_window(tmpdir):
+    wavelengths_vacuum = np.linspace(3000, 10000, 20000)
+    fluxes = np.random.rand(len(wavelengths_vacuum))
+
+    grid = PhoenixGrid(str(tmpdir))
+    grid.add_wavelengths(wavelengths_vacuum)
+    grid.add(4700, fluxes=fluxes)
+
+    min_wavelength, max_wavelength = 5000 * u.Angstrom, 5100 * u.Angstrom
+    window = grid.window(4700, min_wavelength, max_wavelength, norm=2)
+
+    full_spectrum = grid.get(4700)
+    in_range = ((full_spectrum.wavelength > min_wavelength) &
+                (full_spectrum.wavelength < max_wavelength))
+    np.testing.assert_array_equal(window.wavelength,
+                                  full_spectrum.wavelength[in_range])
+    np.testing.assert_allclose(window.flux.value,
+                               2 * full_spectrum.flux.value[in_range] /
+                               full_spectrum.flux.value[in_range].max())
+
+    # A Quantity norm, like the maximum flux of an order, sets the unit
+    window = grid.window(4700, min_wavelength, max_wavelength,
+                         norm=3 * u.ct)
+    assert isinstance(window._flux, np.ndarray)
+    assert not isinstance(window._flux, u.Quantity)
+    assert window.flux.unit == u.ct
+    np.testing.assert_allclose(window.flux.value.max(), 3)
+
+
+def test_phoenix_grid_interpolate(tmpdir):
+    wavelengths_vacuum = np.linspace(3000, 10000, 1000)
+    fluxes = np.random.rand(len(wavelengths_vacuum))
+
+    grid = PhoenixGrid(str(tmpdir), cache_size=2)
+    grid.add_wavelengths(wavelengths_vacuum)
+    for T_eff in [4600, 4700]:
+        for log_g in [4.5, 5.0]:
+            grid.add(T_eff, log_g, fluxes=fluxes * T_eff * log_g)
+
+    T_effs, log_gs = grid.grid_points()
+    np.testing.assert_array_equal(T_effs, [4600, 4700])
+    np.testing.assert_array_equal(log_gs, [4.5, 5.0])
+
+    # Fluxes are bilinear in T_eff and log g, so interpolation is exact
+    spectrum = grid.interpolate(4630, 4.6)
+    np.testing.assert_allclose(spectrum.flux.value,
+                               grid.get(4700).flux.value / 4700 / 4.5 *
+                               4630 * 4.6)
+    np.testing.assert_allclose(grid.interpolate(4700, 5.0).flux.value,
+                               grid.get(4700, 5.0).flux.value)
+
+    # Cached results are reused, least recently used are evicted
+    assert grid.interpolate(4630, 4.6) is spectrum
+    grid.interpolate(4650, 4.6)
+    grid.interpolate(4660, 4.6)
+    assert grid.interpolate(4630, 4.6) is not spectrum
+
+    with pytest.raises(ValueError):
+        grid.interpolate(4800, 4.5)
+
+
+def test_phoenix_grid_broadened(tmpdir):
+    wavelengths_vacuum = np.linspace(4990, 5030, 40000)
+    fluxes = np.ones_like(wavelengths_vacuum)
+    fluxes[len(fluxes) // 2] = 0
+
+    grid = PhoenixGrid(str(tmpdir))
+    grid.add_wavelengths(wavelengths_vacuum)
+    grid.add(4700, fluxes=fluxes)
+
+    broadened = grid.window(4700, 5000 * u.Angstrom, 5020 * u.Angstrom,
+                            resolution=31500)
+
+    # The unresolved line is broadened to the resolution, conserving its
+    # equivalent width
+    absorption = 1 - broadened.flux.value
+    wavelength = broadened.wavelength.value
+    line_center = np.sum(wavelength * absorption) / np.sum(absorption)
+    fwhm = 2 * np.sqrt(2 * np.log(2)) * np.sqrt(
+        np.sum((wavelength - line_center)**2 * absorption) / np.sum(absorption))
+    np.testing.assert_allclose(fwhm, line_center / 31500, rtol=0.05)
+    np.testing.assert_allclose(np.sum(absorption), 1, rtol=0.01)
+
+    # Broadened models are saved in the store and reused
+    assert len(tmpdir.join(PhoenixGrid.broadened_dir).listdir()) == 1
+    rotated = PhoenixGrid(str(tmpdir)).window(
+        4700, 5000 * u.Angstrom, 5020 * u.Angstrom, resolution=31500,
+        v_sin_i=10 * u.km/u.s)
+    assert len(tmpdir.join(PhoenixGrid.broadened_dir).listdir()) == 2
+    assert rotated.flux.min() > broadened.flux.min()
@@ -0,0 +1,40 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import pytest
+
+from ..pipeline import Pipeline, PipelineStage, load_stage
+from .test_spectrum1d import write_multispec_fits
+
+
+def count_orders(spectrum):
+    return len(spectrum)
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_pipeline(tmpdir, max_workers):
+    paths = []
+    for i in range(4):
+        path = str(tmpdir.join('frame{0}.fits'.format(i)))
+        write_multispec_fits(path, n_orders=i + 2)
+        paths.append(path)
+
+    # A missing file fails in the load stage without stopping other frames
+    paths.insert(2, str(tmpdir.join('missing.fits')))
+
+    pipeline = Pipeline([PipelineStage('load', load_stage, packed=True),
+                         PipelineStage('count', count_orders)],
+                        max_workers=max_workers)
+    results = pipeline.run(paths)
+
+    assert [r.path for r in results] == paths
+    assert [r.result for r in results] == [2, 3, None, 4, 5]
+    assert [r.succeeded for r in results] == [True, True, False, True, True]
+
+    assert results[2].failed_stage == 'load'
+    assert list(results[2].timings.keys()) == ['load']
+    assert list(results[0].timings.keys()) == ['load', 'count']
+
+    timings = Pipeline.stage_timings(results)
+    assert list(timings.keys()) == ['load', 'count']
+    assert all(seconds >= 0 for seconds in timings.values())
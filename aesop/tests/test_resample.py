@@ -0,0 +1,85 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import numpy as np
+import pytest
+import astropy.units as u
+
+from ..spectra import Spectrum1D, interpolate_spectrum
+from ..resample import Resampler
+
+
+def test_flux_conservation():
+    np.random.seed(42)
+    source = np.sort(np.random.uniform(5000, 5100, 3000)) * u.Angstrom
+    target = np.linspace(5010, 5090, 700) * u.Angstrom
+    fluxes = 1 + np.random.rand(4, len(source))
+
+    resampler = Resampler(source, target)
+    rebinned = resampler(fluxes)
+    assert rebinned.shape == (4, len(target))
+
+    # The integral over the target grid is the integral over the same
+    # wavelength range of the source grid
+    def integral(wavelength, flux, min_wavelength, max_wavelength):
+        edges = np.concatenate([[1.5 * wavelength[0] - 0.5 * wavelength[1]],
+                                0.5 * (wavelength[1:] + wavelength[:-1]),
+                                [1.5 * wavelength[-1] - 0.5 * wavelength[-2]]])
+        widths = np.clip(np.minimum(edges[1:], max_wavelength) -
+                         np.maximum(edges[:-1], min_wavelength), 0, None)
+        return np.sum(flux * widths, axis=-1)
+
+    target_edges = (target.value[0] - 0.5 * np.diff(target.value)[0],
+                    target.value[-1] + 0.5 * np.diff(target.value)[0])
+    np.testing.assert_allclose(integral(target.value, rebinned, *target_edges),
+                               integral(source.value, fluxes, *target_edges))
+
+    # Stacks and single frames agree, and masked pixels are ignored
+    np.testing.assert_allclose(resampler(fluxes[1]), rebinned[1])
+    mask = np.zeros(len(source), dtype=bool)
+    mask[1000:1010] = True
+    spectrum = Spectrum1D(wavelength=source, flux=np.where(mask, 1e10,
+                                                           fluxes[0]),
+                          mask=mask, meta=dict())
+    resampled = resampler.resample(spectrum)
+    assert np.nanmax(resampled.flux.value) < 2
+    np.testing.assert_array_equal(resampled.mask,
+                                  np.isnan(resampled.flux.value))
+
+    # Target pixels outside of the source grid are NaN
+    outside = Resampler(source, np.linspace(4980, 4990, 10) * u.Angstrom)
+    assert np.all(np.isnan(outside(fluxes[0])))
+
+
+def test_linear_resampler():
+    np.random.seed(42)
+    source = np.linspace(5000, 5100, 1000) * u.Angstrom
+    target = np.random.uniform(4990, 5110, 500) * u.Angstrom
+    spectrum = Spectrum1D(wavelength=source,
+                          flux=np.random.rand(len(source)), meta=dict())
+
+    expected = np.interp(target.value, source.value, spectrum.flux.value)
+    resampler = Resampler.from_spectrum(spectrum, target, method='linear')
+    np.testing.assert_allclose(resampler(spectrum.flux.value), expected)
+
+    target = np.sort(target)
+    np.testing.assert_allclose(
+        interpolate_spectrum(spectrum, target, assume_sorted=True).flux.value,
+        interpolate_spectrum(spectrum, target).flux.value)
+
+
+def test_single_pixel_grids():
+    grid = np.linspace(5000, 5100, 100) * u.Angstrom
+    single = [5050] * u.Angstrom
+
+    # Pixel widths are undefined on a single-pixel grid
+    for source, target in [(single, grid), (grid, single)]:
+        with pytest.raises(ValueError):
+            Resampler(source, target)
+    with pytest.raises(ValueError):
+        Resampler(single, grid, method='linear')
+
+    # Interpolating onto a single wavelength is fine
+    flux = np.linspace(0, 1, len(grid))
+    np.testing.assert_allclose(Resampler(grid, single, method='linear')(flux),
+                               [0.5])
@@ -0,0 +1,64 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import time
+
+import pytest
+import astropy.units as u
+
+from .. import spectral_type
+from ..spectral_type import (SpectralTypeCache, query_for_spectral_type,
+                             query_for_T_eff)
+
+
+def test_spectral_type_cache(tmpdir, monkeypatch):
+    queries = []
+
+    def fake_query(identifiers):
+        queries.append(sorted(identifiers))
+        simbad = {'HD 10697': 'G5IV', 'HD 41593': 'K0V'}
+        return {identifier: simbad.get(identifier)
+                for identifier in identifiers}
+
+    monkeypatch.setattr(spectral_type, '_query_simbad_spectral_types',
+                        fake_query)
+    path = str(tmpdir.join('spectral_types.json'))
+
+    cache = SpectralTypeCache(path, max_entries=2)
+    cache.prefetch(['HD 10697', 'HD 41593', 'HD 10697'])
+    assert queries == [['HD 10697', 'HD 41593']]
+
+    assert query_for_spectral_type('HD 10697', cache=cache) == 'G5'
+    assert query_for_T_eff('HD 41593', cache=cache) == 5240
+    assert len(queries) == 1
+
+    # Unknown stars get the default spectral type, and are cached too
+    assert query_for_spectral_type('unknown', cache=cache) == 'G0'
+    assert len(queries) == 2
+    assert len(cache) == 2
+
+    # The cache is persistent, and works offline
+    offline_cache = SpectralTypeCache(path, offline=True)
+    assert offline_cache.get('unknown') is None
+    with pytest.raises(KeyError):
+        offline_cache.get('HD 189733')
+
+    # Expired entries are queried again
+    expired_cache = SpectralTypeCache(path, ttl=1*u.s)
+    expired_cache.entries['unknown'][1] = time.time() - 2
+    expired_cache.get('unknown')
+    assert queries[-1] == ['unknown']
+
+    # Saving replaces the file in one step, and a failed write leaves the
+    # previous cache and no temporary files behind
+    assert tmpdir.listdir() == [tmpdir.join('spectral_types.json')]
+    saved = tmpdir.join('spectral_types.json').read()
+
+    def failing_dump(*args, **kwargs):
+        raise IOError
+
+    monkeypatch.setattr(spectral_type.json, 'dump', failing_dump)
+    with pytest.raises(IOError):
+        expired_cache.save()
+    assert tmpdir.listdir() == [tmpdir.join('spectral_types.json')]
+    assert tmpdir.join('spectral_types.json').read() == saved
@@ -5,11 +5,12 @@ from __future__ import (absolute_import, division, print_function,
 import numpy as np
 import astropy.units as u
 import pytest
+from astropy.io import fits
 from astropy.units import UnitsError
 from astropy.tests.helper import remote_data
 from astropy.utils.data import download_file
 
-from ..spectra import Spectrum1D, EchelleSpectrum
+from ..spectra import Spectrum1D, EchelleSpectrum, cross_corr
 
 
 def test_constructor():
@@ -45,6 +46,106 @@ def test_read_fits():
     assert echelle_spectrum[40].flux.mean() > echelle_spectrum[0].flux.mean()
 
 
+def write_multispec_fits(path, n_orders=5, n_pixels=200):
+    """
+    Write a small IRAF multispec FITS file with linear dispersion orders.
+    """
+    data = 100 + np.random.rand(n_orders, n_pixels)
+    header = fits.Header()
+    header['CTYPE1'] = 'MULTISPE'
+    header['CTYPE2'] = 'MULTISPE'
+    header['WCSDIM'] = 2
+    header['WAT0_001'] = 'system=multispec'
+    header['WAT1_001'] = 'wtype=multispec label=Wavelength units=angstroms'
+
+    specs = ' '.join(['spec{0} = "{0} {0} 0 {1} 0.1 {2} 0. 0. 0."'
+                      .format(i + 1, 4000 + 15 * i, n_pixels)
+                      for i in range(n_orders)])
+    wat2 = 'wtype=multispec ' + specs
+    for i in range(0, len(wat2), 68):
+        header['WAT2_{0:03d}'.format(i // 68 + 1)] = wat2[i:i + 68]
+    header['OBJNAME'] = 'synthetic'
+    header['JD'] = 2457000.5
+
+    fits.writeto(path, data, header=header)
+    return data
+
+
+def test_from_fits_single_open(tmpdir, monkeypatch):
+    path = str(tmpdir.join('synthetic.fits'))
+    data = write_multispec_fits(path)
+
+    n_opens = [0]
+    original_open = fits.open
+
+    def counting_open(*args, **kwargs):
+        n_opens[0] += 1
+        return original_open(*args, **kwargs)
+
+    monkeypatch.setattr(fits, 'open', counting_open)
+
+    echelle_spectrum = EchelleSpectrum.from_fits(path)
+
+    # Data and header come from a single open of the file. The wall time per
+    # file is measured in benchmarks/bench_from_fits.py
+    assert n_opens[0] == 1
+
+    assert len(echelle_spectrum) == data.shape[0]
+    assert echelle_spectrum.name == 'synthetic'
+    assert echelle_spectrum.time is not None
+    np.testing.assert_allclose(echelle_spectrum[0].flux.value, data[0])
+    np.testing.assert_allclose(echelle_spectrum[0].wavelength.value,
+                               4000 + 0.1 * np.arange(data.shape[1]))
+
+
+def test_dispersion_evaluated_once(tmpdir, monkeypatch):
+    from ..legacy_specutils import read_fits_spectrum1d, Indexer
+    from ..legacy_specutils.specwcs import (MultispecIRAFCompositeWCS,
+                                            MultispecIRAFArrayWCS)
+
+    path = str(tmpdir.join('synthetic.fits'))
+    data = write_multispec_fits(path)
+
+    n_calls = dict()
+    original_call = MultispecIRAFCompositeWCS.__call__
+
+    def counting_call(self, pixel_indices):
+        n_calls[id(self)] = n_calls.get(id(self), 0) + 1
+        return original_call(self, pixel_indices)
+
+    monkeypatch.setattr(MultispecIRAFCompositeWCS, '__call__', counting_call)
+
+    spectra = read_fits_spectrum1d(path)
+    for spectrum in spectra:
+        for i in range(3):
+            spectrum.dispersion
+            spectrum.wavelength
+        Spectrum1D.from_specutils(spectrum)
+
+    # Each order's wavelength solution is evaluated exactly once
+    assert len(n_calls) == data.shape[0]
+    assert all(n == 1 for n in n_calls.values())
+
+    # Replacing the indexer invalidates the cache
+    spectra[0].indexer = Indexer(0, data.shape[1])
+    spectra[0].dispersion
+    assert n_calls[id(spectra[0].wcs)] == 2
+
+    # With the vectorized WCS, a whole frame costs one evaluation
+    n_evaluations = [0]
+    original_evaluate = MultispecIRAFArrayWCS.evaluate
+
+    def counting_evaluate(self, *args, **kwargs):
+        n_evaluations[0] += 1
+        return original_evaluate(self, *args, **kwargs)
+
+    monkeypatch.setattr(MultispecIRAFArrayWCS, 'evaluate', counting_evaluate)
+
+    echelle_spectrum = EchelleSpectrum.from_fits(path)
+    assert len(echelle_spectrum) == data.shape[0]
+    assert n_evaluations[0] == 1
+
+
 def generate_target_standard_pairs():
     # realistic wavelength range, resolution for one order
     wl = np.linspace(6000, 6117, 1650) * u.Angstrom
@@ -85,4 +186,200 @@ def test_continuum_norm():
 
     # Make sure spectral features are preserved in target spectra
     for order in target_spectrum.spectrum_list:
-        assert np.mean(order.flux) < 1
\ No newline at end of file
+        assert np.mean(order.flux) < 1
+
+
+def test_packed_echelle_spectrum():
+    np.random.seed(42)
+    target_orders = []
+    standard_orders = []
+    for i in range(5):
+        target, standard = generate_target_standard_pairs()
+        target.wavelength += i * 100 * u.Angstrom
+        standard.wavelength += i * 100 * u.Angstrom
+        target_orders.append(target)
+        standard_orders.append(standard)
+
+    target_spectrum = EchelleSpectrum(list(target_orders))
+    packed_spectrum = EchelleSpectrum(list(target_orders), packed=True)
+    standard_spectrum = EchelleSpectrum(standard_orders)
+
+    assert packed_spectrum.is_packed and not target_spectrum.is_packed
+    assert packed_spectrum.flux_block.shape == (5, 1650)
+
+    # Orders are views onto the packed arrays
+    assert np.shares_memory(packed_spectrum[2].flux.value,
+                            packed_spectrum.flux_block)
+    assert np.shares_memory(packed_spectrum[2].wavelength.value,
+                            packed_spectrum.wavelength_block)
+
+    polynomial_order = 8
+    for spectrum in [target_spectrum, packed_spectrum]:
+        spectrum.continuum_normalize_from_standard(standard_spectrum,
+                                                   polynomial_order)
+        spectrum.offset_wavelength_solution(0.5 * u.Angstrom)
+        spectrum.offset_wavelength_solution(np.arange(5) * u.Angstrom)
+
+    for packed_order, order in zip(packed_spectrum, target_spectrum):
+        np.testing.assert_allclose(packed_order.flux.value, order.flux.value)
+        np.testing.assert_allclose(packed_order.wavelength.value,
+                                   order.wavelength.value)
+        np.testing.assert_array_equal(packed_order.mask, order.mask)
+        assert packed_order.continuum_normalized
+
+
+def test_batched_continuum_norm():
+    np.random.seed(42)
+    target_orders = []
+    standard_orders = []
+    for i in range(10):
+        target, standard = generate_target_standard_pairs()
+        target.wavelength += i * 100 * u.Angstrom
+        standard.wavelength += i * 100 * u.Angstrom
+        target_orders.append(target)
+        standard_orders.append(standard)
+
+    standard_spectrum = EchelleSpectrum(standard_orders)
+    polynomial_order = 8
+
+    # The stacked fit reproduces the per-order polynomial fits
+    fit_params = standard_spectrum.fit_orders(polynomial_order)
+    continua = standard_spectrum.predict_continua(fit_params)
+    for i in range(len(standard_spectrum)):
+        per_order_params = standard_spectrum.fit_order(i, polynomial_order)
+        np.testing.assert_allclose(
+            continua[i], standard_spectrum.predict_continuum(i,
+                                                             per_order_params),
+            rtol=1e-8)
+
+    target_spectrum = EchelleSpectrum(list(target_orders))
+    batched_spectrum = EchelleSpectrum(list(target_orders))
+
+    target_spectrum.continuum_normalize_from_standard(standard_spectrum,
+                                                      polynomial_order)
+    batched_spectrum.continuum_normalize_from_standard(standard_spectrum,
+                                                       polynomial_order,
+                                                       batched=True)
+
+    for batched_order, order in zip(batched_spectrum, target_spectrum):
+        np.testing.assert_allclose(batched_order.flux.value, order.flux.value,
+                                   rtol=1e-8)
+        np.testing.assert_array_equal(batched_order.mask, order.mask)
+        assert batched_order.continuum_normalized
+
+
+def test_cross_corr_fft():
+    wavelength = np.linspace(5000, 5010, 2001) * u.Angstrom
+    line_centers = [5002, 5004.5, 5007]
+
+    def absorption_spectrum(shift):
+        flux = np.ones(len(wavelength))
+        for center in line_centers:
+            flux -= 0.5 * np.exp(-0.5 * (wavelength.value - center - shift)**2 /
+                                 0.05**2)
+        return Spectrum1D.from_array(wavelength, flux)
+
+    model = absorption_spectrum(0)
+    true_shift = 0.0123
+    target = absorption_spectrum(true_shift)
+
+    # The FFT cross-correlation is the same as the direct one
+    direct = cross_corr(target, model, kernel_width=1, method='direct',
+                        peak_fit=None)
+    fft = cross_corr(target, model, kernel_width=1, peak_fit=None)
+    assert direct == fft
+
+    # Sub-pixel peak fitting recovers the shift better than whole pixels
+    pixel = np.median(np.diff(wavelength)).value
+    for peak_fit in ['parabola', 'gaussian']:
+        shift = cross_corr(target, model, kernel_width=1, peak_fit=peak_fit)
+        assert abs(shift.value + true_shift) < 0.1 * pixel
+
+
+def test_to_spectrum1d_weighted_overlaps():
+    np.random.seed(42)
+    orders = []
+    for i in range(5):
+        wavelength = np.linspace(5000 + 80 * i, 5100 + 80 * i, 1000)
+        mask = np.random.rand(len(wavelength)) < 0.05
+        order = Spectrum1D(wavelength=wavelength * u.Angstrom,
+                           flux=np.ones(len(wavelength)) + i, mask=mask,
+                           meta=dict())
+        orders.append(order)
+    spectrum = EchelleSpectrum(orders)
+
+    # Equal weights without continuum normalizations
+    spec1d = spectrum.to_Spectrum1D()
+    assert np.all(np.diff(spec1d.wavelength.value) > 0)
+    overlap = ((spec1d.wavelength.value > 5160) &
+               (spec1d.wavelength.value < 5180))
+    np.testing.assert_allclose(spec1d.flux.value[overlap], 2.5)
+
+    # Inverse-variance weights from the continuum normalizations
+    for i, order in enumerate(orders):
+        order.meta['normalization'] = np.full(len(order.wavelength),
+                                              1 + 3 * (i % 2))
+    spec1d = spectrum.to_Spectrum1D()
+    np.testing.assert_allclose(spec1d.flux.value[overlap],
+                               (4 * 2 + 1 * 3) / 5)
+    assert len(spec1d.wavelength) == len(spec1d.flux) == len(spec1d.mask)
+
+
+def test_cached_masked_views():
+    np.random.seed(42)
+    wavelength = np.linspace(5000, 5100, 1000) * u.Angstrom
+    mask = np.random.rand(len(wavelength)) < 0.1
+    spectrum = Spectrum1D(wavelength=wavelength,
+                          flux=np.random.rand(len(wavelength)), mask=mask)
+
+    masked_wavelength = spectrum.masked_wavelength
+    assert spectrum.masked_wavelength is masked_wavelength
+    assert spectrum.masked_flux is spectrum.masked_flux
+    with pytest.raises(ValueError):
+        spectrum.masked_flux[0] = 0
+
+    # Reassigning (or incrementing) the arrays invalidates the caches
+    spectrum.wavelength += 1 * u.Angstrom
+    np.testing.assert_allclose(spectrum.masked_wavelength.value,
+                               masked_wavelength.value + 1)
+    spectrum.mask = np.zeros(len(wavelength), dtype=bool)
+    assert len(spectrum.masked_flux) == len(wavelength)
+    spectrum.flux[:] = 2
+    spectrum.reset_masked_views()
+    spectrum.mask_outliers()
+    assert np.all(spectrum.masked_flux.value == 2)
+
+    # Packed orders see in-place offsets of the wavelength block
+    orders = [Spectrum1D(wavelength=wavelength + i * 100 * u.Angstrom,
+                         flux=np.ones(len(wavelength)), mask=mask)
+              for i in range(3)]
+    packed_spectrum = EchelleSpectrum(orders, packed=True)
+    before = packed_spectrum[1].masked_wavelength.value.copy()
+    packed_spectrum.offset_wavelength_solution(0.5 * u.Angstrom)
+    np.testing.assert_allclose(packed_spectrum[1].masked_wavelength.value,
+                               before + 0.5)
+
+
+def test_unit_free_storage():
+    wavelength = np.linspace(0.5, 0.6, 100) * u.um
+    flux = np.random.rand(100)
+    spectrum = Spectrum1D(wavelength=wavelength, flux=flux)
+
+    # Plain float64 arrays with separate units, Quantity views on access
+    assert spectrum._wavelength.dtype == np.float64
+    assert spectrum.wavelength_unit == u.um
+    assert spectrum.flux_unit == u.dimensionless_unscaled
+    assert not np.shares_memory(spectrum._flux, flux)
+    spectrum.flux.value[:10] = 0
+    assert np.all(spectrum._flux[:10] == 0)
+    expected = spectrum.wavelength.value + 0.001
+    spectrum.wavelength += 1 * u.nm
+    np.testing.assert_allclose(spectrum.wavelength.to(u.um).value, expected)
+
+    # The fast constructor wraps its arrays without copies or sorting
+    fast = Spectrum1D._from_values(spectrum._wavelength, spectrum._flux,
+                                   u.um, mask=np.zeros(100, dtype=bool))
+    assert np.shares_memory(fast.flux.value, spectrum._flux)
+    assert fast.meta == dict() and fast.meta is not spectrum.meta
+    np.testing.assert_array_equal(fast.masked_wavelength.value,
+                                  spectrum.wavelength.value)
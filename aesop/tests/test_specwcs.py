@@ -0,0 +1,79 @@
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from collections import OrderedDict
+
+import numpy as np
+import astropy.units as u
+
+from ..legacy_specutils.readspec import _parse_multispec_dict
+from ..legacy_specutils.specwcs import (MultispecIRAFArrayWCS,
+                                        MultispecIRAFCompositeWCS,
+                                        Spectrum1DPolynomialWCS,
+                                        Spectrum1DIRAFLegendreWCS,
+                                        Spectrum1DIRAFChebyshevWCS,
+                                        WeightedCombinationWCS)
+
+
+def composite_wcs(spec_dict):
+    """
+    Build the reference per-order WCS, as in ``multispec_wcs_reader``.
+    """
+    if spec_dict['dispersion_type'] in [0, 1]:
+        dispersion_wcs = Spectrum1DPolynomialWCS(
+            degree=1, c0=spec_dict["dispersion0"],
+            c1=spec_dict["average_dispersion_delta"])
+    else:
+        dispersion_wcs = WeightedCombinationWCS()
+        for function_dict in spec_dict['functions']:
+            wcs_class = {'legendre': Spectrum1DIRAFLegendreWCS,
+                         'chebyshev': Spectrum1DIRAFChebyshevWCS
+                         }[function_dict['type']]
+            coefficients = dict([('c{:d}'.format(i),
+                                  function_dict['coefficients'][i])
+                                 for i in range(function_dict['order'])])
+            wcs = wcs_class(function_dict['order'], function_dict['pmin'],
+                            function_dict['pmax'], **coefficients)
+            dispersion_wcs.add_WCS(
+                wcs, weight=function_dict["weight"],
+                zero_point_offset=function_dict["zero_point_offset"])
+
+    return MultispecIRAFCompositeWCS(
+        dispersion_wcs, spec_dict["no_valid_pixels"],
+        z=spec_dict["doppler_factor"],
+        log=spec_dict['dispersion_type'] == 1, unit=u.Angstrom)
+
+
+def test_array_wcs_matches_composite():
+    n_pixels = 2048
+    multispec = OrderedDict([
+        ('wtype', 'multispec'),
+        # Legendre order
+        ('spec1', '1 1 2 3500. 0.02 2048 0. 0. 0. 1. 0. 2 4 1. 2048. '
+                  '3520.4 20.3 -0.41 0.012'),
+        # Chebyshev order with a zero point offset and non-zero redshift
+        ('spec2', '2 2 2 3550. 0.02 2048 1e-5 0. 0. 1. 2.5 1 3 1. 2048. '
+                  '3570.1 21.1 -0.38'),
+        # Weighted sum of two functions
+        ('spec3', '3 3 2 3600. 0.02 2048 0. 0. 0. 0.5 0. 2 2 1. 2048. '
+                  '3620. 20. 0.5 0. 1 2 1. 2048. 3621. 20.2'),
+        # Linear and log-linear orders
+        ('spec4', '4 4 0 3650. 0.02 2048 0. 0. 0.'),
+        ('spec5', '5 5 1 3.5636 1e-5 2048 0. 0. 0.'),
+    ])
+    multispec_dict = _parse_multispec_dict(multispec)
+
+    array_wcs = MultispecIRAFArrayWCS.from_multispec_dict(
+        multispec_dict, num_pixels=n_pixels, unit=u.Angstrom)
+
+    pixels = np.arange(n_pixels)
+    grid = array_wcs(pixels)
+    assert grid.shape == (len(multispec_dict), n_pixels)
+
+    for i, spec_dict in enumerate(multispec_dict.values()):
+        expected = composite_wcs(spec_dict)(pixels)
+        np.testing.assert_allclose(grid[i].value, expected.value, rtol=1e-12)
+        np.testing.assert_allclose(array_wcs[i](pixels).value,
+                                   expected.value, rtol=1e-12)
+        np.testing.assert_allclose(array_wcs[i](pixels[10:20]).value,
+                                   expected.value[10:20], rtol=1e-12)
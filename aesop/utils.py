@@ -8,8 +8,9 @@ encoder.FLOAT_REPR = lambda o: format(o, '.8f')
 from glob import glob
 
 import numpy as np
+from astropy.time import Time
 
-from .activity import Measurement, SIndex, StarProps
+from .activity import Measurement, MeasurementTable, SIndex, StarProps
 
 __all__ = ['glob_spectra_paths', 'stars_to_json', 'json_to_stars']
 
@@ -52,9 +53,22 @@ def glob_spectra_paths(data_dir, target_names):
 
 
 def combine_measurements(measurement_list):
-    mean = np.mean([m.value for m in measurement_list])
-    err = np.sqrt(np.sum(np.array([m.err for m in measurement_list])**2))
-    return Measurement(value=mean, err=err, meta=len(measurement_list))
+    """
+    Mean of many measurements, with their errors added in quadrature.
+
+    Parameters
+    ----------
+    measurement_list : list of `Measurement` or `MeasurementTable`
+        Measurements to combine
+
+    Returns
+    -------
+    combined : `Measurement`
+        Combined measurement, with the number of measurements as ``meta``
+    """
+    if not isinstance(measurement_list, MeasurementTable):
+        measurement_list = MeasurementTable.from_measurements(measurement_list)
+    return measurement_list.combine()
 
 
 def floats_to_strings(d):
@@ -78,7 +92,10 @@ def stars_to_json(star_list, output_path='star_data.json'):
     stars_attrs = star_list[0].__dict__.keys()
     all_data = dict()
 
-    for star in star_list:
+    # Convert all of the times at once, rather than one star at a time
+    datetimes = Time([star.time for star in star_list]).datetime
+
+    for star, datetime in zip(star_list, datetimes):
         star_data = dict()
 
         for attr in stars_attrs:
@@ -86,14 +103,14 @@ def stars_to_json(star_list, output_path='star_data.json'):
 
             if isinstance(value, Measurement):
                 value = floats_to_strings(value.__dict__)
-            elif isinstance(value, SIndex):
+            elif isinstance(value, (SIndex, MeasurementTable)):
                 value = value.to_dict()
             else:
                 value = str(value)
 
             star_data[attr] = value
 
-        all_data[star.name + '; ' + str(star.time.datetime)] = star_data
+        all_data[star.name + '; ' + str(datetime)] = star_data
 
     with open(output_path, 'w') as w:
         json.dump(all_data, w, indent=4, sort_keys=True)
@@ -0,0 +1,63 @@
+"""
+Benchmark continuum normalization from a standard star, per order and
+batched, on a synthetic 107-order frame.
+
+Run from the repository root with::
+
+    python benchmarks/bench_continuum_normalization.py
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import time
+
+import numpy as np
+import astropy.units as u
+
+from aesop import EchelleSpectrum
+from aesop.tests.test_spectrum1d import generate_target_standard_pairs
+
+n_orders = 107
+polynomial_order = 8
+n_repeats = 5
+
+
+def synthetic_frames():
+    np.random.seed(42)
+    target_orders = []
+    standard_orders = []
+    for i in range(n_orders):
+        target, standard = generate_target_standard_pairs()
+        target.wavelength = target.wavelength + i * 100 * u.Angstrom
+        standard.wavelength = standard.wavelength + i * 100 * u.Angstrom
+        target_orders.append(target)
+        standard_orders.append(standard)
+    return target_orders, EchelleSpectrum(standard_orders)
+
+
+def best_time(target_orders, standard_spectrum, **kwargs):
+    """
+    Shortest wall time of ``n_repeats`` end-to-end normalizations.
+    """
+    times = []
+    for i in range(n_repeats):
+        target_spectrum = EchelleSpectrum(list(target_orders))
+        start = time.time()
+        target_spectrum.continuum_normalize_from_standard(standard_spectrum,
+                                                          polynomial_order,
+                                                          **kwargs)
+        times.append(time.time() - start)
+    return min(times)
+
+
+if __name__ == '__main__':
+    target_orders, standard_spectrum = synthetic_frames()
+
+    per_order_time = best_time(target_orders, standard_spectrum)
+    batched_time = best_time(target_orders, standard_spectrum, batched=True)
+
+    print('{0} orders, polynomial order {1}'.format(n_orders,
+                                                    polynomial_order))
+    print('per order: {0:8.1f} ms'.format(1e3 * per_order_time))
+    print('batched:   {0:8.1f} ms'.format(1e3 * batched_time))
+    print('speedup:   {0:8.1f}x'.format(per_order_time / batched_time))
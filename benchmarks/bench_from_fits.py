@@ -0,0 +1,91 @@
+"""
+Benchmark loading echelle spectra from FITS files: the number of times each
+file is opened, and the wall time per file, for `EchelleSpectrum.from_fits`
+and for the previous loader, which read the data and header with separate
+``fits.getdata`` and ``fits.getheader`` calls and then read the header again.
+
+Run from the repository root with::
+
+    python benchmarks/bench_from_fits.py
+"""
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from astropy.io import fits
+from astropy.io.fits.hdu.hdulist import HDUList
+
+from aesop import EchelleSpectrum, Spectrum1D
+from aesop.legacy_specutils.readspec import read_fits_spectrum1d_from_hdu
+from aesop.tests.test_spectrum1d import write_multispec_fits
+
+n_files = 20
+n_orders = 107
+n_pixels = 2048
+
+
+def previous_from_fits(path):
+    """
+    `EchelleSpectrum.from_fits` before files were opened only once.
+    """
+    data = fits.getdata(path)
+    header = fits.getheader(path)
+    spectrum_list = [Spectrum1D.from_specutils(s)
+                     for s in read_fits_spectrum1d_from_hdu(data, header)]
+    header = fits.getheader(path)
+
+    name = header.get('OBJNAME', None)
+    return EchelleSpectrum(spectrum_list, header=header, name=name,
+                           fits_path=path)
+
+
+def count_opens_and_time(loader, paths):
+    """
+    Number of FITS file opens per file, and the mean wall time per file.
+    """
+    n_opens = [0]
+    original_fromfile = HDUList.fromfile.__func__
+
+    def counting_fromfile(cls, *args, **kwargs):
+        n_opens[0] += 1
+        return original_fromfile(cls, *args, **kwargs)
+
+    HDUList.fromfile = classmethod(counting_fromfile)
+    try:
+        start = time.time()
+        for path in paths:
+            loader(path)
+        wall_time = time.time() - start
+    finally:
+        HDUList.fromfile = classmethod(original_fromfile)
+
+    return n_opens[0] / len(paths), wall_time / len(paths)
+
+
+if __name__ == '__main__':
+    np.random.seed(42)
+    directory = tempfile.mkdtemp()
+    try:
+        paths = [os.path.join(directory, 'frame{0:03d}.fits'.format(i))
+                 for i in range(n_files)]
+        for path in paths:
+            write_multispec_fits(path, n_orders=n_orders, n_pixels=n_pixels)
+
+        # Warm up the file system cache and the imports
+        for loader in [previous_from_fits, EchelleSpectrum.from_fits]:
+            loader(paths[0])
+
+        print('{0} files, {1} orders x {2} pixels'.format(n_files, n_orders,
+                                                         n_pixels))
+        for label, loader in [('previous', previous_from_fits),
+                              ('from_fits', EchelleSpectrum.from_fits)]:
+            opens, wall_time = count_opens_and_time(loader, paths)
+            print('{0:10s} {1:4.1f} opens/file {2:8.1f} ms/file'
+                  .format(label, opens, 1e3 * wall_time))
+    finally:
+        shutil.rmtree(directory)